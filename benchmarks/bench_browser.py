@@ -0,0 +1,70 @@
+"""Browser benchmark: time per shelf page and Chrome memory, with and without the lean mode of setup_browser.
+
+Needs Chrome, and the network, since the page references covers, fonts and scripts hosted by Goodreads.
+The shelf itself comes from the local stand-in, so both modes load the same page. Per page, it reports
+the seconds until page_wait returns, the resources the page loaded and the JS heap and DOM size Chrome
+reports through CDP's Performance.getMetrics.
+Run with `python -m benchmarks.bench_browser` from the repository root, `--json` to keep the results.
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict
+
+from benchmarks.stand_in import StandInServer
+from goodreads_scraper.utils import PER_PAGE, create_read_page, page_wait, read_books_fast, setup_browser
+
+
+def bench_mode(server: StandInServer, lean: bool, pages: int) -> Dict[str, Any]:
+    browser = setup_browser(lean=lean)
+    try:
+        browser.execute_cdp_cmd("Performance.enable", {})
+        seconds = []
+        books = 0
+        for page in range(1, pages + 1):
+            t0 = time.perf_counter()
+            browser.get(create_read_page(server.url, page, PER_PAGE))
+            page_wait(browser)
+            books += len(read_books_fast(browser))
+            seconds.append(time.perf_counter() - t0)
+        resources = browser.execute_script("return performance.getEntriesByType('resource').length")
+        metrics = {
+            metric["name"]: metric["value"]
+            for metric in browser.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        }
+    finally:
+        browser.quit()
+    return {
+        "mode": "lean" if lean else "full",
+        "pages": pages,
+        "books": books,
+        "p50_page_seconds": statistics.median(seconds),
+        "max_page_seconds": max(seconds),
+        "resources_last_page": resources,
+        "js_heap_mb": metrics.get("JSHeapUsedSize", 0) / 1024**2,
+        "dom_nodes": metrics.get("Nodes", 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=5, help="Shelf pages to load in each mode.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with StandInServer(books=args.pages * PER_PAGE) as server:
+        results = [bench_mode(server, lean, args.pages) for lean in (False, True)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(
+            f"{result['mode']:>5}: {result['p50_page_seconds'] * 1000:7.0f} ms/page (p50), "
+            f"{result['max_page_seconds'] * 1000:7.0f} ms max, {result['resources_last_page']:4d} resources, "
+            f"{result['js_heap_mb']:6.1f} MB JS heap, {result['dom_nodes']:7.0f} DOM nodes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Offline end-to-end benchmark: parsing, shelf scraping and author scraping against the local stand-in.
+
+Needs no network or browser, so it can run in CI. Reports books (or authors) per second,
+p50/p99 request latency and the peak RSS of the process after each stage.
+Run with `python -m benchmarks.bench_e2e` from the repository root, `--json` to keep the results.
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.stand_in import ShelfTemplate, StandInServer, FIXTURE, stand_in_cookies
+from goodreads_scraper.metrics import InMemoryMetrics, percentile, set_metrics
+from goodreads_scraper.scrape import scrape_gr_author, scrape_shelf
+from goodreads_scraper.utils import AUTHOR_WORKERS, PER_PAGE, read_books_from_html, setup_session
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def report(stage: str, items: int, elapsed: float, metrics: InMemoryMetrics) -> Dict[str, Any]:
+    latencies = metrics.observations("request_seconds")
+    return {
+        "stage": stage,
+        "items": items,
+        "seconds": elapsed,
+        "items_per_second": items / elapsed if elapsed else 0.0,
+        "requests": len(latencies),
+        "retries": metrics.counter("retries"),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def bench_parse(books: int) -> Dict[str, Any]:
+    """Parses a full page of the synthetic shelf until `books` books were read."""
+    html = ShelfTemplate(FIXTURE.read_text(encoding="utf-8")).render(PER_PAGE, 1, PER_PAGE)
+    metrics = InMemoryMetrics()
+    parsed = 0
+    t0 = time.perf_counter()
+    while parsed < books:
+        parsed += len(read_books_from_html(html))
+    return report("parse", parsed, time.perf_counter() - t0, metrics)
+
+
+def bench_shelf(server: StandInServer) -> Dict[str, Any]:
+    """Scrapes the stand-in shelf over HTTP, the same way a live shelf is scraped with saved cookies."""
+    metrics = InMemoryMetrics()
+    previous = set_metrics(metrics)
+    try:
+        t0 = time.perf_counter()
+        books = scrape_shelf(server.url)
+        elapsed = time.perf_counter() - t0
+    finally:
+        set_metrics(previous)
+    assert len(books) == server.books, f"Scraped {len(books)} of {server.books} books."
+    return report("shelf", len(books), elapsed, metrics)
+
+
+def bench_authors(server: StandInServer) -> Dict[str, Any]:
+    """Scrapes every author of the stand-in shelf with AUTHOR_WORKERS threads sharing a session."""
+    urls = [server.author_url(author_id) for author_id in server.author_ids()]
+    metrics = InMemoryMetrics()
+    previous = set_metrics(metrics)
+    try:
+        t0 = time.perf_counter()
+        with setup_session(AUTHOR_WORKERS) as session:
+            with ThreadPoolExecutor(AUTHOR_WORKERS) as executor:
+                results: List[Any] = list(
+                    executor.map(lambda url: scrape_gr_author(url, session=session), urls)
+                )
+        elapsed = time.perf_counter() - t0
+    finally:
+        set_metrics(previous)
+    assert sum(birthplace is not None for birthplace, _ in results) == (len(urls) + 1) // 2
+    return report("authors", len(results), elapsed, metrics)
+
+
+def run(
+    books: int = 2000,
+    authors: int = 100,
+    latency: float = 0.05,
+    error_rate: float = 0.02,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Runs every stage and returns one result per stage.
+
+    Args:
+        books (int): Books in the synthetic shelf.
+        authors (int): Distinct authors in it.
+        latency (float): Seconds every response of the stand-in is delayed by.
+        error_rate (float): Share of responses the stand-in answers with 503.
+        seed (int): Seed of the injected errors.
+
+    Returns:
+        List[Dict[str, Any]]: Results of the parse, shelf and authors stages.
+    """
+    results = [bench_parse(books)]
+    with stand_in_cookies(), StandInServer(
+        books=books, latency=latency, error_rate=error_rate, authors=authors, seed=seed
+    ) as server:
+        results.append(bench_shelf(server))
+        results.append(bench_authors(server))
+    return results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--books", type=int, default=2000)
+    arg_parser.add_argument("--authors", type=int, default=100)
+    arg_parser.add_argument("--latency", type=float, default=0.05)
+    arg_parser.add_argument("--error-rate", type=float, default=0.02)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", help="File to write the results to.")
+    args = arg_parser.parse_args()
+
+    results = run(args.books, args.authors, args.latency, args.error_rate, args.seed)
+    for result in results:
+        print(
+            f"{result['stage']:>8}: {result['items_per_second']:9.1f} items/s, "
+            f"{result['requests']:4d} requests ({result['retries']:.0f} retries), "
+            f"p50 {result['p50_ms']:7.1f}ms, p99 {result['p99_ms']:7.1f}ms, "
+            f"peak RSS {result['peak_rss_mb']:6.1f}MB"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
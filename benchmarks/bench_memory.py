@@ -0,0 +1,51 @@
+"""Memory taken by a large shelf held as plain dicts vs Book records.
+
+Builds the rows of the saved shelf over and over, once as the dicts the parsers used to return
+and once as Books, and reports the bytes traced by tracemalloc for each.
+Run with `python -m benchmarks.bench_memory` from the repository root.
+"""
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.stand_in import FIXTURE
+from goodreads_scraper.book import Book
+from goodreads_scraper.utils import read_books_from_lxml
+
+
+def traced_bytes(build: Callable[[], List[Any]]) -> int:
+    """Bytes still allocated after build returned, so the size of what it built."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return after - before
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--books", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    saved = read_books_from_lxml(FIXTURE.read_text(encoding="utf-8"))
+    rows: List[Dict[str, Any]] = [book.to_dict() for book in saved]
+
+    def as_dicts() -> List[Dict[str, Any]]:
+        return [dict(rows[i % len(rows)], review_id=i) for i in range(args.books)]
+
+    def as_books() -> List[Book]:
+        return [Book(**dict(rows[i % len(rows)], review_id=i)) for i in range(args.books)]
+
+    dicts = traced_bytes(as_dicts)
+    books = traced_bytes(as_books)
+    print(f"{args.books} books as dicts: {dicts / 1024**2:7.1f}MB ({dicts / args.books:5.0f} bytes/book)")
+    print(f"{args.books} books as Books: {books / 1024**2:7.1f}MB ({books / args.books:5.0f} bytes/book)")
+    print(f"Books take {books / dicts:.0%} of the memory of dicts.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Requests and wall time to scrape a shelf over HTTP with Goodreads' default page size vs PER_PAGE.
+
+Runs against the local stand-in shelf, with a fixed latency per response standing in for the network.
+Run with `python -m benchmarks.bench_page_size` from the repository root.
+"""
+import argparse
+import time
+
+from benchmarks.stand_in import StandInServer, stand_in_cookies
+from goodreads_scraper.scrape import scrape_shelf
+from goodreads_scraper.utils import PER_PAGE
+
+
+def bench_page_size(books: int, latency: float, per_page: int | None) -> None:
+    with StandInServer(books=books, latency=latency) as server:
+        t0 = time.perf_counter()
+        scraped = scrape_shelf(server.url, per_page=per_page)
+        elapsed = time.perf_counter() - t0
+    assert len(scraped) == books
+    label = "default" if per_page is None else str(per_page)
+    print(f"per_page={label:>7}: {server.requests:4d} requests, {elapsed:6.2f}s")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--books", type=int, default=1000)
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    args = arg_parser.parse_args()
+
+    with stand_in_cookies():
+        for per_page in (None, PER_PAGE):
+            bench_page_size(args.books, args.latency, per_page)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Shelf pages parsed per second by the fetch threads themselves vs by a ParsePool.
+
+Every thread stands in for a fetch worker that got a full page and has to parse it,
+like the workers of iter_shelf_pages_from. Parsing in the threads is bound by the GIL,
+the pool spreads it over one process per CPU.
+Run with `python -m benchmarks.bench_parse_pool` from the repository root.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from benchmarks.stand_in import FIXTURE, ShelfTemplate
+from goodreads_scraper.book import Book
+from goodreads_scraper.parse_pool import ParsePool
+from goodreads_scraper.utils import MAX_WORKERS, PER_PAGE, read_books_from_html
+
+
+def bench(parse: Callable[[str], List[Book]], pages: List[str], threads: int) -> float:
+    """Parses every page from `threads` threads and returns the pages parsed per second."""
+    with ThreadPoolExecutor(threads) as executor:
+        t0 = time.perf_counter()
+        for books in executor.map(parse, pages):
+            assert len(books) == PER_PAGE
+        return len(pages) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--pages", type=int, default=200)
+    arg_parser.add_argument("--threads", type=int, default=MAX_WORKERS)
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = arg_parser.parse_args()
+
+    template = ShelfTemplate(FIXTURE.read_text(encoding="utf-8"))
+    pages = [template.render(PER_PAGE * args.pages, page, PER_PAGE) for page in range(1, args.pages + 1)]
+    in_threads = bench(read_books_from_html, pages, args.threads)
+    with ParsePool(args.processes) as pool:
+        # Starts the workers before timing, a pool is meant to outlive many shelves.
+        pool.parse(pages[0])
+        in_pool = bench(pool.parse, pages, args.threads)
+    print(f"  fetch threads: {in_threads:7.1f} pages/s")
+    print(f"ParsePool({pool.processes:>2}): {in_pool:7.1f} pages/s ({in_pool / in_threads:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Throughput comparison of the shelf page parsers in goodreads_scraper.utils.HTML_PARSERS.
+
+Run with `python -m benchmarks.bench_parsers` from the repository root.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from goodreads_scraper.utils import HTML_PARSERS
+
+FIXTURE = Path(__file__).parent.parent.joinpath(
+    "tests", "test_assets", "example_goodreads.html"
+)
+
+
+def bench_parser(parser: str, html: str, repeat: int) -> float:
+    """Parses the same page repeat times and returns the pages parsed per second."""
+    read_books = HTML_PARSERS[parser]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        read_books(html)
+    return repeat / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    html = FIXTURE.read_text(encoding="utf-8")
+    results = {parser: bench_parser(parser, html, args.repeat) for parser in HTML_PARSERS}
+    baseline = results["html.parser"]
+    for parser, pages_per_sec in results.items():
+        print(f"{parser:>12}: {pages_per_sec:8.1f} pages/s ({pages_per_sec / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Size and decode time of the books read_books.js sends back, one object per book vs one array per field.
+
+Offline, it builds both payloads from the books of a large stand-in shelf page: the rows read_books.js used
+to return, with the cells as shown in the shelf, and the columns it returns now. It reports their JSON size,
+which is what WebDriver serializes, and the time to turn them into books on the Python side.
+With `--browser` it also opens the page in Chrome and times execute_script returning each payload.
+Run with `python -m benchmarks.bench_payload` from the repository root.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.stand_in import FIXTURE, ShelfTemplate
+from goodreads_scraper.book import STARS_ENUM, Book, books_from_columns, books_to_columns
+from goodreads_scraper.utils import load_js_file, read_books_from_lxml, setup_browser
+
+STAR_TEXTS = {stars: text for text, stars in STARS_ENUM.items()}
+
+# Turns the columns back into one object per book inside the page, to time the old shape of the payload.
+ROWS_SCRIPT = """
+var columns = extractBooks(document);
+var names = Object.keys(columns);
+return columns[names[0]].map(function(_, i) {
+    var row = {};
+    names.forEach(function(name) { row[name] = columns[name][i]; });
+    return row;
+});
+"""
+
+
+def shelf_rows(books: List[Book]) -> List[Dict[str, Any]]:
+    """The books as the old read_books.js sent them, star texts, page cells and dates as shown in the shelf."""
+    rows = []
+    for book in books:
+        row = book.to_dict()
+        row["user_rating"] = STAR_TEXTS.get(book.user_rating, "")
+        row["num_pages"] = f"{book.num_pages:,} pp" if book.num_pages is not None else ""
+        for name in ("publishing_date", "started_date", "finished_date", "added_date"):
+            value = getattr(book, name)
+            row[name] = f"{value:%b} {value.day}, {value.year}" if value else "not set"
+        del row["birthplace"], row["country"]
+        rows.append(row)
+    return rows
+
+
+def timed(decode: Callable[[], List[Book]], repeat: int) -> float:
+    """Milliseconds per call of decode."""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        decode()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def bench_offline(html: str, repeat: int) -> None:
+    books = read_books_from_lxml(html)
+    rows, columns = shelf_rows(books), books_to_columns(books)
+    # Both payloads go through JSON like they do over WebDriver.
+    row_json, column_json = json.dumps(rows), json.dumps(columns)
+    assert [Book.from_dict(row) for row in json.loads(row_json)] == books
+    assert books_from_columns(json.loads(column_json)) == books
+    print(f"{len(books)} books")
+    for label, payload, decode in (
+        ("rows", row_json, lambda: [Book.from_dict(row) for row in json.loads(row_json)]),
+        ("columns", column_json, lambda: books_from_columns(json.loads(column_json))),
+    ):
+        print(f"{label:>8}: {len(payload) / 1024:8.1f} KiB, {timed(decode, repeat):7.2f} ms to decode")
+
+
+def bench_browser(html: str, repeat: int) -> None:
+    js_code = load_js_file("read_books.js")
+    with tempfile.TemporaryDirectory() as tmp:
+        page = Path(tmp, "shelf.html")
+        page.write_text(html, encoding="utf-8")
+        browser = setup_browser()
+        try:
+            browser.get(page.as_uri())
+            for label, script in (
+                ("rows", js_code + ROWS_SCRIPT),
+                ("columns", js_code + "return extractBooks(document);"),
+            ):
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    browser.execute_script(script)
+                elapsed = (time.perf_counter() - t0) / repeat * 1000
+                print(f"{label:>8}: {elapsed:7.2f} ms per execute_script")
+        finally:
+            browser.quit()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--books", type=int, default=1000, help="Books on the page.")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    arg_parser.add_argument("--browser", action="store_true", help="Also time execute_script, needs Chrome.")
+    args = arg_parser.parse_args()
+
+    html = ShelfTemplate(FIXTURE.read_text(encoding="utf-8")).render(args.books, 1, args.books)
+    bench_offline(html, args.repeat)
+    if args.browser:
+        bench_browser(html, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Local stand-in for Goodreads, so benchmarks run offline and repeatably.
+
+Shelves are built from the rows of the saved test shelf, repeated with fresh review and author ids,
+and are paginated like the real ones: `page` and `per_page` are read from the query and per_page
+is capped at max_per_page. Author pages are served at /author/show/<id>, every other author with
+a birthplace. Responses can be delayed and a share of them answered with 503 instead.
+SignInServer also stands in for the sign-in flow, and only serves shelves to the sessions it signed in.
+"""
+import json
+import random
+import re
+import secrets
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from http.cookies import SimpleCookie
+from typing import Any, Dict, Iterator, Set
+from urllib.parse import parse_qs, urlparse
+
+from goodreads_scraper import auth
+
+FIXTURE = Path(__file__).parent.parent.joinpath(
+    "tests", "test_assets", "example_goodreads.html"
+)
+DEFAULT_PER_PAGE = 20  # What Goodreads serves when per_page is not given.
+MAX_PER_PAGE = 100
+FIRST_AUTHOR_ID = 5_000_000
+
+_ROW = re.compile(r'<tr id="review_(\d+)".*?/author/show/(\d+)\..*?</tr>', re.DOTALL)
+_BODY = re.compile(r'(<tbody id="booksBody">).*?(</tbody>)', re.DOTALL)
+_STATUS = re.compile(r'(<div id="infiniteStatus"[^>]*>)[^<]*(</div>)')
+_AUTHOR_PATH = re.compile(r"^/author/show/(\d+)")
+
+AUTHOR_PAGE = """<html><body><div class="rightContainer">
+<div class="dataTitle">Born</div>
+in City {author_id}, Country {country}
+<br/></div></body></html>"""
+NO_BIRTHPLACE_PAGE = "<html><body><div class='rightContainer'></div></body></html>"
+
+SIGN_IN_PAGE = """<html><body>
+<a href="/ap/signin?openid.return_to=%2F"><button class="gr-button">Sign in with email</button></a>
+<a href="/ap/signin?provider=apple"><button class="gr-button">Continue with Apple</button></a>
+</body></html>"""
+EMAIL_SIGN_IN_PAGE = """<html><body>{error}
+<form name="signIn" method="post" action="/ap/signin">
+<input type="hidden" name="appActionToken" value="{token}">
+<input type="hidden" name="openid.return_to" value="/">
+<input type="email" name="email">
+<input type="password" name="password">
+<input type="checkbox" name="rememberMe" value="true">
+<input type="submit" value="Sign in">
+</form></body></html>"""
+HOME_PAGE = """<html><body><header><ul>
+<li class="siteHeader__topLevelItem siteHeader__topLevelItem--signedIn">Home</li>
+</ul></header></body></html>"""
+
+
+class ShelfTemplate:
+    """Splits the saved shelf into the page around the books and one template per book row."""
+
+    def __init__(self, html: str) -> None:
+        html = html.replace(
+            "siteHeader__topLevelItem--signedOut", "siteHeader__topLevelItem--signedIn"
+        )
+        self.rows = [
+            (match.group(0), match.group(1), match.group(2)) for match in _ROW.finditer(html)
+        ]
+        self.page = _BODY.sub(r"\1{rows}\2", html.replace("{", "{{").replace("}", "}}"))
+
+    def render(self, books: int, page: int, per_page: int, authors: int | None = None) -> str:
+        """HTML of one page of a shelf.
+
+        Args:
+            books (int): Number of books in the shelf.
+            page (int): Page to render, starting at 1.
+            per_page (int): Books per page.
+            authors (int | None): Number of distinct authors to spread the books over, the saved ones if None.
+
+        Returns:
+            str: The page, signed in, with its pagination and "X of Y loaded" status.
+        """
+        max_page = max((books + per_page - 1) // per_page, 1)
+        first = (page - 1) * per_page
+        rows = []
+        for i in range(first, min(first + per_page, books)):
+            row, review_id, author_id = self.rows[i % len(self.rows)]
+            row = row.replace(review_id, str(10**9 + i))
+            if authors is not None:
+                row = row.replace(
+                    f"/author/show/{author_id}.", f"/author/show/{FIRST_AUTHOR_ID + i % authors}."
+                )
+            rows.append(row)
+        html = self.page.format(rows="\n".join(rows))
+        pagination = "".join(f"<a>{i}</a>" for i in range(1, max_page + 1))
+        status = f"{min(first + per_page, books)} of {books} loaded"
+        return _STATUS.sub(
+            lambda match: f'<div id="reviewPagination">{pagination}<a>next »</a></div>'
+            f"{match.group(1)}{status}{match.group(2)}",
+            html,
+        )
+
+
+class StandInServer:
+    """Serves a synthetic shelf and its authors on 127.0.0.1 from a background thread.
+
+    Use it as a context manager; `url` is the shelf URL to scrape, `author_url` gives the page
+    of an author, and `requests` and `errors` count the responses served so far.
+    """
+
+    def __init__(
+        self,
+        books: int = 300,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        max_per_page: int = MAX_PER_PAGE,
+        authors: int | None = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Args:
+            books (int): Number of books in the shelf.
+            latency (float): Seconds every response is delayed by, to stand in for the network.
+            error_rate (float): Share of responses answered with 503 and a Retry-After of 0.
+            max_per_page (int): Largest page size the server accepts.
+            authors (int | None): Number of distinct authors in the shelf, the saved ones if None.
+            seed (int): Seed of the injected errors, so runs are repeatable.
+        """
+        self.books = books
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_per_page = max_per_page
+        self.authors = authors
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._template = ShelfTemplate(FIXTURE.read_text(encoding="utf-8"))
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/review/list/1?shelf=read"
+
+    def author_url(self, author_id: int) -> str:
+        return f"{self.base_url}/author/show/{author_id}.Author"
+
+    def author_ids(self) -> range:
+        """Ids of the authors in the shelf, when it was built with a number of authors."""
+        return range(FIRST_AUTHOR_ID, FIRST_AUTHOR_ID + min(self.authors or 0, self.books))
+
+    def render(self, path: str) -> str:
+        """HTML served for a path, a shelf page or an author page."""
+        author = _AUTHOR_PATH.match(path)
+        if author is not None:
+            author_id = int(author.group(1))
+            if author_id % 2:
+                return NO_BIRTHPLACE_PAGE
+            return AUTHOR_PAGE.format(author_id=author_id, country=author_id % 7)
+        query = parse_qs(urlparse(path).query)
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", [DEFAULT_PER_PAGE])[0])
+        return self._template.render(
+            self.books, page, min(per_page, self.max_per_page), self.authors
+        )
+
+    def _handler(self) -> Any:
+        stand_in = self
+
+        class StandInHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    failed = stand_in._random.random() < stand_in.error_rate
+                    stand_in.errors += failed
+                time.sleep(stand_in.latency)
+                if failed:
+                    body = b"Service Unavailable"
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                else:
+                    body = stand_in.render(self.path).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return StandInHandler
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SignInServer(StandInServer):
+    """Stand-in that also serves the email sign-in flow, for one account.
+
+    /user/sign_in links to the email form at /ap/signin, which carries a CSRF token bound to the
+    browser session cookie. Posting it back with the right credentials redirects home and sets the
+    session cookie, shelves redirect to /user/sign_in for any other session.
+    """
+
+    def __init__(self, email: str, password: str, **kwargs: Any) -> None:
+        """
+        Args:
+            email (str): Email of the account.
+            password (str): Its password.
+            kwargs: Passed on to StandInServer.
+        """
+        super().__init__(**kwargs)
+        self.email = email
+        self.password = password
+        self.logins = 0
+        self._tokens: Dict[str, str] = {}  # CSRF token handed to each browser session.
+        self._signed_in: Set[str] = set()
+
+    @property
+    def sign_in_url(self) -> str:
+        return f"{self.base_url}/user/sign_in"
+
+    def _handler(self) -> Any:
+        stand_in = self
+        base = super()._handler()
+
+        class SignInHandler(base):  # type: ignore[misc, valid-type]
+            def _cookie(self, name: str) -> str | None:
+                morsel = SimpleCookie(self.headers.get("Cookie", "")).get(name)
+                return morsel.value if morsel is not None else None
+
+            def _respond(self, status: int, body: str = "", headers: Dict[str, str] | None = None) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _sign_in_form(self, error: str = "") -> None:
+                browser_session = self._cookie("session-id") or secrets.token_hex(8)
+                token = secrets.token_hex(8)
+                with stand_in._lock:
+                    stand_in._tokens[browser_session] = token
+                self._respond(
+                    200,
+                    EMAIL_SIGN_IN_PAGE.format(error=error, token=token),
+                    {"Set-Cookie": f"session-id={browser_session}; Path=/"},
+                )
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/user/sign_in":
+                    self._respond(200, SIGN_IN_PAGE)
+                elif path == "/ap/signin":
+                    self._sign_in_form()
+                elif path == "/":
+                    self._respond(200, HOME_PAGE)
+                elif self._cookie("_session_id2") in stand_in._signed_in:
+                    super().do_GET()
+                else:
+                    self._respond(302, headers={"Location": "/user/sign_in"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {name: values[0] for name, values in parse_qs(self.rfile.read(length).decode()).items()}
+                browser_session = self._cookie("session-id")
+                with stand_in._lock:
+                    token = stand_in._tokens.pop(browser_session, None) if browser_session else None
+                if token is None or form.get("appActionToken") != token:
+                    self._respond(403, "Invalid CSRF token")
+                elif form.get("email") != stand_in.email or form.get("password") != stand_in.password:
+                    self._sign_in_form("<div class='a-alert-content'>Your password is incorrect</div>")
+                else:
+                    session_id = secrets.token_hex(16)
+                    with stand_in._lock:
+                        stand_in._signed_in.add(session_id)
+                        stand_in.logins += 1
+                    expires = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30 * 86400))
+                    self._respond(
+                        302,
+                        headers={
+                            "Location": form.get("openid.return_to", "/"),
+                            "Set-Cookie": f"_session_id2={session_id}; Path=/; Expires={expires}; HttpOnly",
+                        },
+                    )
+
+        return SignInHandler
+
+
+@contextmanager
+def stand_in_cookies() -> Iterator[Path]:
+    """Points auth.COOKIE_FILE to a throwaway cookie file for the stand-in server."""
+    saved = auth.COOKIE_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        cookie_file = Path(tmp, "login.json")
+        cookie_file.write_text(
+            json.dumps([{"name": "session_id", "value": "stand-in", "domain": "127.0.0.1", "path": "/"}])
+        )
+        auth.COOKIE_FILE = cookie_file
+        try:
+            yield cookie_file
+        finally:
+            auth.COOKIE_FILE = saved
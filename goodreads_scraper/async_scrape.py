@@ -0,0 +1,188 @@
+import asyncio
+import time
+from typing import Any, Iterable, List, Tuple
+
+import aiohttp
+
+from goodreads_scraper import auth
+from goodreads_scraper.book import Book
+from goodreads_scraper.metrics import get_metrics, record_shelf_page
+from goodreads_scraper.scrape import to_shelf_url
+from goodreads_scraper.throttle import (
+    RETRY_STATUSES,
+    THROTTLED_STATUSES,
+    FetchController,
+    default_controller,
+)
+from goodreads_scraper.utils import (
+    DEFAULT_HEADERS,
+    PER_PAGE,
+    count_shelf_pages,
+    create_read_page,
+    read_books_from_html,
+    set_query_params,
+)
+from logger import logger
+
+MAX_CONCURRENCY = 64
+
+
+def setup_async_session(concurrency: int = MAX_CONCURRENCY) -> aiohttp.ClientSession:
+    """Handles setup of the aiohttp session shared by every shelf scraped in the event loop.
+    Loads the cookies saved by a previous browser login, so it only works while they are valid.
+    Must be called from inside a running event loop.
+
+    Args:
+        concurrency (int): Maximum number of open connections in the shared pool.
+
+    Returns:
+        aiohttp.ClientSession: Session with browser-like headers and the saved cookies.
+    """
+    cookies = {cookie["name"]: cookie["value"] for cookie in auth.read_cookie_file()}
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+    return aiohttp.ClientSession(
+        connector=connector, headers=DEFAULT_HEADERS, cookies=cookies
+    )
+
+
+async def fetch_page_async(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    controller: FetchController | None = None,
+) -> Tuple[str, str]:
+    """Fetches a page once a slot of the global concurrency limit is free.
+    The request also goes through the FetchController, the same way requests made with setup_session do.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session.
+        semaphore (asyncio.Semaphore): Global limit of page fetches in flight.
+        url (str): URL to fetch.
+        controller (FetchController | None): Controller to send the request through, the one shared by the process if None.
+
+    Returns:
+        Tuple[str, str]: Final URL after redirects and the HTML of the page.
+    """
+    if controller is None:
+        controller = default_controller()
+    limiter = controller.host(url)
+    attempt = 0
+    async with semaphore:
+        while True:
+            await limiter.acquire_async()
+            t0 = time.monotonic()
+            try:
+                response = await session.get(url)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                limiter.release(time.monotonic() - t0, failed=True)
+                get_metrics().count("fetch_errors")
+                if attempt >= controller.max_retries:
+                    raise
+                delay = controller.retry_delay(attempt)
+            except BaseException:
+                # Cancelled, or failed in a way retrying won't fix, the slot is freed either way.
+                limiter.cancel()
+                raise
+            else:
+                async with response:
+                    status = response.status
+                    get_metrics().observe("request_seconds", time.monotonic() - t0)
+                    limiter.release(
+                        time.monotonic() - t0,
+                        throttled=status in THROTTLED_STATUSES,
+                        failed=status >= 500,
+                    )
+                    if status not in RETRY_STATUSES or attempt >= controller.max_retries:
+                        response.raise_for_status()
+                        return str(response.url), await response.text()
+                    delay = controller.retry_delay(attempt, response.headers.get("Retry-After"))
+                    if status in THROTTLED_STATUSES:
+                        limiter.bucket.pause(delay)
+            get_metrics().count("retries")
+            logger.debug(f"Fetching {url} failed, retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def gather_or_cancel(*aws: Any) -> List[Any]:
+    """Like asyncio.gather, but cancels the remaining tasks as soon as one of them fails."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def scrape_shelf_async(
+    url: str, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore
+) -> List[Book]:
+    """Performs the extraction of all the books from a valid shelf URL inside an event loop.
+    Page 1 gives the number of pages, then every other page is fetched concurrently.
+    Pages are asked for with the largest size Goodreads accepts, to make as few requests as possible.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf.
+        session (aiohttp.ClientSession): Authenticated session, see setup_async_session.
+        semaphore (asyncio.Semaphore): Global limit of page fetches in flight.
+
+    Raises:
+        RuntimeError: If the saved cookies are not authenticated.
+
+    Returns:
+        List[Book]: Books in the shelf.
+    """
+    first_url, first_html = await fetch_page_async(
+        session, semaphore, set_query_params(url, per_page=PER_PAGE)
+    )
+    if auth.is_signed_out(first_url, first_html):
+        raise RuntimeError("Saved cookies are not authenticated, log in with the browser first.")
+    book_list = read_books_from_html(first_html)
+    record_shelf_page(book_list, len(first_html))
+    max_page = count_shelf_pages(first_html, len(book_list))
+
+    async def fetch_and_parse(page_url: str) -> List[Book]:
+        _, html = await fetch_page_async(session, semaphore, page_url)
+        parsed = read_books_from_html(html)
+        record_shelf_page(parsed, len(html))
+        return parsed
+
+    pages = await gather_or_cancel(
+        *(fetch_and_parse(create_read_page(url, i, PER_PAGE)) for i in range(2, max_page + 1))
+    )
+    for parsed in pages:
+        book_list += parsed
+    return book_list
+
+
+async def process_goodreads_urls_async(
+    urls: Iterable[str], concurrency: int = MAX_CONCURRENCY
+) -> List[List[Book] | BaseException]:
+    """Scrapes many GR profiles or shelves in a single event loop.
+    All of them share one connection pool and one limit of page fetches in flight,
+    so the number of open connections does not grow with the number of shelves.
+
+    Args:
+        urls (Iterable[str]): URLs to be scraped, each expected to be a valid GR profile or shelf.
+        concurrency (int): Maximum number of page fetches in flight across all shelves.
+
+    Returns:
+        List[List[Book] | BaseException]: Books of each URL, in the same order as the URLs.
+            A URL that failed, including a ValueError for an invalid one, gets its exception instead
+            so one bad user does not stop the others.
+    """
+    urls = list(urls)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape_one(url: str) -> List[Book]:
+        return await scrape_shelf_async(to_shelf_url(url), session, semaphore)
+
+    async with setup_async_session(concurrency) as session:
+        results = await asyncio.gather(
+            *(scrape_one(url) for url in urls), return_exceptions=True
+        )
+    for url, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            logger.debug(f"Failed to scrape {url}: {result!r}")
+    return results
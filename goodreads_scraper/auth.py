@@ -1,11 +1,98 @@
-from selenium.webdriver.chrome.webdriver import WebDriver
+# Selenium is imported where it is used, so the HTTP path can load the saved cookies without it.
+from __future__ import annotations
+
 import json
-from selenium.webdriver.common.by import By
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List
+import lxml.html  # type: ignore
+import requests
+
+from goodreads_scraper.utils import setup_session
+from logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows, cookie files are only locked between the threads of a process.
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
 
 
 COOKIE_FILE = Path("login.json")
+GOODREADS_URL = "https://www.goodreads.com/"
+SIGN_IN_URL = "https://www.goodreads.com/user/sign_in"
+
+_thread_locks: Dict[Path, threading.Lock] = {}
+_thread_locks_lock = threading.Lock()
+
+
+def read_cookie_file(path: Path | None = None) -> List[Dict[str, Any]]:
+    """
+    Reads the cookies saved by save_cookies, in the format the browser returns them.
+    Returns an empty list if there are no saved cookies.
+    Files are only ever replaced whole, see write_cookie_file, so no lock is needed to read them.
+    """
+    cookie_file = path or COOKIE_FILE
+    if not cookie_file.exists():
+        return []
+
+    with cookie_file.open("r") as f:
+        return json.load(f)
+
+
+def write_cookie_file(cookies: List[Dict[str, Any]], path: Path | None = None) -> None:
+    """
+    Saves cookies in the format the browser returns them.
+    They are written to a temporary file that then replaces the cookie file in one step,
+    so a scraper reading it at the same time sees either the old cookies or the new ones.
+    """
+    cookie_file = path or COOKIE_FILE
+    cookie_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=cookie_file.parent, prefix=f".{cookie_file.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(cookies, f)
+        os.replace(tmp_name, cookie_file)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+@contextmanager
+def cookie_file_lock(path: Path | None = None) -> Iterator[None]:
+    """
+    Holds an exclusive lock on a cookie file across the threads and processes of the machine,
+    for check-then-login sequences that must not log in twice. Reads and writes don't need it.
+    """
+    cookie_file = (path or COOKIE_FILE).absolute()
+    with _thread_locks_lock:
+        thread_lock = _thread_locks.setdefault(cookie_file, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        cookie_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cookie_file.with_name(cookie_file.name + ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def cookies_expire_at(cookies: List[Dict[str, Any]]) -> float | None:
+    """
+    When the first of the saved cookies expires, as a timestamp.
+    None if none of them has an expiry, browser session cookies only last until the browser is closed.
+    """
+    expiries = [float(cookie["expiry"]) for cookie in cookies if cookie.get("expiry") is not None]
+    return min(expiries, default=None)
+
 
 def read_cookies(browser: WebDriver) -> bool:
     """
@@ -15,40 +102,223 @@ def read_cookies(browser: WebDriver) -> bool:
     if not COOKIE_FILE.exists():
         return False
 
-    with COOKIE_FILE.open("r") as f:
-        cookies = json.load(f)
-
+    cookies = read_cookie_file()
     for cookie in cookies:
         browser.add_cookie(cookie)
 
     return True
 
-def login(browser: WebDriver) -> None:
-    browser.get('https://www.goodreads.com/user/sign_in')
-    login_modal = browser.find_element(By.XPATH, "//button[contains(text(), 'Sign in with email')]")
+def set_session_cookies(session: requests.Session, cookies: List[Dict[str, Any]]) -> None:
+    """
+    Puts cookies in the format the browser returns them into a requests session.
+    """
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+
+def load_session_cookies(session: requests.Session, path: Path | None = None) -> bool:
+    """
+    Tries to load the saved browser cookies into a requests session.
+    Returns True if cookies were loaded, False otherwise.
+    """
+    cookies = read_cookie_file(path)
+    set_session_cookies(session, cookies)
+    return bool(cookies)
+
+
+def is_signed_out(url: str, html: str) -> bool:
+    """
+    Checks if a page fetched over HTTP was served to a signed out user,
+    either because we got redirected to sign in or because the header is the signed out one.
+    """
+    if "sign_in" in url:
+        return True
+    return "siteHeader__topLevelItem--signedOut" in html
+
+
+class LoginRejected(RuntimeError):
+    """Raised when Goodreads doesn't sign in over HTTP, the browser login may still work."""
+
+
+def has_credentials() -> bool:
+    """Whether GR_LOGIN and GR_PASSWORD are set, so the scraper can log in by itself."""
+    return "GR_LOGIN" in os.environ and "GR_PASSWORD" in os.environ
+
+
+def _password_form(html: str, url: str) -> Any:
+    """The form of a page with a password field, None if there is none."""
+    document = lxml.html.fromstring(html, base_url=url)
+    for form in document.forms:
+        if form.xpath(".//input[@type='password']"):
+            return form
+    return None
+
+
+def _email_sign_in_link(html: str, url: str) -> str | None:
+    """Where the "Sign in with email" button of the sign-in page leads."""
+    document = lxml.html.fromstring(html, base_url=url)
+    document.make_links_absolute()
+    links = document.xpath("//a[contains(normalize-space(.), 'Sign in with email')]/@href")
+    return links[0] if links else None
+
+
+def session_cookies(session: requests.Session) -> List[Dict[str, Any]]:
+    """
+    Cookies of a requests session in the format the browser returns them, the one save_cookies writes.
+    """
+    cookies = []
+    for cookie in session.cookies:
+        browser_cookie: Dict[str, Any] = {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+        }
+        if cookie.expires is not None:
+            browser_cookie["expiry"] = int(cookie.expires)
+        cookies.append(browser_cookie)
+    return cookies
+
+
+def http_login(
+    email: str | None = None, password: str | None = None, sign_in_url: str | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Signs in with plain HTTP requests, without starting a browser.
+    Follows "Sign in with email" from the sign-in page to the email form, posts it back with its hidden
+    fields (the CSRF token and the state of the sign-in flow) and the credentials, and checks the answer is signed in.
+    Signs in as the account given or the one in GR_LOGIN and GR_PASSWORD.
+    Returns the cookies of the signed in session, in the format save_cookies writes.
+    Raises LoginRejected if the credentials are refused, or the sign-in pages are not what this expects,
+    for example when Goodreads asks for a captcha.
+    """
+    email = email or os.environ['GR_LOGIN']
+    password = password or os.environ['GR_PASSWORD']
+    with setup_session(pool_size=1) as session:
+        response = session.get(sign_in_url or SIGN_IN_URL)
+        response.raise_for_status()
+        form = _password_form(response.text, response.url)
+        if form is None:
+            email_sign_in = _email_sign_in_link(response.text, response.url)
+            if email_sign_in is None:
+                raise LoginRejected("The sign-in page has no email sign-in.")
+            response = session.get(email_sign_in)
+            response.raise_for_status()
+            form = _password_form(response.text, response.url)
+            if form is None:
+                raise LoginRejected("The email sign-in page has no password form.")
+
+        fields = dict(form.form_values())
+        email_inputs = form.xpath(".//input[@type='email' or @name='email']/@name")
+        if not email_inputs:
+            raise LoginRejected("The sign-in form has no email field.")
+        fields[email_inputs[0]] = email
+        fields[form.xpath(".//input[@type='password']/@name")[0]] = password
+        response = session.post(form.action or response.url, data=fields)
+        response.raise_for_status()
+        if _password_form(response.text, response.url) is not None or is_signed_out(response.url, response.text):
+            raise LoginRejected(f"Goodreads didn't sign {email} in.")
+        logger.debug(f"Signed {email} in over HTTP.")
+        return session_cookies(session)
+
+
+def refresh_cookie_file(
+    saved: List[Dict[str, Any]], log_in: Callable[[], List[Dict[str, Any]]] | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Replaces the saved cookies that stopped working with new ones, logging in at most once across scrapers.
+    Under cookie_file_lock, if the file doesn't hold the saved cookies anymore, another scraper logged in
+    while this one waited and its cookies are returned. Otherwise logs in with log_in, http_login if None,
+    and saves the cookies it returns. Errors of log_in are raised and the file is left as it was.
+    """
+    with cookie_file_lock():
+        cookies = read_cookie_file()
+        if cookies and cookies != saved:
+            logger.debug("Another scraper already logged in, using its cookies.")
+            return cookies
+        cookies = (log_in or http_login)()
+        write_cookie_file(cookies)
+        return cookies
+
+
+def fresh_cookies(email: str | None = None, password: str | None = None) -> List[Dict[str, Any]]:
+    """
+    Logs in and returns the new cookies, over HTTP or, only if Goodreads rejects that, with a headless browser.
+    """
+    try:
+        return http_login(email, password)
+    except (LoginRejected, requests.RequestException) as e:
+        logger.debug(f"HTTP login failed, logging in with the browser: {e!r}")
+    from goodreads_scraper.utils import setup_browser
+
+    browser = setup_browser()
+    try:
+        login(browser, email, password)
+        browser.get(GOODREADS_URL)
+        if 'sign_in' in browser.current_url:
+            raise RuntimeError('Login failed.')
+        return browser.get_cookies()
+    finally:
+        browser.quit()
+
+
+def login(browser: WebDriver, email: str | None = None, password: str | None = None) -> None:
+    """
+    Signs in through the sign-in modal, as the account given or the one in GR_LOGIN and GR_PASSWORD.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    browser.get(SIGN_IN_URL)
+    # Lean browsers return from get before the page finished loading, wait for what is clicked.
+    login_modal = WebDriverWait(browser, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Sign in with email')]"))
+    )
     login_modal.click()
-    email_field = browser.find_element(By.XPATH,"//input[@type='email']")
-    email = os.environ['GR_LOGIN']
+    email_field = WebDriverWait(browser, 10).until(
+        EC.presence_of_element_located((By.XPATH, "//input[@type='email']"))
+    )
+    email = email or os.environ['GR_LOGIN']
     email_field.send_keys(email)
     password_field = browser.find_element(By.XPATH,"//input[@type='password']")
-    password = os.environ['GR_PASSWORD']
+    password = password or os.environ['GR_PASSWORD']
     password_field.send_keys(password)
     submit_field = browser.find_element(By.XPATH,"//input[@type='submit']")
     submit_field.click()
 
 
 def save_cookies(browser: WebDriver) -> None:
-    COOKIE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with COOKIE_FILE.open("w") as f:
-        json.dump(browser.get_cookies(), f)
+    write_cookie_file(browser.get_cookies())
 
 
 def authenticate(browser: WebDriver, url: str) -> None:
-    cookies_loaded = read_cookies(browser)
+    saved = read_cookie_file()
+    for cookie in saved:
+        browser.add_cookie(cookie)
     browser.get(url)
-    if 'sign_in' in browser.current_url or not cookies_loaded:
+    if 'sign_in' in browser.current_url or not saved:
         # If you get redirected to sign in, you need to actually login and then save the cookies, as they have most likely expired.
-        login(browser)
+        # Logging in over HTTP is much faster, the sign-in modal is only used if Goodreads rejects it.
+        def log_in() -> List[Dict[str, Any]]:
+            try:
+                return http_login()
+            except (LoginRejected, requests.RequestException) as e:
+                logger.debug(f"HTTP login failed, logging in with the browser: {e!r}")
+            login(browser)
+            browser.get(url)
+            if 'sign_in' in browser.current_url:
+                raise RuntimeError('Login failed.')
+            return browser.get_cookies()
+
+        for cookie in refresh_cookie_file(saved, log_in):
+            browser.add_cookie(cookie)
         browser.get(url)
     if 'sign_in' in browser.current_url:
         raise RuntimeError('Login failed.')
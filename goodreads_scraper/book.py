@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from itertools import repeat
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+STARS_ENUM = {
+    "did not like it": 1,
+    "it was ok": 2,
+    "liked it": 3,
+    "really liked it": 4,
+    "it was amazing": 5,
+}
+GOODREADS_DATE_FORMATS = ("%b %d, %Y", "%b %Y", "%Y")
+DATE_FIELDS = ("publishing_date", "started_date", "finished_date", "added_date")
+
+_NUM_PAGES = re.compile(r"\d[\d,]*")
+
+
+def parse_goodreads_date(date_string: str) -> date | None:
+    """Parses a date as shown in the shelf, like "Sep 20, 2021", "Sep 2021" or "1605".
+
+    Args:
+        date_string (str): Date text extracted from the shelf.
+
+    Returns:
+        date | None: The date, missing day or month default to 1. None if it's empty or "not set".
+    """
+    for date_format in GOODREADS_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_string.strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_num_pages(pages: Any) -> int | None:
+    """Reads the number of pages of a book from its cell, like "1,328 pp", or passes an int through."""
+    if pages is None or isinstance(pages, int):
+        return pages
+    match = _NUM_PAGES.search(str(pages))
+    return int(match.group(0).replace(",", "")) if match else None
+
+
+def parse_user_rating(rating: Any) -> int | None:
+    """Maps the star text of a rating, like "really liked it", to 1-5, or passes an int through."""
+    if rating is None or isinstance(rating, int):
+        return rating
+    return STARS_ENUM.get(rating.strip())
+
+
+def _to_date(value: Any) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return parse_goodreads_date(value)
+
+
+@dataclass(slots=True)
+class Book:
+    """A book of a user's shelf.
+    Slotted, so a shelf of hundreds of thousands of books doesn't pay for a dict per book,
+    and typed: ratings are 1-5, pages are ints and dates are dates, None when the shelf doesn't say.
+    Use to_dict for a plain dict, with the same keys the scraper used to return.
+    """
+
+    title: str = ""
+    book_id: int | None = None
+    isbn: str = ""
+    isbn13: str = ""
+    author_name: str = ""
+    author_id: int | None = None
+    author_link: str = ""
+    avg_rating: float | None = None
+    user_rating: int | None = None
+    num_pages: int | None = None
+    publishing_date: date | None = None
+    started_date: date | None = None
+    finished_date: date | None = None
+    added_date: date | None = None
+    review_id: int | None = None
+    birthplace: str | None = None
+    country: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Book":
+        """Builds a Book from the fields scraped from a shelf row, or from the output of to_dict.
+        Star texts, page cells and date strings (as shown in the shelf or ISO) are parsed, unknown keys are ignored.
+
+        Args:
+            data (Mapping[str, Any]): Fields of the book.
+
+        Returns:
+            Book: The typed book.
+        """
+        avg_rating = data.get("avg_rating")
+        book_id = data.get("book_id")
+        author_id = data.get("author_id")
+        review_id = data.get("review_id")
+        return cls(
+            title=data.get("title") or "",
+            book_id=int(book_id) if book_id is not None else None,
+            isbn=data.get("isbn") or "",
+            isbn13=data.get("isbn13") or "",
+            author_name=data.get("author_name") or "",
+            author_id=int(author_id) if author_id is not None else None,
+            author_link=data.get("author_link") or "",
+            avg_rating=float(avg_rating) if avg_rating not in (None, "") else None,
+            user_rating=parse_user_rating(data.get("user_rating")),
+            num_pages=parse_num_pages(data.get("num_pages")),
+            publishing_date=_to_date(data.get("publishing_date")),
+            started_date=_to_date(data.get("started_date")),
+            finished_date=_to_date(data.get("finished_date")),
+            added_date=_to_date(data.get("added_date")),
+            review_id=int(review_id) if review_id is not None else None,
+            birthplace=data.get("birthplace"),
+            country=data.get("country"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict view of the book, for code that expects the dicts the scraper used to return."""
+        return {name: getattr(self, name) for name in BOOK_FIELDS}
+
+
+BOOK_FIELDS: Tuple[str, ...] = tuple(field.name for field in fields(Book))
+
+
+def iter_books_from_columns(columns: Mapping[str, Sequence[Any]]) -> Iterator[Book]:
+    """Builds books from a columnar payload, one array per field as read_books.js returns them, one at a time.
+    Numbers come already parsed, so only the dates are converted, from ISO dates or the text shown in the shelf.
+    Fields without a column get their default.
+
+    Args:
+        columns (Mapping[str, Sequence[Any]]): Values of each field, by field name, all of the same length.
+
+    Raises:
+        ValueError: If the columns don't all have the same length.
+
+    Yields:
+        Book: The books, in the order of the columns.
+    """
+    present = [name for name in BOOK_FIELDS if name in columns]
+    if not present:
+        return
+    lengths = {len(columns[name]) for name in present}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns of different lengths: {sorted(lengths)}.")
+    values: List[Iterable[Any]] = []
+    for field in fields(Book):
+        if field.name not in columns:
+            values.append(repeat(field.default))
+        elif field.name in DATE_FIELDS:
+            values.append(map(_to_date, columns[field.name]))
+        else:
+            values.append(columns[field.name])
+    for row in zip(*values):
+        yield Book(*row)
+
+
+def books_from_columns(columns: Mapping[str, Sequence[Any]]) -> List[Book]:
+    """Same as iter_books_from_columns, all at once."""
+    return list(iter_books_from_columns(columns))
+
+
+def books_to_columns(books: Iterable[Book]) -> Dict[str, List[Any]]:
+    """Columnar payload of books, the inverse of books_from_columns, with dates as ISO dates like read_books.js."""
+    columns: Dict[str, List[Any]] = {name: [] for name in BOOK_FIELDS}
+    for book in books:
+        for name in BOOK_FIELDS:
+            value = getattr(book, name)
+            columns[name].append(value.isoformat() if isinstance(value, date) else value)
+    return columns
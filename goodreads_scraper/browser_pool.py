@@ -0,0 +1,214 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from goodreads_scraper import auth
+from goodreads_scraper.book import Book
+from goodreads_scraper.metrics import record_shelf_page
+from goodreads_scraper.utils import (
+    PER_PAGE,
+    count_shelf_pages,
+    create_read_page,
+    page_wait,
+    read_books_fast,
+    set_query_params,
+    setup_browser,
+)
+from logger import logger
+
+GOODREADS_URL = "https://www.goodreads.com/"
+
+
+class BrowserPool:
+    """Keeps up to size headless browsers warm, so a scrape does not pay for starting Chrome and logging in.
+    Browsers are started on demand, or all at once with warm, and go back to the pool after each job.
+    A browser that fails with a WebDriverException is quit and replaced by a new one on the next checkout.
+    """
+
+    def __init__(self, size: int = 2, debug: bool = False) -> None:
+        """
+        Args:
+            size (int): Maximum number of browsers alive at the same time.
+            debug (bool): Shows the browsers.
+        """
+        self.size = size
+        self.debug = debug
+        self._idle: "queue.LifoQueue[WebDriver]" = queue.LifoQueue()
+        self._all: List[WebDriver] = []
+        self._started = 0  # Browsers alive or starting, never more than size.
+        self._lock = threading.Lock()
+
+    def _new_browser(self) -> WebDriver:
+        """Starts a browser on Goodreads with the saved cookies, so authenticate only logs in if they expired."""
+        browser = setup_browser(debug=self.debug)
+        browser.get(GOODREADS_URL)
+        auth.read_cookies(browser)
+        return browser
+
+    def _reserve(self) -> bool:
+        """Reserves a slot for a new browser before the slow start, so concurrent checkouts don't exceed size."""
+        with self._lock:
+            if self._started >= self.size:
+                return False
+            self._started += 1
+            return True
+
+    def _start(self) -> WebDriver:
+        """Starts a browser in an already reserved slot."""
+        try:
+            browser = self._new_browser()
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+            raise
+        with self._lock:
+            self._all.append(browser)
+        return browser
+
+    def warm(self) -> None:
+        """Starts all the browsers of the pool in parallel."""
+        reserved = 0
+        while self._reserve():
+            reserved += 1
+        if not reserved:
+            return
+        with ThreadPoolExecutor(reserved) as executor:
+            for browser in executor.map(lambda _: self._start(), range(reserved)):
+                self._idle.put(browser)
+
+    def _checkout(self, timeout: float | None) -> WebDriver:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        if self._reserve():
+            return self._start()
+        return self._idle.get(timeout=timeout)
+
+    def _discard(self, browser: WebDriver) -> None:
+        with self._lock:
+            self._all.remove(browser)
+            self._started -= 1
+        try:
+            browser.quit()
+        except WebDriverException:
+            logger.debug("Browser was already dead.")
+
+    @contextmanager
+    def browser(self, timeout: float | None = None) -> Iterator[WebDriver]:
+        """Checks a browser out of the pool for a job, starting one if none is idle and the pool is not full.
+
+        Args:
+            timeout (float | None): Seconds to wait for a browser when all of them are busy, forever if None.
+
+        Raises:
+            queue.Empty: If no browser was free before the timeout.
+
+        Yields:
+            WebDriver: Browser for the exclusive use of the job.
+        """
+        browser = self._checkout(timeout)
+        try:
+            yield browser
+        except WebDriverException:
+            self._discard(browser)
+            raise
+        except BaseException:
+            self._idle.put(browser)
+            raise
+        else:
+            self._idle.put(browser)
+
+    def close(self) -> None:
+        """Quits every browser of the pool. Browsers still checked out are quit too."""
+        with self._lock:
+            browsers = list(self._all)
+            self._all.clear()
+            self._started = 0
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for browser in browsers:
+            try:
+                browser.quit()
+            except WebDriverException:
+                logger.debug("Browser was already dead.")
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def scrape_pages_sharded(
+    url: str, pages: Sequence[int], browser_pool: BrowserPool
+) -> List[Book]:
+    """Scrapes pages of a shelf with the browser, splitting them across the browsers of a pool.
+    Each browser gets every size-th page, so the shards are balanced.
+    Pooled browsers keep the cookies they were started with, so each shard authenticates on its
+    first page, which picks up cookies another browser refreshed instead of logging in again.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf.
+        pages (Sequence[int]): Page numbers to scrape.
+        browser_pool (BrowserPool): Pool of warm browsers.
+
+    Raises:
+        RuntimeError: If a page was served signed out, rather than returning a shelf missing its books.
+
+    Returns:
+        List[Book]: Books in those pages, grouped by shard.
+    """
+    shards = [list(pages[i :: browser_pool.size]) for i in range(browser_pool.size)]
+
+    def scrape_shard(shard: List[int]) -> List[Book]:
+        book_list: List[Book] = []
+        if not shard:
+            return book_list
+        with browser_pool.browser() as browser:
+            for i, page in enumerate(shard):
+                page_url = create_read_page(url, page, PER_PAGE)
+                if i == 0:
+                    auth.authenticate(browser, page_url)
+                else:
+                    browser.get(page_url)
+                page_wait(browser)
+                if auth.is_signed_out(browser.current_url, browser.page_source):
+                    raise RuntimeError(f"Page {page} of {url} was served signed out.")
+                page_books = read_books_fast(browser)
+                record_shelf_page(page_books)
+                book_list += page_books
+        return book_list
+
+    book_list: List[Book] = []
+    with ThreadPoolExecutor(browser_pool.size) as executor:
+        for shard_books in executor.map(scrape_shard, shards):
+            book_list += shard_books
+    return book_list
+
+
+def scrape_shelf_sharded(url: str, browser_pool: BrowserPool) -> List[Book]:
+    """Performs the extraction of all the books from a valid shelf URL only through the browser,
+    for when the pages can't be fetched over HTTP. The first page gives the number of pages,
+    and the rest are split across the browsers of the pool.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf.
+        browser_pool (BrowserPool): Pool of warm browsers.
+
+    Returns:
+        List[Book]: Books in the shelf.
+    """
+    with browser_pool.browser() as browser:
+        auth.authenticate(browser, set_query_params(url, per_page=PER_PAGE))
+        page_wait(browser)
+        book_list = read_books_fast(browser)
+        record_shelf_page(book_list)
+        max_page = count_shelf_pages(browser.page_source, len(book_list))
+    book_list += scrape_pages_sharded(url, range(2, max_page + 1), browser_pool)
+    return book_list
@@ -0,0 +1,282 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from goodreads_scraper.book import Book
+from goodreads_scraper.throttle import ThrottledAdapter
+
+AUTHOR_CACHE_FILE = Path("authors.sqlite3")
+AUTHOR_CACHE_TTL = 30 * 24 * 60 * 60  # Author pages barely change, a month is fine.
+HTTP_CACHE_FILE = Path("http_cache.sqlite3")
+SQLITE_MAX_VARIABLES = 500  # Stays well under the default limit of bound parameters per query.
+
+Birthplace = Tuple[str | None, str | None]
+
+
+class SQLiteCache:
+    """Base for the on-disk caches, a single SQLite file with the tables and indexes in SCHEMA.
+    The file is in WAL mode, so several worker processes can share it:
+    each one opens its own connection and writes are serialized by SQLite itself.
+    Inside a process the connection is shared by all threads behind a lock.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: Path | str) -> None:
+        """
+        Args:
+            path (Path | str): SQLite file to use, created if it doesn't exist.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> Any:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class AuthorCache(SQLiteCache):
+    """On-disk cache of author birthplaces, keyed by the GR author id.
+    Stores (birthplace, country) as returned by scrape_gr_author, including (None, None) for
+    authors without a "Born" field, so they are not fetched again until the entry expires.
+    """
+
+    SCHEMA = """CREATE TABLE IF NOT EXISTS authors (
+        author_id TEXT PRIMARY KEY,
+        birthplace TEXT,
+        country TEXT,
+        fetched_at REAL NOT NULL
+    )"""
+
+    def __init__(self, path: Path | str = AUTHOR_CACHE_FILE, ttl: float = AUTHOR_CACHE_TTL) -> None:
+        """
+        Args:
+            path (Path | str): SQLite file to use, created if it doesn't exist.
+            ttl (float): Seconds an entry is valid for.
+        """
+        super().__init__(path)
+        self.ttl = ttl
+
+    def get(self, author_id: int | str) -> Birthplace | None:
+        """Looks up a single author.
+
+        Args:
+            author_id (int | str): GR author id, as given by extract_author_id.
+
+        Returns:
+            Birthplace | None: Cached (birthplace, country), None if missing or expired.
+        """
+        return self.get_many([author_id]).get(str(author_id))
+
+    def get_many(self, author_ids: Iterable[int | str]) -> Dict[str, Birthplace]:
+        """Looks up many authors at once, for instance all the authors of a shelf.
+
+        Args:
+            author_ids (Iterable[int | str]): GR author ids.
+
+        Returns:
+            Dict[str, Birthplace]: (birthplace, country) of every author found and not expired, by author id.
+        """
+        ids = list(dict.fromkeys(str(author_id) for author_id in author_ids))
+        oldest = time.time() - self.ttl
+        found: Dict[str, Birthplace] = {}
+        with self._lock:
+            for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                chunk = ids[start : start + SQLITE_MAX_VARIABLES]
+                rows = self._connection.execute(
+                    "SELECT author_id, birthplace, country FROM authors "
+                    f"WHERE fetched_at >= ? AND author_id IN ({','.join('?' * len(chunk))})",
+                    [oldest, *chunk],
+                ).fetchall()
+                for author_id, birthplace, country in rows:
+                    found[author_id] = (birthplace, country)
+        return found
+
+    def put(self, author_id: int | str, birthplace: str | None, country: str | None) -> None:
+        """Stores a single author, see put_many."""
+        self.put_many({author_id: (birthplace, country)})
+
+    def put_many(self, authors: Mapping[int | str, Birthplace]) -> None:
+        """Stores many authors in a single transaction.
+
+        Args:
+            authors (Mapping[int | str, Birthplace]): (birthplace, country) by author id, (None, None) included.
+        """
+        now = time.time()
+        rows: List[Tuple[str, str | None, str | None, float]] = [
+            (str(author_id), birthplace, country, now)
+            for author_id, (birthplace, country) in authors.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO authors (author_id, birthplace, country, fetched_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+
+class CachedResponse(NamedTuple):
+    etag: str | None
+    last_modified: str | None
+    headers: Dict[str, str]
+    encoding: str | None
+    body: bytes
+
+
+class HTTPCache(SQLiteCache):
+    """On-disk cache of GET responses with their validators (ETag / Last-Modified), keyed by URL.
+    Used through CachingAdapter, which revalidates every cached URL with a conditional GET and
+    serves the stored body when Goodreads answers 304 Not Modified.
+    The books parsed from a stored body can be kept next to it, so a 304 skips parsing too.
+    """
+
+    SCHEMA = """CREATE TABLE IF NOT EXISTS responses (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        headers TEXT NOT NULL,
+        encoding TEXT,
+        body BLOB NOT NULL,
+        parsed TEXT,
+        stored_at REAL NOT NULL
+    )"""
+
+    def __init__(self, path: Path | str = HTTP_CACHE_FILE) -> None:
+        """
+        Args:
+            path (Path | str): SQLite file to use, created if it doesn't exist.
+        """
+        super().__init__(path)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Looks up the stored response for a URL, None if there is none."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, headers, encoding, body FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, encoding, body = row
+        return CachedResponse(etag, last_modified, json.loads(headers), encoding, body)
+
+    def put(self, url: str, response: requests.Response) -> None:
+        """Stores a response if it has validators, dropping the books parsed from the previous body."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag is None and last_modified is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, etag, last_modified, headers, encoding, body, parsed, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    json.dumps(dict(response.headers)),
+                    response.encoding,
+                    response.content,
+                    time.time(),
+                ),
+            )
+
+    def get_parsed(self, url: str) -> List[Book] | None:
+        """Books parsed from the stored body of a URL, None if they were not stored."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT parsed FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return [Book.from_dict(book) for book in json.loads(row[0])]
+
+    def put_parsed(self, url: str, books: List[Book]) -> None:
+        """Stores the books parsed from the stored body of a URL."""
+        parsed = json.dumps([book.to_dict() for book in books], default=date.isoformat)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE responses SET parsed = ? WHERE url = ?", (parsed, url)
+            )
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of requests answered with 304 Not Modified since this cache was opened."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CachingAdapter(ThrottledAdapter):
+    """Transport adapter that makes every GET conditional on the response stored in an HTTPCache.
+    Mount it on a session (see setup_session) and the cache is transparent to the caller:
+    a 304 comes back as the stored 200 response, with from_cache set to True.
+    Revalidations go through the FetchController like any other request.
+    """
+
+    def __init__(self, cache: HTTPCache, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        if request.method != "GET" or request.url is None:
+            return super().send(request, **kwargs)
+        url = request.url
+        cached = self.cache.get(url)
+        if cached is not None:
+            if cached.etag:
+                request.headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request.headers["If-Modified-Since"] = cached.last_modified
+        response = super().send(request, **kwargs)
+
+        if cached is not None and response.status_code == 304:
+            self.cache.record(hit=True)
+            not_modified = response
+            not_modified.raw.drain_conn()
+            not_modified.raw.release_conn()
+            response = requests.Response()
+            response.status_code = 200
+            response.reason = "OK"
+            response.headers = CaseInsensitiveDict(cached.headers)
+            response.encoding = cached.encoding
+            response._content = cached.body
+            response.url = url
+            response.request = request
+            response.connection = self
+            # Keeps the raw 304 so the session still picks up any cookie it sets.
+            response.raw = not_modified.raw
+            response.from_cache = True  # type: ignore[attr-defined]
+        else:
+            self.cache.record(hit=False)
+            if response.status_code == 200:
+                self.cache.put(url, response)
+            response.from_cache = False  # type: ignore[attr-defined]
+        response.http_cache = self.cache  # type: ignore[attr-defined]
+        return response
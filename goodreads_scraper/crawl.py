@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Set, Tuple
+
+import requests
+
+from goodreads_scraper import auth
+from goodreads_scraper.book import Book
+from goodreads_scraper.cache import HTTPCache
+from goodreads_scraper.metrics import get_metrics
+from goodreads_scraper.scrape import open_http_shelf, parse_shelf_response
+from goodreads_scraper.store import ShelfStore
+from goodreads_scraper.throttle import FetchController
+from goodreads_scraper.utils import (
+    MAX_WORKERS,
+    PER_PAGE,
+    count_shelf_pages,
+    create_read_page,
+    create_read_shelf_url,
+    extract_user_id,
+    is_goodreads_profile,
+    is_goodreads_shelf,
+    parse_user_shelves,
+    set_query_params,
+    setup_session,
+    shelf_name,
+)
+from logger import logger
+
+if TYPE_CHECKING:
+    from goodreads_scraper.parse_pool import ParsePool
+    from goodreads_scraper.sessions import SessionManager
+
+
+class CrawlResult(NamedTuple):
+    url: str  # As given to crawl.
+    shelf_url: str | None  # None if the URL was not a valid profile or shelf.
+    books: List[Book] | None  # None if the crawl failed, or if the books went to a store.
+    book_count: int
+    error: str | None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ShelvedBook(NamedTuple):
+    book: Book
+    shelves: List[str]  # Shelves of the user the book is on, in the order they were asked for.
+
+
+class _UserCrawl:
+    """Progress of one user's shelf during a crawl."""
+
+    __slots__ = ("url", "shelf_url", "session", "books", "pending", "error")
+
+    def __init__(self, url: str, shelf_url: str) -> None:
+        self.url = url
+        self.shelf_url = shelf_url
+        self.session: requests.Session | None = None  # Of the account the user was given to.
+        self.books: List[Book] = []
+        self.pending = 1  # Pages submitted or queued, the first one until it tells how many there are.
+        self.error: str | None = None
+
+
+def _to_crawl(urls: Iterable[str]) -> Iterator[_UserCrawl | CrawlResult]:
+    """Validates the URLs of a crawl and drops the ones for a shelf that is already in it.
+    Invalid URLs come out as failed results, so the caller reports them with the rest.
+    """
+    seen: Set[Tuple[int, str]] = set()
+    for url in urls:
+        if is_goodreads_shelf(url):
+            shelf_url = url
+        elif is_goodreads_profile(url):
+            shelf_url = create_read_shelf_url(url)
+        else:
+            yield CrawlResult(url, None, None, 0, "Not a valid Goodreads profile or shelf URL.")
+            continue
+        key = (extract_user_id(shelf_url), shelf_name(shelf_url))
+        if key in seen:
+            logger.debug(f"Skipping {url}, its shelf is already in the crawl.")
+            continue
+        seen.add(key)
+        yield _UserCrawl(url, shelf_url)
+
+
+def _fetch_shelf_page(
+    session: requests.Session, url: str, parse_pool: ParsePool | None
+) -> Tuple[requests.Response, List[Book]]:
+    """Fetches and parses a shelf page, in the worker thread."""
+    response = session.get(url)
+    response.raise_for_status()
+    return response, parse_shelf_response(response, parse_pool)
+
+
+def _finish(user: _UserCrawl, store: ShelfStore | None) -> CrawlResult:
+    """Result of a user whose pages are all in, storing their shelf if there's a store."""
+    result = CrawlResult(user.url, user.shelf_url, user.books, len(user.books), None)
+    if user.error is None and store is not None:
+        try:
+            result = result._replace(books=None, book_count=store.put_shelf(user.shelf_url, user.books))
+        except Exception as e:
+            user.error = f"Failed to store the shelf: {e!r}"
+    if user.error is not None:
+        logger.debug(f"Failed to crawl {user.url}: {user.error}")
+        result = CrawlResult(user.url, user.shelf_url, None, 0, user.error)
+    get_metrics().count("users_crawled", status="ok" if result.ok else "failed")
+    return result
+
+
+def iter_crawl(
+    urls: Iterable[str],
+    concurrency: int = MAX_WORKERS,
+    store: ShelfStore | None = None,
+    http_cache: HTTPCache | None = None,
+    controller: FetchController | None = None,
+    parse_pool: ParsePool | None = None,
+    sessions: SessionManager | None = None,
+    session: requests.Session | None = None,
+) -> Iterator[CrawlResult]:
+    """Streaming version of crawl, yields the result of each user as soon as their whole shelf is in.
+
+    Args:
+        urls (Iterable[str]): Profile or shelf URLs, read lazily so it can be a generator over a huge list.
+        concurrency (int): Worker threads fetching and parsing pages, shared by all users.
+        store (ShelfStore | None): Store every shelf is saved into as soon as it's complete, instead of returning its books.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+        controller (FetchController | None): Rate limiter and retry policy, the process-wide one if None.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in, the fetch threads parse if None.
+        sessions (SessionManager | None): Accounts to spread the users over, round robin, instead of the saved cookies.
+            Each account has its own rate limit, http_cache and controller don't apply to them.
+        session (requests.Session | None): Authenticated session to crawl over, left open,
+            instead of a new one with the saved cookies. http_cache and controller don't apply to it.
+
+    Yields:
+        CrawlResult: Outcome of each user, in completion order.
+    """
+    window = 2 * concurrency
+    users = _to_crawl(urls)
+    queued: Deque[Tuple[_UserCrawl, int]] = deque()
+    in_flight: Dict[Future, Tuple[_UserCrawl, int]] = {}
+    own_session = session is None
+    shared_session = (
+        setup_session(concurrency, http_cache, controller) if own_session else nullcontext(session)
+    )
+    with shared_session as session, ThreadPoolExecutor(concurrency) as executor:
+        # A session handed in is already authenticated, only a new one gets the saved cookies.
+        if own_session and sessions is None and not auth.load_session_cookies(session):
+            logger.warning("No saved cookies, shelves can't be crawled while signed out.")
+        try:
+            while True:
+                # Pages of users already started go first, so their books leave memory as soon as possible.
+                while len(in_flight) < window:
+                    if queued:
+                        user, page = queued.popleft()
+                        if user.error is not None:
+                            user.pending -= 1
+                            if user.pending == 0:
+                                yield _finish(user, store)
+                            continue
+                        url = create_read_page(user.shelf_url, page, PER_PAGE)
+                    else:
+                        user_or_result = next(users, None)
+                        if user_or_result is None:
+                            break
+                        if isinstance(user_or_result, CrawlResult):
+                            get_metrics().count("users_crawled", status="failed")
+                            yield user_or_result
+                            continue
+                        user, page = user_or_result, 1
+                        try:
+                            user.session = sessions.session() if sessions is not None else session
+                        except Exception as e:
+                            user.error = f"No session to crawl with: {e!r}"
+                            user.pending = 0
+                            yield _finish(user, store)
+                            continue
+                        url = set_query_params(user.shelf_url, per_page=PER_PAGE)
+                    in_flight[executor.submit(_fetch_shelf_page, user.session, url, parse_pool)] = (user, page)
+                if not in_flight:
+                    return
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    user, page = in_flight.pop(future)
+                    user.pending -= 1
+                    if user.error is None:
+                        try:
+                            response, books = future.result()
+                        except Exception as e:
+                            user.error = repr(e)
+                        else:
+                            if page == 1 and auth.is_signed_out(response.url, response.text):
+                                user.error = "Signed out, the saved cookies are not valid anymore."
+                                if sessions is not None:
+                                    sessions.invalidate(user.session)  # type: ignore[arg-type]
+                            else:
+                                if page == 1:
+                                    max_page = count_shelf_pages(response.text, len(books))
+                                    queued.extend((user, next_page) for next_page in range(2, max_page + 1))
+                                    user.pending += max_page - 1
+                                user.books += books
+                    if user.pending == 0:
+                        yield _finish(user, store)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def crawl(
+    urls: Iterable[str],
+    concurrency: int = MAX_WORKERS,
+    store: ShelfStore | None = None,
+    http_cache: HTTPCache | None = None,
+    controller: FetchController | None = None,
+    parse_pool: ParsePool | None = None,
+    sessions: SessionManager | None = None,
+) -> List[CrawlResult]:
+    """Scrapes the shelves of many users, like process_goodreads_url over a list of URLs, but in one batch.
+    URLs are validated and deduplicated up front, and the pages of every user are fetched by one
+    pool of workers over one authenticated session, so the whole crawl is bounded by concurrency
+    and by the FetchController, however many users there are.
+    A user that fails, from an invalid URL to a page that never loads, is reported in their result
+    and doesn't stop the rest of the batch.
+
+    Args:
+        urls (Iterable[str]): Profile or shelf URLs.
+        concurrency (int): Worker threads fetching and parsing pages, shared by all users.
+        store (ShelfStore | None): Store every shelf is saved into, instead of keeping all the books in memory.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+        controller (FetchController | None): Rate limiter and retry policy, the process-wide one if None.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in, the fetch threads parse if None.
+        sessions (SessionManager | None): Accounts to spread the users over, round robin, instead of the saved cookies.
+            Each account has its own rate limit, http_cache and controller don't apply to them.
+
+    Returns:
+        List[CrawlResult]: Outcome of each user, in completion order.
+    """
+    return list(
+        iter_crawl(
+            urls,
+            concurrency=concurrency,
+            store=store,
+            http_cache=http_cache,
+            controller=controller,
+            parse_pool=parse_pool,
+            sessions=sessions,
+        )
+    )
+
+
+def scrape_user_shelves(
+    profile_url: str,
+    shelves: Sequence[str] | str = "all",
+    concurrency: int = MAX_WORKERS,
+    http_cache: HTTPCache | None = None,
+    parse_pool: ParsePool | None = None,
+) -> List[ShelvedBook] | None:
+    """Scrapes several shelves of a user at once, over one authenticated session.
+    The shelves are discovered from the Bookshelves list of the read shelf, then the pages of every
+    shelf are fetched concurrently by one pool of workers, like a crawl of one user's shelves.
+    A book on several shelves comes out once, with all of them.
+
+    Args:
+        profile_url (str): A valid GR profile URL, or the URL of any of the user's shelves.
+        shelves (Sequence[str] | str): Names of the shelves to scrape, or "all" for every shelf the user has.
+        concurrency (int): Worker threads fetching and parsing pages, shared by all shelves.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in, the fetch threads parse if None.
+
+    Raises:
+        ValueError: If the URL is not a valid profile or shelf URL.
+        RuntimeError: If any of the shelves couldn't be scraped, since its books would be missing shelves.
+
+    Returns:
+        List[ShelvedBook] | None: Books in the shelves, in the order of the shelves asked for.
+            None if the session is not authenticated.
+    """
+    if is_goodreads_profile(profile_url):
+        shelf_url = create_read_shelf_url(profile_url)
+    elif is_goodreads_shelf(profile_url):
+        shelf_url = profile_url
+    else:
+        raise ValueError(f"{profile_url} is not a valid Goodreads profile or shelf URL.")
+    if isinstance(shelves, str) and shelves != "all":
+        shelves = [shelves]
+
+    # A one book page is enough to tell the shelves and whether the session is signed in.
+    opened = open_http_shelf(set_query_params(shelf_url, per_page=1), http_cache=http_cache)
+    if opened is None:
+        return None
+    session, first_page = opened
+    with session:
+        if shelves == "all":
+            shelves = list(parse_user_shelves(first_page.text)) or [shelf_name(shelf_url)]
+            logger.debug(f"Found {len(shelves)} shelves: {', '.join(shelves)}.")
+        shelf_urls = {name: set_query_params(shelf_url, shelf=name) for name in shelves}
+        results = {
+            result.shelf_url: result
+            for result in iter_crawl(
+                shelf_urls.values(), concurrency=concurrency, parse_pool=parse_pool, session=session
+            )
+        }
+    failed = [name for name, url in shelf_urls.items() if not results[url].ok]
+    if failed:
+        error = results[shelf_urls[failed[0]]].error
+        raise RuntimeError(f"Failed to scrape the shelves {', '.join(failed)}: {error}")
+
+    shelved: Dict[int, ShelvedBook] = {}
+    for name, url in shelf_urls.items():
+        for book in results[url].books or []:
+            # Books without an id can't be matched across shelves, they come out once per shelf.
+            key = book.book_id if book.book_id is not None else id(book)
+            if key not in shelved:
+                shelved[key] = ShelvedBook(book, [])
+            if name not in shelved[key].shelves:
+                shelved[key].shelves.append(name)
+    return list(shelved.values())
@@ -0,0 +1,40 @@
+// Fetches shelf pages from inside the page, with its own cookies, and extracts their books with extractBooks.
+// At most `limit` pages are requested at once. Calls done with {pages: [...]}, the book columns of each page
+// in the order of the urls, or with {error: message} as soon as one of them fails.
+function fetchShelfPages(urls, limit, done) {
+    var parser = new DOMParser();
+    var pages = new Array(urls.length);
+    var next = 0;
+
+    function fetchPage(url) {
+        return fetch(url, {credentials: 'same-origin'}).then(function(response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status + ' for ' + url);
+            }
+            return response.text();
+        }).then(function(html) {
+            return extractBooks(parser.parseFromString(html, 'text/html'));
+        });
+    }
+
+    function worker() {
+        if (next >= urls.length) {
+            return Promise.resolve();
+        }
+        var i = next++;
+        return fetchPage(urls[i]).then(function(books) {
+            pages[i] = books;
+            return worker();
+        });
+    }
+
+    var workers = [];
+    for (var i = 0; i < Math.min(limit, urls.length); i++) {
+        workers.push(worker());
+    }
+    Promise.all(workers).then(function() {
+        done({pages: pages});
+    }, function(error) {
+        done({error: String(error)});
+    });
+}
@@ -0,0 +1,176 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+METRIC_PREFIX = "goodreads_"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of observations, 0.0 if there are none.
+
+    Args:
+        values (List[float]): Observations, in any order.
+        q (float): Quantile between 0 and 1, 0.99 for p99.
+
+    Returns:
+        float: Smallest observation with at least q of all of them at or below it.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+class Metrics:
+    """Instrumentation surface of the scraper: phase spans, counters and histograms.
+    This base class drops everything, so instrumented code costs next to nothing until
+    a collector is installed with set_metrics.
+    """
+
+    @contextmanager
+    def span(self, phase: str, **labels: Any) -> Iterator[None]:
+        """Times a phase of a scrape, like "auth" or "page_loop", as a phase_seconds observation."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("phase_seconds", time.perf_counter() - t0, phase=phase, **labels)
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Adds to a counter, like pages_fetched or retries."""
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Records one observation of a histogram, like request_seconds."""
+
+
+class InMemoryMetrics(Metrics):
+    """Keeps every counter and observation in memory, to be read by tests or written by an exporter."""
+
+    def __init__(self) -> None:
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.histograms.setdefault(key, []).append(value)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Current value of a counter, 0 if it was never incremented."""
+        with self._lock:
+            return self.counters.get((name, _labels(labels)), 0)
+
+    def observations(self, name: str, **labels: Any) -> List[float]:
+        """Copy of the observations of a histogram, empty if there are none."""
+        with self._lock:
+            return list(self.histograms.get((name, _labels(labels)), []))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary of everything collected, counters as totals and histograms as count, sum and quantiles."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: list(values) for key, values in self.histograms.items()}
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": len(values),
+                    "sum": sum(values),
+                    "quantiles": {str(q): percentile(values, q) for q in QUANTILES},
+                }
+                for (name, labels), values in sorted(histograms.items())
+            ],
+        }
+
+
+_metrics: Metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The collector instrumented code reports to, a no-op one unless set_metrics was called."""
+    return _metrics
+
+
+def set_metrics(metrics: Metrics) -> Metrics:
+    """Installs the collector for the whole process.
+
+    Args:
+        metrics (Metrics): Collector to report to from now on, Metrics() to silence them again.
+
+    Returns:
+        Metrics: The collector that was installed before.
+    """
+    global _metrics
+    previous, _metrics = _metrics, metrics
+    return previous
+
+
+def record_shelf_page(books: List[Any], size: int = 0) -> None:
+    """Counts a fetched shelf page, its size in bytes and the books parsed from it."""
+    metrics = get_metrics()
+    metrics.count("pages_fetched")
+    metrics.count("bytes_fetched", size)
+    metrics.count("books_parsed", len(books))
+
+
+def write_json(metrics: InMemoryMetrics, path: Path | str) -> None:
+    """Writes the snapshot of a collector as JSON."""
+    Path(path).write_text(json.dumps(metrics.snapshot(), indent=2))
+
+
+def _prometheus_labels(labels: Dict[str, str], **extra: str) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    escaped = (
+        key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def write_prometheus(metrics: InMemoryMetrics, path: Path | str) -> None:
+    """Writes the snapshot of a collector in the Prometheus text format, for the node exporter's textfile collector.
+    Counters become `goodreads_<name>_total` and histograms become summaries with their quantiles.
+    """
+    snapshot = metrics.snapshot()
+    lines: List[str] = []
+    typed = set()
+    for counter in snapshot["counters"]:
+        name = f"{METRIC_PREFIX}{counter['name']}_total"
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_prometheus_labels(counter['labels'])} {counter['value']}")
+    for histogram in snapshot["histograms"]:
+        name = f"{METRIC_PREFIX}{histogram['name']}"
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} summary")
+        for q, value in histogram["quantiles"].items():
+            lines.append(f"{name}{_prometheus_labels(histogram['labels'], quantile=q)} {value}")
+        lines.append(f"{name}_sum{_prometheus_labels(histogram['labels'])} {histogram['sum']}")
+        lines.append(f"{name}_count{_prometheus_labels(histogram['labels'])} {histogram['count']}")
+    Path(path).write_text("\n".join(lines) + "\n")
@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, List, Tuple
+
+from goodreads_scraper.book import BOOK_FIELDS, Book
+from goodreads_scraper.utils import HTML_PARSERS, read_books_from_html
+
+BookRow = Tuple[Any, ...]
+
+# Workers are started from the fetch threads, forking a process that has threads running could copy
+# their held locks, from logging or urllib3, into a worker that then deadlocks. Windows only has spawn.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _parse_rows(html: str, parser: str) -> List[BookRow]:
+    """Parses a shelf page in a worker process, returning each book as a tuple of BOOK_FIELDS.
+    Tuples pickle smaller and faster than the records themselves on the way back.
+    """
+    return [tuple(getattr(book, name) for name in BOOK_FIELDS) for book in read_books_from_html(html, parser)]
+
+
+class ParsePool:
+    """Persistent pool of worker processes that parse shelf pages, so parsing runs on every core
+    in parallel with the fetch threads instead of holding the GIL they need.
+    Workers are started as the first pages come in, from a clean server process (see START_METHOD),
+    and reused for every page of every shelf, pass the same pool to each scrape.
+    Use it as a context manager, or call close when done.
+    """
+
+    def __init__(self, processes: int | None = None, parser: str = "lxml") -> None:
+        """
+        Args:
+            processes (int | None): Worker processes, one per CPU if None.
+            parser (str): Backend the workers parse with, one of HTML_PARSERS.
+
+        Raises:
+            ValueError: If the parser is unknown.
+        """
+        if parser not in HTML_PARSERS:
+            raise ValueError(f"Unknown parser {parser}, use one of {list(HTML_PARSERS)}.")
+        self.processes = processes or os.cpu_count() or 1
+        self.parser = parser
+        self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context(START_METHOD))
+
+    def submit(self, html: str) -> Future:
+        """Sends a page to a worker and returns right away.
+
+        Args:
+            html (str): HTML of a shelf page.
+
+        Returns:
+            Future: Resolves to the parsed rows, turn them into books with to_books.
+        """
+        return self._executor.submit(_parse_rows, html, self.parser)
+
+    @staticmethod
+    def to_books(rows: List[BookRow]) -> List[Book]:
+        return [Book(*row) for row in rows]
+
+    def parse(self, html: str) -> List[Book]:
+        """Parses a page in a worker, blocking the calling thread (but not the GIL) until it's done.
+
+        Args:
+            html (str): HTML of a shelf page.
+
+        Returns:
+            List[Book]: The same books read_books_from_html returns.
+        """
+        return self.to_books(self.submit(html).result())
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
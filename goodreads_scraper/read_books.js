@@ -1,32 +1,86 @@
-function extractBooks() {
-    var books = Array.from(document.getElementsByClassName('bookalike'));
-    return books.map(function(book) {
-        var data = {};
-        
-        // Extracting data directly
-        data['isbn'] = book.querySelector('td.field.isbn div.value').textContent.trim();
-        data['isbn13'] = book.querySelector('td.field.isbn13 div.value').textContent.trim();
-        data['title'] = book.querySelector('td.field.title').textContent.replace(/^title\s+|\s\s+/g, ' ').trim();
-        var author_info = book.querySelector('td.field.author div.value a');
-        data['author_name'] = author_info.textContent.trim();
-        data['author_link'] = 'https://www.goodreads.com'  + author_info.getAttribute('href');
-        data['avg_rating'] = parseFloat(book.querySelector('td.field.avg_rating div.value').textContent.trim());
-        data['user_rating'] = book.querySelector('td.field.rating').textContent.trim();  // You need to convert this according to your STARS_ENUM in Python
-        data['num_pages'] = parseInt(book.querySelector('td.field.num_pages div.value').textContent.trim());
-        data['publishing_date'] = book.querySelector('td.field.date_pub div.value').textContent.trim();
-        data['started_date'] = book.querySelector('td.field.date_started div.value').textContent.trim();
-        data['finished_date'] = book.querySelector('td.field.date_read div.value').textContent.trim();
-        data['added_date'] = book.querySelector('td.field.date_added div.value').textContent.trim();
+// Star texts of the ratings, the same as STARS_ENUM in Python.
+var STARS = {'did not like it': 1, 'it was ok': 2, 'liked it': 3, 'really liked it': 4, 'it was amazing': 5};
+var MONTHS = {jan: 1, feb: 2, mar: 3, apr: 4, may: 5, jun: 6, jul: 7, aug: 8, sep: 9, oct: 10, nov: 11, dec: 12};
+// The fields extracted, in the order of the Python Book.
+var BOOK_COLUMNS = [
+    'title', 'book_id', 'isbn', 'isbn13', 'author_name', 'author_id', 'author_link', 'avg_rating',
+    'user_rating', 'num_pages', 'publishing_date', 'started_date', 'finished_date', 'added_date', 'review_id'
+];
+
+function pad(number, width) {
+    var text = String(number);
+    while (text.length < width) {
+        text = '0' + text;
+    }
+    return text;
+}
+
+// Parses a date as shown in the shelf, like "Sep 20, 2021", "Sep 2021" or "1605", the same way as
+// parse_goodreads_date in Python, into an ISO date. Missing day or month default to 1, null if it's not a date.
+function parseDate(text) {
+    text = text.trim();
+    var match = /^([a-z]{3})\s+(\d{1,2}),\s+(\d{4})$/i.exec(text) || /^([a-z]{3})\s+()(\d{4})$/i.exec(text)
+        || /^()()(\d{4})$/.exec(text);
+    if (!match) {
+        return null;
+    }
+    var month = match[1] ? MONTHS[match[1].toLowerCase()] : 1;
+    var day = match[2] ? parseInt(match[2], 10) : 1;
+    var year = parseInt(match[3], 10);
+    var date = new Date(Date.UTC(year, month - 1, day));
+    date.setUTCFullYear(year);  // Date.UTC maps years 0-99 to 1900-1999.
+    if (!month || date.getUTCMonth() !== month - 1 || date.getUTCDate() !== day) {
+        return null;
+    }
+    return pad(year, 4) + '-' + pad(month, 2) + '-' + pad(day, 2);
+}
 
-        // Extract author id from the author link
-        data['author_id'] = null;  // Initialize to null to handle cases where the regex might not find a match
-        var author_id_match = /\/author\/show\/(\d+)./.exec(data['author_link']);
-        if (author_id_match) {
-            data['author_id'] = parseInt(author_id_match[1]);
-        }
+// Reads the number of pages from a cell like "1,328 pp", null if there is none.
+function parsePages(text) {
+    var match = /\d[\d,]*/.exec(text);
+    return match ? parseInt(match[0].replace(/,/g, ''), 10) : null;
+}
+
+function parseId(pattern, text) {
+    var match = text ? pattern.exec(text) : null;
+    return match ? parseInt(match[1], 10) : null;
+}
+
+// Extracts the books of a shelf page, from the page itself or from one parsed with DOMParser.
+// Returns one array per field, in BOOK_COLUMNS, so the field names are sent once instead of once per book.
+// Numbers are parsed here, and dates are ISO dates, books_from_columns builds the Python books from them.
+function extractBooks(root) {
+    var columns = {};
+    BOOK_COLUMNS.forEach(function(name) {
+        columns[name] = [];
+    });
+    var books = root.getElementsByClassName('bookalike');
+    for (var i = 0; i < books.length; i++) {
+        var book = books[i];
+        var value = function(field) {
+            return book.querySelector('td.field.' + field + ' div.value').textContent.trim();
+        };
+        var title_link = book.querySelector('td.field.title div.value a');
+        var author_info = book.querySelector('td.field.author div.value a');
+        var author_link = 'https://www.goodreads.com' + author_info.getAttribute('href');
+        var avg_rating = parseFloat(value('avg_rating'));
+        var stars = book.querySelector('td.field.rating .staticStars');
 
-        
-    return data;
-});
+        columns.title.push(book.querySelector('td.field.title').textContent.replace(/^title\s+|\s\s+/g, ' ').trim());
+        columns.book_id.push(parseId(/\/book\/show\/(\d+)/, title_link && title_link.getAttribute('href')));
+        columns.isbn.push(value('isbn'));
+        columns.isbn13.push(value('isbn13'));
+        columns.author_name.push(author_info.textContent.trim());
+        columns.author_id.push(parseId(/\/author\/show\/(\d+)./, author_link));
+        columns.author_link.push(author_link);
+        columns.avg_rating.push(isNaN(avg_rating) ? null : avg_rating);
+        columns.user_rating.push(stars ? STARS[stars.getAttribute('title').trim()] || null : null);
+        columns.num_pages.push(parsePages(value('num_pages')));
+        columns.publishing_date.push(parseDate(value('date_pub')));
+        columns.started_date.push(parseDate(value('date_started')));
+        columns.finished_date.push(parseDate(value('date_read')));
+        columns.added_date.push(parseDate(value('date_added')));
+        columns.review_id.push(parseId(/review_(\d+)/, book.id));
+    }
+    return columns;
 }
-return extractBooks();
\ No newline at end of file
@@ -1,180 +1,694 @@
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.by import By
+# Selenium and BeautifulSoup are imported where they are used, so the HTTP path doesn't pay for them.
+from __future__ import annotations
+
 from goodreads_scraper.utils import (
     create_read_shelf_url,
     create_read_page,
-    parse_infinite_status,
     setup_browser,
     is_goodreads_profile,
     read_books_fast,
+    iter_books_from_pages,
     page_wait,
     cleanup_birthplace,
     is_goodreads_shelf,
-    read_books_from_html
+    read_books_from_html,
+    setup_session,
+    MAX_WORKERS,
+    AUTHOR_WORKERS,
+    PER_PAGE,
+    count_shelf_pages,
+    set_query_params,
+    extract_author_id,
 )
 from goodreads_scraper import auth
-from selenium.webdriver.chrome.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import TimeoutException
-from typing import Dict, List, Any
+from goodreads_scraper.book import Book
+from goodreads_scraper.cache import AuthorCache, HTTPCache
+from goodreads_scraper.store import ShelfStore
+from goodreads_scraper.metrics import get_metrics, record_shelf_page
+from typing import TYPE_CHECKING, Dict, List, Any, Iterable, Iterator, Tuple
+from itertools import islice
+from contextlib import ExitStack, contextmanager
+from urllib.parse import urlparse
+import functools
 import re
 from logger import logger
-import time
-from concurrent.futures import as_completed
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 from requests_futures.sessions import FuturesSession
 import requests
-from bs4 import BeautifulSoup
 from lxml import etree # type: ignore
-def scroll_shelf(
-    infinite_status: WebElement, body: WebElement, browser: WebDriver
+
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
+    from goodreads_scraper.browser_pool import BrowserPool
+    from goodreads_scraper.parse_pool import ParsePool
+def parse_shelf_response(
+    response: requests.Response, parse_pool: ParsePool | None = None
+) -> List[Book]:
+    """Parses the books of a shelf page response.
+    If the page came unchanged from an HTTPCache, the books parsed from it last time are reused.
+
+    Args:
+        response (requests.Response): Response for a shelf page.
+        parse_pool (ParsePool | None): Worker processes to parse in, the calling thread parses if None.
+
+    Returns:
+        List[Book]: List of books and their attributes.
+    """
+    http_cache: HTTPCache | None = getattr(response, "http_cache", None)
+    if http_cache is not None and getattr(response, "from_cache", False):
+        cached = http_cache.get_parsed(response.url)
+        if cached is not None:
+            get_metrics().count("pages_from_cache")
+            record_shelf_page(cached, len(response.content))
+            return cached
+    with get_metrics().span("parse"):
+        if parse_pool is not None:
+            parsed = parse_pool.parse(response.text)
+        else:
+            parsed = read_books_from_html(response.text)
+    if http_cache is not None:
+        http_cache.put_parsed(response.url, parsed)
+    record_shelf_page(parsed, len(response.content))
+    return parsed
+
+
+def _parse_shelf_page_response(
+    response: requests.Response, *args: Any, parse_pool: ParsePool, **kwargs: Any
 ) -> None:
-    """Scrolls shelf until all books have been loaded.
+    """Response hook that has a shelf page parsed by the pool, from the fetch thread that got it."""
+    if response.ok:
+        response.books = parse_shelf_response(response, parse_pool)  # type: ignore
+
+
+def iter_shelf_pages_from(
+    session: requests.Session,
+    url: str,
+    max_page: int,
+    ordered: bool = False,
+    per_page: int | None = PER_PAGE,
+    parse_pool: ParsePool | None = None,
+    first_page: int = 2,
+) -> Iterator[Tuple[int, List[Book]]]:
+    """Fetches pages first_page to max_page of a shelf concurrently and yields each one as soon as it is parsed.
+    At most 2 * MAX_WORKERS pages are in flight or waiting in the reorder buffer at any time,
+    so memory does not grow with the size of the shelf.
+    With a parse_pool each page is parsed by a worker process as soon as its fetch thread gets it,
+    so parsing runs on all cores in parallel with the fetches instead of one page at a time here.
 
     Args:
-        infinite_status (WebElement): Element at the bottom of the page that gives the number of books loaded.
-        body (WebElement): Body element of the webpage.
-        browser (WebDriver): Browser being used by Selenium to scrape.
-    """
-    current_books, remaining_books = parse_infinite_status(infinite_status)
-    while current_books < remaining_books:
-        # Scroll down
-        body.send_keys(Keys.END)
-        # Get updated status
-        WebDriverWait(browser, 10).until(
-            lambda x: len(x.find_elements(By.CLASS_NAME, "bookalike")) > current_books
-        )
-        infinite_status = WebDriverWait(browser, 5).until(
-            EC.presence_of_element_located((By.ID, "infiniteStatus"))
-        )
+        session (requests.Session): Authenticated session, its connection pool is shared by all the workers.
+        url (str): Valid URL for a user's GR shelf.
+        max_page (int): Last page of the shelf.
+        ordered (bool): Yield pages in page order instead of completion order.
+        per_page (int | None): Books per page, must be the same the first page was fetched with.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in.
+        first_page (int): First page to fetch, the ones before it are already in.
+
+    Yields:
+        Tuple[int, List[Book]]: Page number and the books parsed from it.
+    """
+    hooks = (
+        {"response": functools.partial(_parse_shelf_page_response, parse_pool=parse_pool)}
+        if parse_pool is not None
+        else None
+    )
+    window = 2 * MAX_WORKERS
+    pages = iter(range(first_page, max_page + 1))
+    in_flight: Dict[Future, int] = {}
+    ready: Dict[int, List[Book]] = {}
+    next_page = first_page
+    with FuturesSession(session=session, max_workers=MAX_WORKERS) as futures_session:
+        try:
+            while True:
+                for page in islice(pages, window - len(in_flight) - len(ready)):
+                    in_flight[futures_session.get(create_read_page(url, page, per_page), hooks=hooks)] = page
+                if not in_flight and not ready:
+                    return
+                if in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        page = in_flight.pop(future)
+                        response = future.result()
+                        response.raise_for_status()
+                        if parse_pool is not None:
+                            ready[page] = response.books
+                        else:
+                            ready[page] = parse_shelf_response(response)
+                if ordered:
+                    while next_page in ready:
+                        yield next_page, ready.pop(next_page)
+                        next_page += 1
+                else:
+                    for page in list(ready):
+                        yield page, ready.pop(page)
+        finally:
+            for future in in_flight:
+                future.cancel()
 
-        current_books, _ = parse_infinite_status(infinite_status)
 
+def is_http_url(url: str) -> bool:
+    """Whether the URL is a live page, as opposed to a saved shelf opened from a file URI."""
+    return urlparse(url).scheme in ("http", "https")
 
 
-def scrape_shelf(url: str, debug: bool = False) -> List[Dict[str, Any]]:
-    """Performs the extraction of all the books from a valid shelf URL."""
-    t0 = time.time()
-    browser = setup_browser(debug=debug)
-    print(f"setup_browser: {time.time()-t0:.2f}s", flush=True)
+def _fetch_signed_in(session: requests.Session, url: str) -> requests.Response | None:
+    """Fetches a page with the session, None if it was served signed out."""
+    page = session.get(url)
+    page.raise_for_status()
+    if auth.is_signed_out(page.url, page.text):
+        return None
+    return page
 
-    t1 = time.time()
-    browser.get(url)
-    auth.authenticate(browser, url)
-    print(f"auth: {time.time()-t1:.2f}s", flush=True)
 
-    t2 = time.time()
-    body = page_wait(browser)
-    print(f"page_wait: {time.time()-t2:.2f}s", flush=True)
+def open_http_shelf(
+    url: str, http_cache: HTTPCache | None = None
+) -> Tuple[requests.Session, requests.Response] | None:
+    """Loads the saved cookies into a new session and fetches the first page of the shelf with it.
+    If there are no saved cookies or they expired, logs in over HTTP with GR_LOGIN and GR_PASSWORD
+    and saves the new cookies, so the browser is only needed if Goodreads rejects that login.
+    Concurrent scrapes log in only once, see auth.refresh_cookie_file.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf.
+        http_cache (HTTPCache | None): Cache to revalidate the shelf pages against.
+
+    Returns:
+        Tuple[requests.Session, requests.Response] | None: The session and first page, None if the session is not authenticated.
+    """
+    session = setup_session(http_cache=http_cache)
+    first_page = None
+    saved = auth.read_cookie_file()
+    if saved:
+        auth.set_session_cookies(session, saved)
+        first_page = _fetch_signed_in(session, url)
+        if first_page is None:
+            logger.debug("Saved cookies are not authenticated anymore.")
+    else:
+        logger.debug("No saved cookies.")
+    if first_page is None and auth.has_credentials():
+        try:
+            cookies = auth.refresh_cookie_file(saved)
+        except (auth.LoginRejected, requests.RequestException) as e:
+            logger.debug(f"HTTP login failed: {e!r}")
+        else:
+            session.cookies.clear()
+            auth.set_session_cookies(session, cookies)
+            first_page = _fetch_signed_in(session, url)
+    if first_page is None:
+        logger.debug("Can't scrape over HTTP.")
+        session.close()
+        return None
+    return session, first_page
+
+
+def iter_http_shelf_pages(
+    session: requests.Session,
+    url: str,
+    first_page: requests.Response,
+    ordered: bool = False,
+    per_page: int | None = PER_PAGE,
+    parse_pool: ParsePool | None = None,
+) -> Iterator[Tuple[int, List[Book]]]:
+    """Yields the pages of a shelf over plain HTTP, starting from an already fetched first page.
+
+    Args:
+        session (requests.Session): Authenticated session, closed once all pages are fetched.
+        url (str): Valid URL for a user's GR shelf.
+        first_page (requests.Response): Response for the first page of the shelf.
+        ordered (bool): Yield pages in page order instead of completion order.
+        per_page (int | None): Books per page the first page was fetched with.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in.
+
+    Yields:
+        Tuple[int, List[Book]]: Page number and the books parsed from it.
+    """
+    with session:
+        first_page_books = parse_shelf_response(first_page, parse_pool)
+        max_page = count_shelf_pages(first_page.text, len(first_page_books))
+        yield 1, first_page_books
+        with get_metrics().span("page_loop"):
+            yield from iter_shelf_pages_from(
+                session, url, max_page, ordered=ordered, per_page=per_page, parse_pool=parse_pool
+            )
+
+
+@contextmanager
+def open_browser(debug: bool = False, browser_pool: BrowserPool | None = None) -> Iterator[WebDriver]:
+    """Gives a browser for a single scrape, either a new one that is quit afterwards or a warm one from a pool.
+
+    Args:
+        debug (bool): Shows the browser, if a new one is started.
+        browser_pool (BrowserPool | None): Pool to check a browser out of and back into.
 
-    t3 = time.time()
+    Yields:
+        WebDriver: Browser to scrape with.
+    """
+    if browser_pool is not None:
+        with browser_pool.browser() as browser:
+            yield browser
+        return
+    browser = setup_browser(debug=debug)
     try:
-        infinite_status = WebDriverWait(browser, 5).until(
-            EC.presence_of_element_located((By.ID, "infiniteStatus"))
-        )
-        infinite_status_text = infinite_status.text
-    except TimeoutException:
-        logger.debug("Infinite status timeout.")
-        infinite_status_text = None
-    print(f"infinite status wait: {time.time()-t3:.2f}s", flush=True)
-
-    if infinite_status_text:
-        t4 = time.time()
-        scroll_shelf(infinite_status, body, browser)
-        print(f"scroll shelf: {time.time()-t4:.2f}s", flush=True)
-        t5 = time.time()
-        book_list = read_books_fast(browser)
-        print(f"read fast: {time.time()-t5:.2f}s", flush=True)
+        yield browser
+    finally:
         browser.quit()
-        print(f"total: {time.time()-t0:.2f}s", flush=True)
-        return book_list
 
-    t5 = time.time()
-    book_list = read_books_fast(browser)
-    print(f"read fast (page 1): {time.time()-t5:.2f}s", flush=True)
 
-    try:
-        t6 = time.time()
-        pagination = WebDriverWait(browser, 10).until(
-            EC.presence_of_element_located((By.ID, "reviewPagination"))
+def iter_browser_shelf_pages(
+    url: str,
+    debug: bool = False,
+    ordered: bool = False,
+    http_cache: HTTPCache | None = None,
+    browser_pool: BrowserPool | None = None,
+    parse_pool: ParsePool | None = None,
+    per_page: int | None = PER_PAGE,
+) -> Iterator[Tuple[int, List[Book]]]:
+    """Yields the pages of a shelf using a browser to authenticate and read the first page.
+    The other pages of shelves with infinite scrolling are fetched from inside the browser, a batch at a time
+    and yielded as they come, those of paginated shelves over HTTP with the browser's cookies.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf, or a file URI for a saved shelf.
+        debug (bool): Shows the browser.
+        ordered (bool): Yield pages in page order instead of completion order.
+        http_cache (HTTPCache | None): Cache to revalidate the pages fetched after the first one against.
+        browser_pool (BrowserPool | None): Pool of warm browsers to use instead of starting a new one.
+        parse_pool (ParsePool | None): Worker processes to parse the pages fetched after the first one in.
+        per_page (int | None): Books per page to ask for, PER_PAGE by default and Goodreads' default if None.
+
+    Yields:
+        Tuple[int, List[Book]]: Page number and the books parsed from it.
+    """
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    metrics = get_metrics()
+    # Also timed when the scrape fails or the caller stops early, those are the runs worth looking at.
+    with metrics.span("total"):
+        max_page = None
+        with ExitStack() as stack:
+            with metrics.span("setup_browser"):
+                browser = stack.enter_context(open_browser(debug=debug, browser_pool=browser_pool))
+            with metrics.span("auth"):
+                # Saved shelves are local files, only live shelves can be asked for bigger pages.
+                page_url = set_query_params(url, per_page=per_page) if is_http_url(url) else url
+                if browser_pool is None:
+                    browser.get(page_url)
+                auth.authenticate(browser, page_url)
+
+            with metrics.span("page_wait"):
+                page_wait(browser)
+
+            with metrics.span("infinite_status_wait"):
+                try:
+                    infinite_status = WebDriverWait(browser, 5).until(
+                        EC.presence_of_element_located((By.ID, "infiniteStatus"))
+                    )
+                    infinite_status_text = infinite_status.text
+                except TimeoutException:
+                    logger.debug("Infinite status timeout.")
+                    infinite_status_text = None
+
+            with metrics.span("read_fast"):
+                first_page_books = read_books_fast(browser)
+            record_shelf_page(first_page_books)
+            yield 1, first_page_books
+
+            next_page = 2
+            if infinite_status_text:
+                # The rest of the shelf would only load by scrolling, one batch at a time. Its pages are fetched
+                # by the page itself instead, in parallel, and if that fails over HTTP with the browser's cookies.
+                max_page = count_shelf_pages(browser.page_source, len(first_page_books))
+                if is_http_url(url):
+                    urls = [create_read_page(url, page, per_page) for page in range(2, max_page + 1)]
+                    try:
+                        for page_books in iter_books_from_pages(browser, urls):
+                            record_shelf_page(page_books)
+                            yield next_page, page_books
+                            next_page += 1
+                    except (RuntimeError, WebDriverException) as e:
+                        logger.debug(f"Fetching the pages in the browser failed, fetching them over HTTP: {e!r}")
+                if next_page > max_page or not is_http_url(url):
+                    max_page = None
+            else:
+                try:
+                    with metrics.span("find_pagination"):
+                        WebDriverWait(browser, 10).until(
+                            EC.presence_of_element_located((By.ID, "reviewPagination"))
+                        )
+                        max_page = count_shelf_pages(browser.page_source, len(first_page_books))
+                except TimeoutException:
+                    logger.debug("No pagination, single page shelf.")
+
+            if max_page is not None:
+                with metrics.span("build_session"):
+                    session = setup_session(http_cache=http_cache)
+                    session.headers["User-Agent"] = browser.execute_script("return navigator.userAgent;")
+                    for cookie in browser.get_cookies():
+                        session.cookies.set(cookie["name"], cookie["value"])
+
+        if max_page is not None:
+            with session, metrics.span("page_loop"):
+                yield from iter_shelf_pages_from(
+                    session,
+                    url,
+                    max_page,
+                    ordered=ordered,
+                    per_page=per_page,
+                    parse_pool=parse_pool,
+                    first_page=next_page,
+                )
+
+
+def iter_shelf_pages(
+    url: str,
+    debug: bool = False,
+    use_http: bool = True,
+    ordered: bool = False,
+    http_cache: HTTPCache | None = None,
+    browser_pool: BrowserPool | None = None,
+    parse_pool: ParsePool | None = None,
+    per_page: int | None = PER_PAGE,
+) -> Iterator[Tuple[int, List[Book]]]:
+    """Yields the pages of a valid shelf URL as soon as each one is fetched and parsed.
+    Tries plain HTTP with the saved cookies first and only starts a browser if that session is not authenticated.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf, or a file URI for a saved shelf.
+        debug (bool): Shows the browser if it has to be used.
+        use_http (bool): Whether to try the browserless path first.
+        ordered (bool): Yield pages in page order instead of completion order.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+        browser_pool (BrowserPool | None): Pool of warm browsers to use if the browser is needed.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in, reuse it across shelves.
+        per_page (int | None): Books per page to ask for, PER_PAGE by default and Goodreads' default if None.
+
+    Yields:
+        Tuple[int, List[Book]]: Page number and the books parsed from it.
+    """
+    opened = None
+    if use_http and is_http_url(url):
+        opened = open_http_shelf(set_query_params(url, per_page=per_page), http_cache=http_cache)
+        if opened is None:
+            logger.debug("Falling back to the browser.")
+    if opened is not None:
+        session, first_page = opened
+        yield from iter_http_shelf_pages(
+            session, url, first_page, ordered=ordered, per_page=per_page, parse_pool=parse_pool
+        )
+    else:
+        yield from iter_browser_shelf_pages(
+            url,
+            debug=debug,
+            ordered=ordered,
+            http_cache=http_cache,
+            browser_pool=browser_pool,
+            parse_pool=parse_pool,
+            per_page=per_page,
+        )
+    if http_cache is not None:
+        logger.debug(
+            f"HTTP cache: {http_cache.hits} hits, {http_cache.misses} misses ({http_cache.hit_rate:.0%})."
         )
-        next_pages = pagination.find_elements(By.CSS_SELECTOR, "a")
-        max_page = int(next_pages[-2].text)
-        print(f"find pagination: {time.time()-t6:.2f}s", flush=True)
-    except TimeoutException:
-        logger.debug("No pagination, single page shelf.")
-        browser.quit()
-        print(f"total: {time.time()-t0:.2f}s", flush=True)
-        return book_list
-
-    t7 = time.time()
-
-    print(f"build session + quit browser: {time.time()-t7:.2f}s", flush=True)
-    t8 = time.time()
-    read_pages = [create_read_page(url, i) for i in range(2, max_page+1)]
-    with FuturesSession(max_workers=8) as session:
-        session.headers.update({
-        "User-Agent": browser.execute_script("return navigator.userAgent;"),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-        for cookie in browser.get_cookies():
-            session.cookies.set(cookie["name"], cookie["value"])
-        browser.quit()
-        futures = [session.get(read_page) for read_page in read_pages]
-        for future in as_completed(futures):
-            response = future.result()
-            response.raise_for_status()
-            parsed = read_books_from_html(response.text)
-            book_list += parsed
-    print(f"page loop: {time.time()-t8:.2f}s", flush=True)
 
-    print(f"total: {time.time()-t0:.2f}s", flush=True)
-    return book_list
 
-def process_goodreads_url(url: str) -> List[Dict[str, str]]:
-    """Main function for the scraping.
-    Will get a url, validate it as a GR profile and, if valid, create the shelf url to then be scraped.
-    Returns the list of books in that shelf.
+def iter_shelf(
+    url: str,
+    debug: bool = False,
+    use_http: bool = True,
+    ordered: bool = False,
+    http_cache: HTTPCache | None = None,
+    browser_pool: BrowserPool | None = None,
+    parse_pool: ParsePool | None = None,
+    per_page: int | None = PER_PAGE,
+) -> Iterator[Book]:
+    """Yields the books of a valid shelf URL as soon as the page they are in is parsed.
 
     Args:
-        user_profile (str): URL to be scraped, expected to be a valid GR profile.
+        url (str): Valid URL for a user's GR shelf, or a file URI for a saved shelf.
+        debug (bool): Shows the browser if it has to be used.
+        use_http (bool): Whether to try the browserless path first.
+        ordered (bool): Yield books in shelf order instead of page completion order.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+        browser_pool (BrowserPool | None): Pool of warm browsers to use if the browser is needed.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in, reuse it across shelves.
+        per_page (int | None): Books per page to ask for, PER_PAGE by default and Goodreads' default if None.
+
+    Yields:
+        Book: A book from the shelf.
+    """
+    pages = iter_shelf_pages(
+        url,
+        debug=debug,
+        use_http=use_http,
+        ordered=ordered,
+        http_cache=http_cache,
+        browser_pool=browser_pool,
+        parse_pool=parse_pool,
+        per_page=per_page,
+    )
+    for _, books in pages:
+        yield from books
+
+
+def scrape_shelf(
+    url: str,
+    debug: bool = False,
+    use_http: bool = True,
+    http_cache: HTTPCache | None = None,
+    browser_pool: BrowserPool | None = None,
+    parse_pool: ParsePool | None = None,
+    per_page: int | None = PER_PAGE,
+) -> List[Book]:
+    """Performs the extraction of all the books from a valid shelf URL.
+    Tries plain HTTP with the saved cookies first and only starts a browser if that session is not authenticated.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf, or a file URI for a saved shelf.
+        debug (bool): Shows the browser if it has to be used.
+        use_http (bool): Whether to try the browserless path first.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+        browser_pool (BrowserPool | None): Pool of warm browsers to use if the browser is needed.
+        parse_pool (ParsePool | None): Worker processes to parse the pages in, reuse it across shelves.
+        per_page (int | None): Books per page to ask for, PER_PAGE by default and Goodreads' default if None.
+
+    Returns:
+        List[Book]: Books in the shelf.
+    """
+    return list(
+        iter_shelf(
+            url,
+            debug=debug,
+            use_http=use_http,
+            http_cache=http_cache,
+            browser_pool=browser_pool,
+            parse_pool=parse_pool,
+            per_page=per_page,
+        )
+    )
+
+
+def to_shelf_url(url: str) -> str:
+    """Validates a url as a GR profile or shelf and returns the shelf url to be scraped.
+
+    Args:
+        url (str): URL to be scraped, expected to be a valid GR profile or shelf.
 
     Raises:
-        ValueError: If it's not a valid GR profile.
+        ValueError: If it's not a valid GR profile or shelf.
 
     Returns:
-        List[Dict[str, str]]: List of dictionaries where each is a book extracted from the shelf and processed accordingly.
+        str: The shelf URL, the read shelf if the URL was a profile.
     """
     valid_profile = is_goodreads_profile(url)
     valid_shelf = is_goodreads_shelf(url)
     if not valid_profile and not valid_shelf:
         raise ValueError("Your URL was not a valid Goodreads URL to scrape.")
-    shelf_url = create_read_shelf_url(url) if not valid_shelf else url
-    user_books = scrape_shelf(shelf_url)
-    return user_books
+    return create_read_shelf_url(url) if not valid_shelf else url
 
 
+def iter_goodreads_url(
+    url: str, ordered: bool = False, http_cache: HTTPCache | None = None
+) -> Iterator[Book]:
+    """Streaming version of process_goodreads_url, yields the books as their pages arrive.
+    The URL is validated before anything is fetched.
 
+    Args:
+        url (str): URL to be scraped, expected to be a valid GR profile or shelf.
+        ordered (bool): Yield books in shelf order instead of page completion order.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+
+    Raises:
+        ValueError: If it's not a valid GR profile or shelf.
 
-def scrape_gr_author(url: str) -> tuple[str | None, str | None]:
+    Returns:
+        Iterator[Book]: The books in that shelf.
     """
-    Scrapes the author's Goodreads page and extracts the author's birthplace.
+    shelf_url = to_shelf_url(url)
+    return iter_shelf(shelf_url, ordered=ordered, http_cache=http_cache)
+
+
+def process_goodreads_url(
+    url: str,
+    with_authors: bool = False,
+    author_cache: AuthorCache | None = None,
+    http_cache: HTTPCache | None = None,
+    store: ShelfStore | None = None,
+    parse_pool: ParsePool | None = None,
+) -> List[Book]:
+    """Main function for the scraping.
+    Will get a url, validate it as a GR profile and, if valid, create the shelf url to then be scraped.
+    Returns the list of books in that shelf.
+
     Args:
-        url (str): The author's Goodreads URL, brought from the scraping of the user's page.
+        user_profile (str): URL to be scraped, expected to be a valid GR profile.
+        with_authors (bool): Also add each author's birthplace and country to the books, see enrich_with_authors.
+        author_cache (AuthorCache | None): Cache of author birthplaces to use when with_authors is set.
+        http_cache (HTTPCache | None): Cache to revalidate shelf and author pages against with conditional GETs.
+        store (ShelfStore | None): Store to save the shelf in, replacing what was stored for it.
+        parse_pool (ParsePool | None): Worker processes to parse the shelf pages in.
+
+    Raises:
+        ValueError: If it's not a valid GR profile.
+
+    Returns:
+        List[Book]: Books extracted from the shelf and processed accordingly.
+    """
+    shelf_url = to_shelf_url(url)
+    if with_authors:
+        user_books = enrich_with_authors(
+            iter_shelf_pages(shelf_url, http_cache=http_cache, parse_pool=parse_pool),
+            cache=author_cache,
+            http_cache=http_cache,
+        )
+    else:
+        user_books = scrape_shelf(shelf_url, http_cache=http_cache, parse_pool=parse_pool)
+    if store is not None:
+        store.put_shelf(shelf_url, user_books)
+    return user_books
+
+
+def parse_author_birthplace(html: bytes | str) -> str | None:
+    """Extracts the birthplace from the HTML of an author's Goodreads page.
+
+    Args:
+        html (bytes | str): Content of the author's page.
 
     Returns:
         str | None: Birthplace of the author or None if we can't find it in the authors page.
     """
-    r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-    soup = BeautifulSoup(r.content, 'html.parser')
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
     dom = etree.HTML(str(soup))
     selector = dom.xpath("//div[@class='dataTitle' and text()='Born']/following-sibling::text()")
     if len(selector) > 0:
         raw_birthplace = selector[0].strip()
-        birthplace = re.sub(r"^in\s+", "", raw_birthplace)
+        return re.sub(r"^in\s+", "", raw_birthplace)
+    return None
+
+
+def scrape_gr_author(
+    url: str, session: requests.Session | None = None, cache: AuthorCache | None = None
+) -> tuple[str | None, str | None]:
+    """
+    Scrapes the author's Goodreads page and extracts the author's birthplace.
+    Args:
+        url (str): The author's Goodreads URL, brought from the scraping of the user's page.
+        session (requests.Session | None): Session to reuse connections from, a one-off session is used if None.
+            A session from setup_session with an HTTPCache makes the request conditional.
+        cache (AuthorCache | None): Cache to look the author up in before fetching, and to store the result in.
+
+    Returns:
+        str | None: Birthplace of the author or None if we can't find it in the authors page.
+    """
+    author_id = extract_author_id(url)
+    if cache is not None:
+        cached = cache.get(author_id)
+        if cached is not None:
+            return cached
+    if session is None:
+        with setup_session(pool_size=1) as one_off_session:
+            r = one_off_session.get(url)
     else:
-        birthplace = None
-    return birthplace, cleanup_birthplace(birthplace)
+        r = session.get(url)
+    birthplace = parse_author_birthplace(r.content)
+    result = birthplace, cleanup_birthplace(birthplace)
+    if cache is not None and r.ok:
+        cache.put(author_id, *result)
+    return result
+
+
+def _parse_author_response(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+    """Response hook that parses an author page in the worker thread that fetched it."""
+    if response.ok:
+        response.birthplace = parse_author_birthplace(response.content)  # type: ignore
+
 
+def enrich_with_authors(
+    pages: Iterable[Tuple[int, List[Book]]],
+    session: requests.Session | None = None,
+    cache: AuthorCache | None = None,
+    http_cache: HTTPCache | None = None,
+) -> List[Book]:
+    """Adds the author's birthplace and country to every book of a shelf while its pages are still arriving.
+    Each unique author_id is fetched once, as soon as the first book by that author is parsed,
+    so author lookups overlap with the remaining shelf fetches instead of running after them.
+
+    Args:
+        pages (Iterable[Tuple[int, List[Book]]]): Pages of a shelf, as yielded by iter_shelf_pages.
+        session (requests.Session | None): Session to fetch author pages with, a pooled one is created if None.
+        cache (AuthorCache | None): Authors found in it are not fetched, fetched ones are stored in it.
+        http_cache (HTTPCache | None): Cache to revalidate author pages against, when the session is created here.
+
+    Returns:
+        List[Book]: Books in the shelf, each with its birthplace and country set.
+    """
+    own_session = session is None
+    author_session = setup_session(AUTHOR_WORKERS, http_cache) if session is None else session
+    book_list: List[Book] = []
+    author_futures: Dict[int, Future] = {}
+    authors: Dict[int, Tuple[str | None, str | None]] = {}
+    try:
+        with FuturesSession(session=author_session, max_workers=AUTHOR_WORKERS) as futures_session:
+            for _, books in pages:
+                new_books = {
+                    book.author_id: book
+                    for book in books
+                    if book.author_id is not None
+                    and book.author_id not in authors
+                    and book.author_id not in author_futures
+                }
+                if cache is not None and new_books:
+                    for author_id, cached in cache.get_many(new_books).items():
+                        authors[int(author_id)] = cached
+                for author_id, book in new_books.items():
+                    if author_id not in authors:
+                        author_futures[author_id] = futures_session.get(
+                            book.author_link, hooks={"response": _parse_author_response}
+                        )
+                book_list += books
+            fetched: Dict[int, Tuple[str | None, str | None]] = {}
+            for author_id, future in author_futures.items():
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    logger.debug(f"Failed to fetch author {author_id}: {e!r}")
+                    continue
+                if not response.ok:
+                    logger.debug(f"Failed to fetch author {author_id}: {response.status_code}")
+                    continue
+                birthplace = response.birthplace
+                fetched[author_id] = (birthplace, cleanup_birthplace(birthplace))
+            authors.update(fetched)
+            if cache is not None and fetched:
+                cache.put_many(fetched)
+    finally:
+        if own_session:
+            author_session.close()
+
+    for book in book_list:
+        book.birthplace, book.country = authors.get(book.author_id, (None, None))  # type: ignore[arg-type]
+    return book_list
@@ -0,0 +1,198 @@
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+import requests
+
+from goodreads_scraper import auth
+from goodreads_scraper.cache import HTTPCache
+from goodreads_scraper.throttle import FetchController
+from goodreads_scraper.utils import MAX_WORKERS, setup_session
+from logger import logger
+
+REFRESH_AHEAD = 24 * 60 * 60  # Cookies expiring within a day are refreshed before they are used.
+# Cookies younger than this are not refreshed for expiring soon, in case the login itself sets short-lived ones.
+MIN_REFRESH_INTERVAL = 60 * 60
+
+Cookies = List[Dict[str, Any]]
+
+
+class Account(NamedTuple):
+    email: str
+    password: str
+    cookie_file: Path
+
+
+def accounts_from_env() -> List[Account]:
+    """Accounts to scrape with, from the environment.
+    GR_ACCOUNTS can point to a JSON file with a list of {"email", "password", "cookie_file"} objects,
+    otherwise the single account in GR_LOGIN and GR_PASSWORD is used, with auth.COOKIE_FILE.
+
+    Returns:
+        List[Account]: Configured accounts, empty if there are none.
+    """
+    accounts_file = os.environ.get("GR_ACCOUNTS")
+    if accounts_file:
+        with open(accounts_file) as f:
+            return [
+                Account(account["email"], account["password"], Path(account["cookie_file"]))
+                for account in json.load(f)
+            ]
+    if "GR_LOGIN" in os.environ and "GR_PASSWORD" in os.environ:
+        return [Account(os.environ["GR_LOGIN"], os.environ["GR_PASSWORD"], auth.COOKIE_FILE)]
+    return []
+
+
+def account_login(account: Account) -> Cookies:
+    """Signs an account in, over HTTP or with a headless browser if that's rejected, and returns its cookies."""
+    return auth.fresh_cookies(account.email, account.password)
+
+
+def _file_version(path: Path) -> Tuple[int, int] | None:
+    """Identifies what's in a cookie file, every atomic replace makes a new file with a new inode."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class _AccountSession:
+    """Session of one account and what the manager knows of its cookies."""
+
+    def __init__(self, account: Account, session: requests.Session) -> None:
+        self.account = account
+        self.session = session
+        self.lock = threading.Lock()
+        self.expires_at: float | None = None
+        self.loaded: Tuple[int, int] | None = None  # Version of the cookie file in the session.
+        self.keep_until = 0.0  # The loaded cookies are kept until then even if expiring, see min_refresh_interval.
+        self.rejected: Tuple[int, int] | None = None  # Version of the cookie file Goodreads signed out.
+
+
+class SessionManager:
+    """Hands out authenticated sessions for one or more Goodreads accounts, round robin.
+
+    Each account has its own session and its own FetchController, so every account gets its own
+    rate limit and total throughput grows with the number of accounts.
+    Cookies are refreshed ahead of their expiry, or as soon as a page comes back signed out
+    (see invalidate). Refreshes are done under auth.cookie_file_lock and written with an atomic
+    replace, so threads and processes sharing the cookie files log each account in only once,
+    and sessions pick up cookies another process refreshed.
+    """
+
+    def __init__(
+        self,
+        accounts: Sequence[Account] | None = None,
+        login: Callable[[Account], Cookies] = account_login,
+        refresh_ahead: float = REFRESH_AHEAD,
+        min_refresh_interval: float = MIN_REFRESH_INTERVAL,
+        pool_size: int = MAX_WORKERS,
+        http_cache: HTTPCache | None = None,
+    ) -> None:
+        """
+        Args:
+            accounts (Sequence[Account] | None): Accounts to rotate through, accounts_from_env() if None.
+            login (Callable[[Account], Cookies]): Signs an account in and returns its cookies.
+            refresh_ahead (float): Seconds before expiry at which cookies are refreshed.
+            min_refresh_interval (float): Seconds cookies are kept since they were saved, even if expiring soon.
+            pool_size (int): Connections kept alive per host by each session.
+            http_cache (HTTPCache | None): Cache every session revalidates its GETs against.
+
+        Raises:
+            ValueError: If there are no accounts.
+        """
+        accounts = list(accounts if accounts is not None else accounts_from_env())
+        if not accounts:
+            raise ValueError("No Goodreads accounts configured, set GR_LOGIN and GR_PASSWORD or GR_ACCOUNTS.")
+        self.login = login
+        self.refresh_ahead = refresh_ahead
+        self.min_refresh_interval = min_refresh_interval
+        self._sessions = [
+            _AccountSession(account, setup_session(pool_size, http_cache, FetchController()))
+            for account in accounts
+        ]
+        self._by_session = {id(account_session.session): account_session for account_session in self._sessions}
+        self._next = itertools.cycle(self._sessions)
+        self._lock = threading.Lock()
+
+    def session(self) -> requests.Session:
+        """Next account's session, with cookies that are not about to expire.
+
+        Returns:
+            requests.Session: Authenticated session, shared with every other caller that got the same account.
+        """
+        with self._lock:
+            account_session = next(self._next)
+        self._ensure_fresh(account_session)
+        return account_session.session
+
+    def invalidate(self, session: requests.Session) -> None:
+        """Marks the cookies of a session as not working, after it got a signed out page.
+        The next checkout of its account logs it in again, unless another process already did.
+        """
+        account_session = self._by_session[id(session)]
+        with account_session.lock:
+            account_session.rejected = account_session.loaded
+
+    def _expiring(self, expires_at: float | None) -> bool:
+        return expires_at is not None and expires_at - time.time() < self.refresh_ahead
+
+    def _needs_refresh(self, account_session: _AccountSession) -> bool:
+        return account_session.loaded == account_session.rejected or (
+            self._expiring(account_session.expires_at) and time.time() >= account_session.keep_until
+        )
+
+    def _ensure_fresh(self, account_session: _AccountSession) -> None:
+        cookie_file = account_session.account.cookie_file
+        with account_session.lock:
+            version = _file_version(cookie_file)
+            if (
+                version is not None
+                and version == account_session.loaded
+                and not self._needs_refresh(account_session)
+            ):
+                return
+            with auth.cookie_file_lock(cookie_file):
+                # Another thread or process may have refreshed the file while we waited for the lock.
+                cookies = auth.read_cookie_file(cookie_file)
+                version = _file_version(cookie_file)
+                age = time.time() - version[1] / 1e9 if version is not None else None
+                if (
+                    not cookies
+                    or version == account_session.rejected
+                    or (
+                        self._expiring(auth.cookies_expire_at(cookies))
+                        and age is not None
+                        and age >= self.min_refresh_interval
+                    )
+                ):
+                    logger.debug(f"Refreshing the cookies of {account_session.account.email}.")
+                    cookies = self.login(account_session.account)
+                    auth.write_cookie_file(cookies, cookie_file)
+                    version = _file_version(cookie_file)
+            if version != account_session.loaded:
+                # Other threads are sending requests with the session, the jar is swapped whole
+                # so they go out with either the old cookies or the new ones, never an empty jar.
+                fresh = requests.Session()
+                auth.set_session_cookies(fresh, cookies)
+                account_session.session.cookies = fresh.cookies
+                fresh.close()
+                account_session.expires_at = auth.cookies_expire_at(cookies)
+                account_session.loaded = version
+            if version is not None:
+                account_session.keep_until = version[1] / 1e9 + self.min_refresh_interval
+
+    def close(self) -> None:
+        for account_session in self._sessions:
+            account_session.session.close()
+
+    def __enter__(self) -> "SessionManager":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
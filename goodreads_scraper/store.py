@@ -0,0 +1,183 @@
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from goodreads_scraper.book import Book
+from goodreads_scraper.cache import SQLiteCache
+from goodreads_scraper.metrics import get_metrics
+from goodreads_scraper.utils import extract_user_id, shelf_name
+from logger import logger
+
+STORE_FILE = Path("goodreads.sqlite3")
+
+AuthorRow = Tuple[int, str, str, str | None, str | None]
+BookRow = Tuple[int, str, str, str, int | None, float | None, int | None, str | None]
+EntryRow = Tuple[int, int, int, str, int | None, str | None, str | None, str | None]
+
+
+def _iso(value: date | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+class ShelfStore(SQLiteCache):
+    """On-disk store of scraped shelves, normalized into users, authors, books and shelf entries.
+    A book is stored once however many users have it, a shelf entry is one user's review of it on one shelf,
+    so a review on several shelves, like read and favorites, has an entry on each.
+    In WAL mode like the caches, so the store can be read while a crawl is writing to it.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        scraped_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS authors (
+        author_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        link TEXT NOT NULL,
+        birthplace TEXT,
+        country TEXT
+    );
+    CREATE TABLE IF NOT EXISTS books (
+        book_id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        isbn TEXT NOT NULL,
+        isbn13 TEXT NOT NULL,
+        author_id INTEGER REFERENCES authors (author_id),
+        avg_rating REAL,
+        num_pages INTEGER,
+        publishing_date TEXT
+    );
+    CREATE TABLE IF NOT EXISTS shelf_entries (
+        review_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES users (user_id),
+        book_id INTEGER NOT NULL REFERENCES books (book_id),
+        shelf TEXT NOT NULL,
+        user_rating INTEGER,
+        started_date TEXT,
+        finished_date TEXT,
+        added_date TEXT,
+        PRIMARY KEY (review_id, shelf)
+    );
+    CREATE INDEX IF NOT EXISTS books_author_id ON books (author_id);
+    CREATE INDEX IF NOT EXISTS books_isbn13 ON books (isbn13);
+    CREATE INDEX IF NOT EXISTS shelf_entries_user ON shelf_entries (user_id, shelf);
+    """
+
+    def __init__(self, path: Path | str = STORE_FILE) -> None:
+        """
+        Args:
+            path (Path | str): SQLite file to use, created if it doesn't exist.
+        """
+        super().__init__(path)
+
+    def put_shelf(self, shelf_url: str, books: Iterable[Book]) -> int:
+        """Stores the whole shelf of a user in a single transaction, replacing what was stored for it before.
+        Authors and books are upserted, with executemany, so they are shared with other users' shelves.
+        A birthplace already stored is kept when the books come without one.
+        books can be a generator, like iter_goodreads_url(url), it's consumed into compact rows
+        before the transaction starts, so the shelf never sits in memory as Book records.
+
+        Args:
+            shelf_url (str): URL of the shelf, the user and the shelf name are taken from it.
+            books (Iterable[Book]): Books in the shelf.
+
+        Returns:
+            int: Number of shelf entries stored. Books without a book or review id can't be stored and are skipped.
+        """
+        user_id = extract_user_id(shelf_url)
+        shelf = shelf_name(shelf_url)
+        authors: Dict[int, AuthorRow] = {}
+        book_rows: Dict[int, BookRow] = {}
+        entries: Dict[int, EntryRow] = {}
+        skipped = 0
+        for book in books:
+            if book.book_id is None or book.review_id is None:
+                skipped += 1
+                continue
+            if book.author_id is not None:
+                authors[book.author_id] = (
+                    book.author_id, book.author_name, book.author_link, book.birthplace, book.country
+                )
+            book_rows[book.book_id] = (
+                book.book_id,
+                book.title,
+                book.isbn,
+                book.isbn13,
+                book.author_id,
+                book.avg_rating,
+                book.num_pages,
+                _iso(book.publishing_date),
+            )
+            entries[book.review_id] = (
+                book.review_id,
+                user_id,
+                book.book_id,
+                shelf,
+                book.user_rating,
+                _iso(book.started_date),
+                _iso(book.finished_date),
+                _iso(book.added_date),
+            )
+        if skipped:
+            logger.debug(f"Skipped {skipped} books without a book or review id.")
+
+        with get_metrics().span("store"), self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO users (user_id, scraped_at) VALUES (?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET scraped_at = excluded.scraped_at",
+                (user_id, time.time()),
+            )
+            self._connection.executemany(
+                "INSERT INTO authors (author_id, name, link, birthplace, country) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (author_id) DO UPDATE SET name = excluded.name, link = excluded.link, "
+                "birthplace = coalesce(excluded.birthplace, birthplace), "
+                "country = coalesce(excluded.country, country)",
+                authors.values(),
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO books "
+                "(book_id, title, isbn, isbn13, author_id, avg_rating, num_pages, publishing_date) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                book_rows.values(),
+            )
+            self._connection.execute(
+                "DELETE FROM shelf_entries WHERE user_id = ? AND shelf = ?", (user_id, shelf)
+            )
+            self._connection.executemany(
+                "INSERT INTO shelf_entries "
+                "(review_id, user_id, book_id, shelf, user_rating, started_date, finished_date, added_date) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                entries.values(),
+            )
+        return len(entries)
+
+    def get_shelf(self, shelf_url: str) -> List[Book]:
+        """Books stored for the shelf of a user, most recently added first.
+
+        Args:
+            shelf_url (str): URL of the shelf, or of the user's profile for the read shelf.
+
+        Returns:
+            List[Book]: The stored books, empty if the shelf was never stored.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT b.title, b.book_id, b.isbn, b.isbn13, a.name AS author_name, b.author_id, "
+                "a.link AS author_link, "
+                "b.avg_rating, e.user_rating, b.num_pages, b.publishing_date, "
+                "e.started_date, e.finished_date, e.added_date, e.review_id, a.birthplace, a.country "
+                "FROM shelf_entries e JOIN books b USING (book_id) LEFT JOIN authors a USING (author_id) "
+                "WHERE e.user_id = ? AND e.shelf = ? "
+                "ORDER BY e.added_date DESC, e.review_id DESC",
+                (extract_user_id(shelf_url), shelf_name(shelf_url)),
+            )
+            names = [column[0] for column in cursor.description]
+            rows: List[Any] = cursor.fetchall()
+        return [Book.from_dict(dict(zip(names, row))) for row in rows]
+
+    def user_ids(self) -> List[int]:
+        """Users with a stored shelf, in id order."""
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT user_id FROM users ORDER BY user_id")]
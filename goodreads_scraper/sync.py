@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+from goodreads_scraper.book import Book
+from goodreads_scraper.cache import HTTPCache
+from goodreads_scraper.scrape import open_http_shelf, parse_shelf_response, scrape_shelf
+from goodreads_scraper.utils import count_shelf_pages, create_sorted_page, parse_max_page, parse_shelf_total
+from logger import logger
+
+# Fields that can change on a book that is already on the shelf.
+SYNC_FIELDS = ("user_rating", "started_date", "finished_date", "added_date")
+
+
+class ShelfDiff(NamedTuple):
+    added: List[Book]
+    removed: List[Book]
+    changed: List[Tuple[Book, Book]]  # (old, new)
+
+
+def snapshot_from_books(books: Iterable[Book]) -> Dict[int, Book]:
+    """Builds the snapshot sync_shelf compares against, the books of a shelf keyed by review id.
+
+    Args:
+        books (Iterable[Book]): Books from a previous scrape of the shelf.
+
+    Returns:
+        Dict[int, Book]: The books by review_id.
+    """
+    return {book.review_id: book for book in books if book.review_id is not None}
+
+
+def is_new(book: Book, snapshot: Mapping[int, Book]) -> bool:
+    """A book is new if it's not in the snapshot or any of its SYNC_FIELDS changed."""
+    old = snapshot.get(book.review_id)  # type: ignore[arg-type]
+    return old is None or any(getattr(old, field) != getattr(book, field) for field in SYNC_FIELDS)
+
+
+def diff_shelf(
+    snapshot: Mapping[int, Book], books: List[Book], complete: bool
+) -> ShelfDiff:
+    """Compares freshly scraped books with a snapshot of the shelf.
+
+    Args:
+        snapshot (Mapping[int, Book]): Previous books by review_id.
+        books (List[Book]): Books scraped now, newest added first if not complete.
+        complete (bool): Whether books is the whole shelf. If not, only snapshot books added after
+            the oldest scraped one can be told apart as removed, older ones were just not walked.
+
+    Returns:
+        ShelfDiff: Added, removed and changed books.
+    """
+    seen = snapshot_from_books(books)
+    added = [book for review_id, book in seen.items() if review_id not in snapshot]
+    changed = [
+        (snapshot[review_id], book)
+        for review_id, book in seen.items()
+        if review_id in snapshot and is_new(book, snapshot)
+    ]
+    missing = [book for review_id, book in snapshot.items() if review_id not in seen]
+    if complete:
+        return ShelfDiff(added, missing, changed)
+
+    oldest = min((book.added_date for book in books if book.added_date is not None), default=None)
+    removed = [
+        book
+        for book in missing
+        if oldest is not None and book.added_date is not None and book.added_date > oldest
+    ]
+    return ShelfDiff(added, removed, changed)
+
+
+def sync_shelf(
+    url: str,
+    snapshot: Mapping[int, Book],
+    full: bool = False,
+    http_cache: HTTPCache | None = None,
+) -> ShelfDiff:
+    """Incremental version of scrape_shelf, returns what changed since the snapshot instead of every book.
+    The shelf is walked sorted by date added, newest first, and paging stops at the first page
+    that has no new or changed book, so a daily refresh usually costs one or two page fetches.
+
+    Books re-rated or removed deep in the shelf are only seen with full, which walks every page.
+    Without saved cookies it falls back to a full scrape through the browser.
+
+    Args:
+        url (str): Valid URL for a user's GR shelf.
+        snapshot (Mapping[int, Book]): Books from the last scrape, see snapshot_from_books.
+        full (bool): Walk the whole shelf, for a complete diff.
+        http_cache (HTTPCache | None): Cache to revalidate the pages against with conditional GETs.
+
+    Returns:
+        ShelfDiff: Added, removed and changed books.
+    """
+    opened = open_http_shelf(create_sorted_page(url, 1), http_cache=http_cache)
+    if opened is None:
+        logger.debug("Falling back to a full scrape with the browser.")
+        return diff_shelf(snapshot, scrape_shelf(url, use_http=False), complete=True)
+
+    session, first_page = opened
+    with session:
+        page_books = parse_shelf_response(first_page)
+        books = list(page_books)
+        max_page = count_shelf_pages(first_page.text, len(page_books))
+        # Without the total or a pagination, as on some infinite-scroll pages, max_page is only a guess
+        # and the walk can't claim to have seen the whole shelf.
+        pages_known = parse_shelf_total(first_page.text) is not None or parse_max_page(first_page.text) > 1
+        page = 1
+        while page < max_page and (full or any(is_new(book, snapshot) for book in page_books)):
+            page += 1
+            response = session.get(create_sorted_page(url, page))
+            response.raise_for_status()
+            page_books = parse_shelf_response(response)
+            books += page_books
+    logger.debug(f"Synced {page} of {max_page} pages.")
+    return diff_shelf(snapshot, books, complete=pages_known and page >= max_page)
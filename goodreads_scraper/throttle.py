@@ -0,0 +1,299 @@
+import functools
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from goodreads_scraper.metrics import get_metrics
+from logger import logger
+
+INITIAL_CONCURRENCY = 8
+MAX_CONCURRENCY = 32
+REQUESTS_PER_SECOND = 20.0  # Sustained rate per host, bursts up to BURST requests go through at once.
+BURST = 40
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+LATENCY_TARGET = 2.0  # Responses slower than this stop the concurrency from growing.
+MAX_ERROR_RATE = 0.1
+THROTTLED_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+RETRY_METHODS = {"GET", "HEAD"}  # Sending these twice does no harm, a sign-in POST is only sent once.
+ASYNC_POLL_INTERVAL = 0.01
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Reads a Retry-After header, given either as seconds or as an HTTP date.
+
+    Args:
+        value (str | None): Value of the header, if the response had it.
+
+    Returns:
+        float | None: Seconds to wait, None if there is no valid header.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class TokenBucket:
+    """Token bucket that lets callers take a token on credit and tells them how long to wait for it.
+    Reserving instead of blocking works for threads and coroutines alike.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (int): Tokens the bucket holds at most.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token.
+
+        Returns:
+            float: Seconds to wait before using it, 0 if it was available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """Empties the bucket so no token is available for the given time, as asked by a Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = now
+
+
+class HostLimiter:
+    """Requests to a single host: a token bucket for the rate and an AIMD limit for the concurrency.
+    The limit grows by one for every `limit` healthy responses, so about one per round trip,
+    and is halved when the host throttles us or starts failing.
+    """
+
+    def __init__(
+        self,
+        rate: float = REQUESTS_PER_SECOND,
+        burst: int = BURST,
+        initial_concurrency: int = INITIAL_CONCURRENCY,
+        max_concurrency: int = MAX_CONCURRENCY,
+        latency_target: float = LATENCY_TARGET,
+    ) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        """Takes a concurrency slot if one is free, without waiting."""
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        """Waits for a concurrency slot and then for a token."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        time.sleep(self.bucket.reserve())
+
+    async def acquire_async(self) -> None:
+        """Same as acquire, without blocking the event loop."""
+        import asyncio  # Only the async engine gets here, the threaded one doesn't pay for the import.
+
+        while not self.try_acquire():
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+        try:
+            await asyncio.sleep(self.bucket.reserve())
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+    def cancel(self) -> None:
+        """Frees the slot of a request that was abandoned, without counting it as an outcome."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def release(self, latency: float, throttled: bool = False, failed: bool = False) -> None:
+        """Frees the slot and adjusts the concurrency limit with the outcome of the request.
+
+        Args:
+            latency (float): Seconds the request took.
+            throttled (bool): The host answered 429 or 503.
+            failed (bool): The request failed for any other reason.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self.latency = 0.8 * self.latency + 0.2 * latency if self.latency else latency
+            self.error_rate = 0.9 * self.error_rate + 0.1 * (throttled or failed)
+            if throttled or self.error_rate > MAX_ERROR_RATE:
+                self._decrease()
+            elif not failed and self.latency <= self.latency_target:
+                self.limit = min(self.limit + 1 / self.limit, self.max_concurrency)
+            self._condition.notify_all()
+
+    def _decrease(self) -> None:
+        # Requests already in flight when the host pushed back fail together, only halve once for them.
+        now = time.monotonic()
+        if now - self._last_decrease < max(self.latency, 0.1):
+            return
+        self._last_decrease = now
+        self.limit = max(self.limit / 2, 1.0)
+        logger.debug(f"Host pushed back, concurrency limit down to {int(self.limit)}.")
+
+
+class FetchController:
+    """Decides when each request to Goodreads goes out and whether it is retried.
+    Every host gets its own HostLimiter, retries back off exponentially with full jitter
+    and wait at least as long as the Retry-After the host sent, during which no other request
+    goes to that host either.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_cap: float = BACKOFF_CAP,
+        **limiter_options: Any,
+    ) -> None:
+        """
+        Args:
+            max_retries (int): Retries after the first attempt before giving up.
+            backoff_base (float): Seconds the first retry waits at most.
+            backoff_cap (float): Seconds a retry waits at most.
+            **limiter_options (Any): Passed to the HostLimiter of every host.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._limiter_options = limiter_options
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostLimiter:
+        """HostLimiter for the host of a URL, created on first use."""
+        netloc = urlparse(url).netloc
+        with self._lock:
+            if netloc not in self._hosts:
+                self._hosts[netloc] = HostLimiter(**self._limiter_options)
+            return self._hosts[netloc]
+
+    def retry_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before retrying.
+
+        Args:
+            attempt (int): Attempts made so far, starting at 0.
+            retry_after (str | None): Retry-After header of the failed response.
+
+        Returns:
+            float: Jittered exponential backoff, at least the Retry-After.
+        """
+        backoff = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2**attempt))
+        return max(backoff, parse_retry_after(retry_after) or 0.0)
+
+    def fetch(self, url: str, send: Callable[[], requests.Response], retry: bool = True) -> requests.Response:
+        """Sends a request through the limiter of its host, retrying it while it can.
+
+        Args:
+            url (str): URL being requested.
+            send (Callable[[], requests.Response]): Makes one attempt of the request.
+            retry (bool): Whether the request can be sent again, False sends it once.
+
+        Raises:
+            requests.ConnectionError: If the last attempt could not connect.
+            requests.Timeout: If the last attempt timed out.
+
+        Returns:
+            requests.Response: The first response that is not retried, or the last one.
+        """
+        limiter = self.host(url)
+        max_retries = self.max_retries if retry else 0
+        attempt = 0
+        while True:
+            limiter.acquire()
+            t0 = time.monotonic()
+            try:
+                response = send()
+            except RETRY_EXCEPTIONS:
+                limiter.release(time.monotonic() - t0, failed=True)
+                get_metrics().count("fetch_errors")
+                if attempt >= max_retries:
+                    raise
+                delay = self.retry_delay(attempt)
+                logger.debug(f"Connection to {url} failed, retrying in {delay:.1f}s.")
+            except BaseException:
+                # Failed in a way retrying won't fix, or interrupted, the slot is freed either way.
+                limiter.cancel()
+                raise
+            else:
+                status = response.status_code
+                get_metrics().observe("request_seconds", time.monotonic() - t0)
+                limiter.release(
+                    time.monotonic() - t0,
+                    throttled=status in THROTTLED_STATUSES,
+                    failed=status >= 500,
+                )
+                if status not in RETRY_STATUSES or attempt >= max_retries:
+                    return response
+                delay = self.retry_delay(attempt, response.headers.get("Retry-After"))
+                if status in THROTTLED_STATUSES:
+                    limiter.bucket.pause(delay)
+                logger.debug(f"{url} answered {status}, retrying in {delay:.1f}s.")
+                response.raw.drain_conn()
+                response.raw.release_conn()
+            get_metrics().count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+
+@functools.lru_cache(maxsize=None)
+def default_controller() -> FetchController:
+    """The FetchController shared by every session of the process, so limits hold across scrapes."""
+    return FetchController()
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """Transport adapter that sends every request through a FetchController.
+    Mount it on a session (see setup_session) and every fetch made with it is rate limited,
+    and retried if its method is in RETRY_METHODS.
+    """
+
+    def __init__(self, controller: FetchController | None = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.controller = controller if controller is not None else default_controller()
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        send_once = super().send
+        return self.controller.fetch(
+            request.url or "", lambda: send_once(request, **kwargs), retry=request.method in RETRY_METHODS
+        )
@@ -1,27 +1,66 @@
-from validators import url as url_validator
-from selenium.webdriver.chrome.webdriver import WebDriver
+# Selenium, chromedriver_autoinstaller, BeautifulSoup and validators are imported where they are used,
+# so the HTTP path doesn't pay for them. Annotations are not evaluated, WebDriver types are only for type checkers.
+from __future__ import annotations
+
 import re
-from selenium.webdriver.common.by import By
-from urllib.parse import urlparse, urlunparse, ParseResult
-from typing import Dict, Tuple, List, Any
-from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium import webdriver
-import chromedriver_autoinstaller
+from urllib.parse import urlparse, urlunparse, ParseResult, parse_qsl, urlencode
+import math
+from typing import TYPE_CHECKING, Dict, Iterator, List, Any
 import os
-from bs4 import BeautifulSoup
+import functools
+import requests
+from requests.adapters import HTTPAdapter
+from goodreads_scraper.book import (
+    STARS_ENUM,
+    Book,
+    books_from_columns,
+    parse_num_pages,
+)
+from goodreads_scraper.cache import CachingAdapter, HTTPCache
+from goodreads_scraper.throttle import MAX_CONCURRENCY, FetchController, ThrottledAdapter
+import lxml.html  # type: ignore
+from lxml import etree  # type: ignore
+
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
+    from selenium.webdriver.remote.webelement import WebElement
 
 # and if it doesn't exist, download it automatically,
 # then add chromedriver to path
-STARS_ENUM = {
-    "did not like it": 1,
-    "it was ok": 2,
-    "liked it": 3,
-    "really liked it": 4,
-    "it was amazing": 5,
+_REVIEW_ID = re.compile(r"review_(\d+)")
+_BOOK_ID = re.compile(r"/book/show/(\d+)")
+_USER_ID = re.compile(r"/(?:user/show|review/list)/(\d+)")
+_SHELF_COUNT = re.compile(r"\((\d+)\)$")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
 }
+MAX_WORKERS = MAX_CONCURRENCY  # Fetch threads, the FetchController decides how many are busy at once.
+PER_PAGE = 100  # Largest page size the shelf list view accepts.
+DEFAULT_SHELF = "read"
+# Requests lean browsers never make: covers and other images, fonts, media, and the ad and tracker scripts
+# that keep a page loading long after the shelf is in the DOM. Patterns for CDP's Network.setBlockedURLs.
+BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*", "*google-analytics.com*",
+    "*amazon-adsystem.com*", "*scorecardresearch.com*", "*quantserve.com*", "*facebook.net*",
+    "*moatads.com*", "*adsafeprotected.com*",
+]
+# Scripts are still loaded, the infinite scroll and the login modal need them.
+SHELF_READY_SCRIPT = (
+    'return document.querySelector("tr.bookalike, #infiniteStatus") !== null'
+    ' || document.readyState == "complete"'
+)
+FETCH_PAGES_TIMEOUT = 120  # Seconds iter_books_from_pages waits for each batch of pages.
+# Pages read per script call. Only one batch is ever held by the page or sent back by WebDriver,
+# so memory stays flat and responses stay small however big the shelf is.
+FETCH_PAGES_BATCH = 10
+AUTHOR_WORKERS = 4
 
 
 def load_js_file(file_name: str) -> str:
@@ -40,6 +79,8 @@ def is_valid_goodreads_url(url: str) -> bool:
     Returns:
         bool: True if it's a valid GR URL, False otherwise.
     """
+    from validators import url as url_validator
+
     if url_validator(url) and re.match(
         pattern=r"https?://www\.goodreads\.com/.*", string=url, flags=re.IGNORECASE
     ):
@@ -95,28 +136,60 @@ def create_read_shelf_url(profile_url: str) -> str:
     return read_shelf_url
 
 
-def create_read_page(shelf_url: str, page_num: int) -> str:
-    """From a user's GR shelf URL, create a URL for the read shelf page.
+def shelf_name(shelf_url: str) -> str:
+    """Name of the shelf a shelf URL lists, "read" if the URL doesn't say."""
+    return dict(parse_qsl(urlparse(shelf_url).query)).get("shelf", DEFAULT_SHELF)
+
+
+def create_read_page(shelf_url: str, page_num: int, per_page: int | None = None) -> str:
+    """From a user's GR shelf URL, create a URL for one page of that shelf.
+    The shelf and the other parameters of the URL, like its sort, are kept. URLs without a shelf get the read one.
 
     Args:
         shelf_url (str): Valid URL for a user's GR shelf.
-        page_num (int): _description_
+        page_num (int): Page to get.
+        per_page (int | None): Books per page, Goodreads' default if None.
 
     Returns:
         str: URL for that specific GR shelf page.
     """
-    parsed_url = urlparse(shelf_url)
-    page_url = urlunparse(
-        ParseResult(
-            scheme=parsed_url.scheme,  # Https
-            netloc=parsed_url.netloc,  # The goodreads site
-            path=parsed_url.path,  # The review list for that user
-            params="",
-            query=f"page={page_num}&shelf=read",
-            fragment="",
-        )
-    )
-    return page_url
+    return set_query_params(shelf_url, shelf=shelf_name(shelf_url), page=page_num, per_page=per_page)
+
+
+def set_query_params(url: str, **params: Any) -> str:
+    """Sets parameters in the query of a URL, keeping the ones already there.
+
+    Args:
+        url (str): Any URL.
+        **params (Any): Parameters to add or replace, a None value leaves the URL as is.
+
+    Returns:
+        str: The URL with the new query.
+    """
+    params = {key: value for key, value in params.items() if value is not None}
+    if not params:
+        return url
+    parsed_url = urlparse(url)
+    query = dict(parse_qsl(parsed_url.query, keep_blank_values=True))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunparse(parsed_url._replace(query=urlencode(query)))
+
+
+def create_sorted_page(
+    shelf_url: str, page_num: int, sort: str = "date_added", order: str = "d"
+) -> str:
+    """Same as create_read_page, but asks Goodreads to sort the shelf.
+
+    Args:
+        shelf_url (str): Valid URL for a user's GR shelf.
+        page_num (int): Page to get.
+        sort (str): Column to sort by, as in the shelf's sort links.
+        order (str): "d" for descending, "a" for ascending.
+
+    Returns:
+        str: URL for that specific GR shelf page, sorted.
+    """
+    return set_query_params(create_read_page(shelf_url, page_num), sort=sort, order=order)
 
 
 def extract_hidden_td(
@@ -135,6 +208,8 @@ def extract_hidden_td(
     Returns:
         str: The extracted value for that desired field.
     """
+    from selenium.webdriver.common.by import By
+
     hidden_td_element = element.find_element(By.CSS_SELECTOR, css_selector)
     hidden_td_value = browser.execute_script(
         "return arguments[0].textContent.trim();", hidden_td_element
@@ -156,6 +231,24 @@ def extract_author_id(author_url: str) -> str:
     return author_id
 
 
+def extract_user_id(url: str) -> int:
+    """Extracts the user ID from a GR profile or shelf URL.
+
+    Args:
+        url (str): URL of a user's profile or shelf in Goodreads.
+
+    Raises:
+        ValueError: If there's no user ID in the URL.
+
+    Returns:
+        int: ID to uniquely identify the user in GR.
+    """
+    match = _USER_ID.search(urlparse(url).path)
+    if match is None:
+        raise ValueError(f"No Goodreads user in {url}.")
+    return int(match.group(1))
+
+
 def extract_num_pages(page_string: str) -> int | None:
     """Parses the webelement with the number of pages in a book into an actual number.
 
@@ -172,8 +265,8 @@ def extract_num_pages(page_string: str) -> int | None:
     return None
 
 
-def process_book(browser: WebDriver, book: WebElement) -> Dict[str, Any]:
-    """Given a web element from the Goodreads' user's shelf, scrapes the book information and returns a dict.
+def process_book(browser: WebDriver, book: WebElement) -> Book:
+    """Given a web element from the Goodreads' user's shelf, scrapes the book information and returns a Book.
 
 
     Args:
@@ -181,11 +274,15 @@ def process_book(browser: WebDriver, book: WebElement) -> Dict[str, Any]:
         element (WebElement): The actual book element which contains the fields with info.
 
     Returns:
-        Dict[str, any]: Dictionary with that book's fields of interest.
+        Book: That book's fields of interest.
     """
+    from selenium.webdriver.common.by import By
+
     isbn = extract_hidden_td(browser, book, "td.field.isbn div.value")
     isbn13 = extract_hidden_td(browser, book, "td.field.isbn13 div.value")
     title = book.find_element(By.CSS_SELECTOR, "td.field.title").text
+    title_links = book.find_elements(By.CSS_SELECTOR, "td.field.title div.value a")
+    book_match = _BOOK_ID.search(title_links[0].get_attribute("href") or "") if title_links else None
     author_info = book.find_element(By.CSS_SELECTOR, "td.field.author div.value a")
     author_name = (
         author_info.text
@@ -196,16 +293,18 @@ def process_book(browser: WebDriver, book: WebElement) -> Dict[str, Any]:
     avg_rating = float(
         extract_hidden_td(browser, book, "td.field.avg_rating > div.value")
     )
-    user_stars = book.find_element(By.CSS_SELECTOR, "td.field.rating").text
-    user_rating = STARS_ENUM.get(user_stars, None)
+    user_stars = book.find_elements(By.CSS_SELECTOR, "td.field.rating .staticStars")
+    user_rating = STARS_ENUM.get(user_stars[0].get_attribute("title") or "") if user_stars else None
     pages_string = extract_hidden_td(browser, book, "td.field.num_pages")
-    num_pages = extract_num_pages(pages_string)
+    num_pages = parse_num_pages(pages_string)
     publishing_date = extract_hidden_td(browser, book, "td.field.date_pub > div.value")
     started_date = extract_hidden_td(browser, book, "td.field.date_started > div.value")
     finished_date = extract_hidden_td(browser, book, "td.field.date_read > div.value")
     added_date = extract_hidden_td(browser, book, "td.field.date_added > div.value")
-    book_dict = {
+    review_match = _REVIEW_ID.search(book.get_attribute("id") or "")
+    book_dict: Dict[str, Any] = {
         "title": title,
+        "book_id": int(book_match.group(1)) if book_match else None,
         "isbn": isbn,
         "isbn13": isbn13,
         "author_name": author_name,
@@ -218,37 +317,40 @@ def process_book(browser: WebDriver, book: WebElement) -> Dict[str, Any]:
         "started_date": started_date,
         "finished_date": finished_date,
         "added_date": added_date,
+        "review_id": int(review_match.group(1)) if review_match else None,
     }
-    return book_dict
+    return Book.from_dict(book_dict)
 
 
-def parse_infinite_status(infinite_status: WebElement) -> Tuple[int, int]:
-    """Every shelf, when opened in the default mode, loads only a few books but has infinite scrolling enabled.
-    There is a WebElement inside that page that gives the status of how many books are loaded, as in 30 of 321 loaded.
-    This function serves to parse this in order to facilitate scrolling until the shelf is fully loaded.
-
-
-    Args:
-        infinite_status (WebElement): WebElement with the infinite status text.
+@functools.lru_cache(maxsize=None)
+def install_chromedriver() -> str | None:
+    """Checks if the current version of chromedriver exists and downloads it if it doesn't.
+    Only runs once per process, it takes a while and the answer does not change.
 
     Returns:
-        Tuple[int, int]: Number of books currently loaded, number of total books in that shelf.
+        str | None: Path to chromedriver.
     """
-    infinite_status_text = infinite_status.text.split(" ")
-    remaining_books = int(infinite_status_text[2])
-    current_books = int(infinite_status_text[0])
-    return current_books, remaining_books
+    import chromedriver_autoinstaller
+
+    return chromedriver_autoinstaller.install(no_ssl=False)
 
 
-def setup_browser(debug: bool = False) -> WebDriver:
+def setup_browser(debug: bool = False, lean: bool = True) -> WebDriver:
     """Handles setup of the browser. For now, it's a Chrome Browser.
     TODO: Perhaps this could be dynamical?
 
+    Args:
+        debug (bool): Shows the browser.
+        lean (bool): Blocks the BLOCKED_URLS, and returns from get as soon as the HTML is parsed (the "eager"
+            page load strategy) instead of once every resource loaded. Use page_wait to wait for the shelf.
+
     Returns:
         WebDriver: Headless browser to be used for scraping.
     """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
 
-    chromedriver_autoinstaller.install(no_ssl=False)  # Check if the current version of chromedriver exists
+    install_chromedriver()
     chrome_options = Options()
     if not debug:
         chrome_options.add_argument("--headless")
@@ -257,43 +359,111 @@ def setup_browser(debug: bool = False) -> WebDriver:
     chrome_options.add_argument(
         "--user-agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36'"
     )
+    if lean:
+        chrome_options.page_load_strategy = "eager"
+        # Images are also turned off in the renderer, so it doesn't decode or lay out the covers.
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
 
     browser = webdriver.Chrome(options=chrome_options)
+    if lean:
+        browser.execute_cdp_cmd("Network.enable", {})
+        browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
     return browser
 
 
-def read_books(browser: WebDriver):
+def setup_session(
+    pool_size: int = MAX_WORKERS,
+    http_cache: HTTPCache | None = None,
+    controller: FetchController | None = None,
+) -> requests.Session:
+    """Handles setup of a plain HTTP session, the browserless counterpart of setup_browser.
+    The connection pool is sized to the number of concurrent page fetches so connections get reused.
+    Every request goes through a FetchController, which rate limits it and retries it when Goodreads pushes back.
+
+    Args:
+        pool_size (int): Maximum number of connections kept alive per host.
+        http_cache (HTTPCache | None): If given, every GET is revalidated against it with a conditional request.
+        controller (FetchController | None): Controller to send requests through, the one shared by the process if None.
+
+    Returns:
+        requests.Session: Session with browser-like headers to be used for scraping.
+    """
+    session = requests.Session()
+    adapter: HTTPAdapter
+    if http_cache is None:
+        adapter = ThrottledAdapter(controller, pool_connections=pool_size, pool_maxsize=pool_size)
+    else:
+        adapter = CachingAdapter(
+            http_cache, controller=controller, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def read_books(browser: WebDriver) -> List[Book]:
+    from selenium.webdriver.common.by import By
+
     books = browser.find_elements(By.CLASS_NAME, "bookalike")
     book_list = [process_book(browser, book) for book in books]
     return book_list
 
 
-def read_books_fast(browser: WebDriver) -> List[Dict[str, Any]]:
+def read_books_fast(browser: WebDriver) -> List[Book]:
     """Faster version of reading books, invokes a JS script to directly interact with all books at once via Selenium.
 
     Args:
         browser (WebDriver): Browser being used to scrape.
 
     Returns:
-        List[Dict[str any]]: List of books and their attributes.
+        List[Book]: List of books and their attributes.
     """
-    js_code = load_js_file("read_books.js")
+    js_code = load_js_file("read_books.js") + "return extractBooks(document);"
     # Execute the script and get all book data in one call
-    books_data = browser.execute_script(js_code)
+    columns = browser.execute_script(js_code)
+    # The script returns one array per field with ratings, pages and ids already parsed, and ISO dates.
+    return books_from_columns(columns)
+
 
-    # Process data further if necessary (e.g., mapping 'user_rating' to your STARS_ENUM)
-    for book_data in books_data:
-        # Example of converting 'user_rating' based on STARS_ENUM
-        # This assumes STARS_ENUM is a dict in your Python code mapping the text to a value
-        book_data["user_rating"] = STARS_ENUM.get(book_data["user_rating"], None)
+def iter_books_from_pages(
+    browser: WebDriver, urls: List[str], concurrency: int = MAX_WORKERS, batch_size: int = FETCH_PAGES_BATCH
+) -> Iterator[List[Book]]:
+    """Fetches shelf pages from inside the browser's page and reads their books, a batch of pages per async script.
+    The pages of a batch are fetched in parallel with the page's own cookies and parsed with DOMParser,
+    so a shelf is read a batch at a time instead of being scrolled through. The parsed pages are dropped
+    once their books are read, and each batch leaves the browser before the next one is fetched,
+    so neither the page nor a single WebDriver response ever holds the whole shelf.
 
-        # Process other fields if necessary
+    Args:
+        browser (WebDriver): Browser on a signed in Goodreads page.
+        urls (List[str]): Shelf pages to read, on the same site as the current page.
+        concurrency (int): Pages fetched at the same time, at most batch_size.
+        batch_size (int): Pages read per script call.
 
-    return books_data
+    Raises:
+        RuntimeError: If any of the pages could not be fetched, the pages of the batches before it were yielded.
+
+    Yields:
+        List[Book]: Books of each page, in the order of the urls.
+    """
+    js_code = (
+        load_js_file("read_books.js")
+        + load_js_file("fetch_pages.js")
+        + "fetchShelfPages(arguments[0], arguments[1], arguments[arguments.length - 1]);"
+    )
+    browser.set_script_timeout(FETCH_PAGES_TIMEOUT)
+    for start in range(0, len(urls), batch_size):
+        result = browser.execute_async_script(js_code, urls[start : start + batch_size], concurrency)
+        if "error" in result:
+            raise RuntimeError(f"Failed to fetch the shelf pages in the browser: {result['error']}")
+        for columns in result["pages"]:
+            yield books_from_columns(columns)
 
 
 def page_wait(browser: WebDriver) -> WebElement:
-    """Waits for the Goodreads page to load and clicks the popup so it disappears.
+    """Waits for the books of a Goodreads shelf page to be in the DOM and clicks the popup so it disappears.
 
     Args:
         browser (WebDriver): Browser used for scraping.
@@ -301,10 +471,14 @@ def page_wait(browser: WebDriver) -> WebElement:
     Returns:
         WebElement: Body of the webpage.
     """
-    # Wait for initial load
-    WebDriverWait(browser, 30).until(
-        lambda d: d.execute_script("return document.readyState") == "complete"
-    )
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    # Wait for the shelf to be in the DOM, not for every cover and script to load.
+    # Pages without a shelf, like an empty one, are waited for until they're completely loaded.
+    WebDriverWait(browser, 30).until(lambda d: d.execute_script(SHELF_READY_SCRIPT))
     body = WebDriverWait(browser, 10).until(
         EC.presence_of_element_located((By.TAG_NAME, "body"))
     )
@@ -347,7 +521,18 @@ def is_goodreads_shelf(url: str) -> bool:
     return bool(re.match(pattern, url)) and is_valid_goodreads_url(url)
 
 
-def read_books_from_html(html: str) -> List[Dict[str, Any]]:
+def read_books_from_soup(html: str) -> List[Book]:
+    """Parses the books of a shelf page with BeautifulSoup's html.parser.
+    Slower than read_books_from_lxml, kept as a pure Python fallback.
+
+    Args:
+        html (str): HTML of a shelf page.
+
+    Returns:
+        List[Book]: List of books and their attributes.
+    """
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     books = []
     for book in soup.select("tr.bookalike"):
@@ -365,6 +550,9 @@ def read_books_from_html(html: str) -> List[Dict[str, Any]]:
             if title_el
             else ""
         )
+        title_link = book.select_one("td.field.title div.value a")
+        book_match = _BOOK_ID.search(title_link.get("href", "")) if title_link else None
+        data["book_id"] = int(book_match.group(1)) if book_match else None
 
         author = book.select_one("td.field.author div.value a")
         data["author_name"] = author.get_text(strip=True) if author else ""
@@ -375,10 +563,10 @@ def read_books_from_html(html: str) -> List[Dict[str, Any]]:
         avg = field_text("td.field.avg_rating div.value")
         data["avg_rating"] = float(avg) if avg else None
 
-        data["user_rating"] = field_text("td.field.rating")
+        stars = book.select_one("td.field.rating .staticStars")
+        data["user_rating"] = stars.get("title", "") if stars else ""
 
-        pages = field_text("td.field.num_pages div.value")
-        data["num_pages"] = int(pages.replace(",", "")) if pages.isdigit() else None
+        data["num_pages"] = field_text("td.field.num_pages div.value")
 
         data["publishing_date"] = field_text("td.field.date_pub div.value")
         data["started_date"] = field_text("td.field.date_started div.value")
@@ -388,6 +576,206 @@ def read_books_from_html(html: str) -> List[Dict[str, Any]]:
         match = re.search(r"/author/show/(\d+)", data["author_link"])
         data["author_id"] = int(match.group(1)) if match else None
 
-        books.append(data)
+        review_match = _REVIEW_ID.search(book.get("id", ""))
+        data["review_id"] = int(review_match.group(1)) if review_match else None
+
+        books.append(Book.from_dict(data))
+
+    return books
+
+
+def _has_class(*classes: str) -> str:
+    """Builds the XPath predicate equivalent to a chain of CSS class selectors."""
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes
+    )
+
+
+_BOOK_ROWS = etree.XPath(f"//tr[{_has_class('bookalike')}]")
+_ROW_FIELDS = etree.XPath(f"td[{_has_class('field')}]")
+_FIELD_VALUE = etree.XPath(f"descendant::div[{_has_class('value')}]")
+_VALUE_LINK = etree.XPath(f"descendant::div[{_has_class('value')}]//a")
+_STATIC_STARS = etree.XPath(f"descendant::span[{_has_class('staticStars')}]/@title")
+_PAGINATION_LINKS = etree.XPath("//*[@id='reviewPagination']//a")
+_INFINITE_STATUS = etree.XPath("//*[@id='infiniteStatus']")
+_USER_SHELF_LINKS = etree.XPath(
+    f"//*[@id='paginatedShelfList']//div[{_has_class('userShelf')}]/a[not({_has_class('multiLink')})]"
+)
+_AUTHOR_ID = re.compile(r"/author/show/(\d+)")
+_TITLE_SPACES = re.compile(r"^title\s+|\s\s+")
+
+
+def _element_text(element: Any, separator: str = "") -> str:
+    """Same as BeautifulSoup's get_text(separator, strip=True) for an lxml element."""
+    return separator.join(
+        text.strip() for text in element.itertext() if text.strip()
+    )
+
+
+def read_books_from_lxml(html: str) -> List[Book]:
+    """Parses the books of a shelf page with lxml, returning exactly the same books as read_books_from_soup.
+    Each row is walked once to index its td.field cells by field name, instead of one CSS query per field.
+
+    Args:
+        html (str): HTML of a shelf page.
+
+    Returns:
+        List[Book]: List of books and their attributes.
+    """
+    dom = lxml.html.fromstring(html)
+    books = []
+    for book in _BOOK_ROWS(dom):
+        fields: Dict[str, Any] = {}
+        for td in _ROW_FIELDS(book):
+            for name in td.get("class").split():
+                fields.setdefault(name, td)
+
+        def field_text(name: str) -> str:
+            td = fields.get(name)
+            if td is None:
+                return ""
+            value = _FIELD_VALUE(td)
+            return _element_text(value[0]) if value else ""
+
+        data: Dict[str, Any] = {}
+        data["isbn"] = field_text("isbn")
+        data["isbn13"] = field_text("isbn13")
+        title_el = fields.get("title")
+        data["title"] = (
+            _TITLE_SPACES.sub(" ", _element_text(title_el, " ")).strip()
+            if title_el is not None
+            else ""
+        )
+        title_links = _VALUE_LINK(title_el) if title_el is not None else []
+        book_match = _BOOK_ID.search(title_links[0].get("href", "")) if title_links else None
+        data["book_id"] = int(book_match.group(1)) if book_match else None
+
+        author_el = fields.get("author")
+        author_links = _VALUE_LINK(author_el) if author_el is not None else []
+        author = author_links[0] if author_links else None
+        data["author_name"] = _element_text(author) if author is not None else ""
+        data["author_link"] = (
+            "https://www.goodreads.com" + author.attrib["href"]
+            if author is not None
+            else ""
+        )
+
+        avg = field_text("avg_rating")
+        data["avg_rating"] = float(avg) if avg else None
+
+        rating_el = fields.get("rating")
+        stars = _STATIC_STARS(rating_el) if rating_el is not None else []
+        data["user_rating"] = stars[0] if stars else ""
+
+        data["num_pages"] = field_text("num_pages")
+
+        data["publishing_date"] = field_text("date_pub")
+        data["started_date"] = field_text("date_started")
+        data["finished_date"] = field_text("date_read")
+        data["added_date"] = field_text("date_added")
+
+        match = _AUTHOR_ID.search(data["author_link"])
+        data["author_id"] = int(match.group(1)) if match else None
+
+        review_match = _REVIEW_ID.search(book.get("id", ""))
+        data["review_id"] = int(review_match.group(1)) if review_match else None
+
+        books.append(Book.from_dict(data))
+
+    return books
+
+
+HTML_PARSERS = {
+    "lxml": read_books_from_lxml,
+    "html.parser": read_books_from_soup,
+}
+
 
-    return books
\ No newline at end of file
+def read_books_from_html(html: str, parser: str = "lxml") -> List[Book]:
+    """Parses the books of a shelf page fetched over HTTP.
+
+    Args:
+        html (str): HTML of a shelf page.
+        parser (str): Backend to use, one of HTML_PARSERS. Both return the same books.
+
+    Raises:
+        ValueError: If the parser is unknown.
+
+    Returns:
+        List[Book]: List of books and their attributes.
+    """
+    if parser not in HTML_PARSERS:
+        raise ValueError(f"Unknown parser {parser}, use one of {list(HTML_PARSERS)}.")
+    return HTML_PARSERS[parser](html)
+
+
+def parse_max_page(html: str) -> int:
+    """Reads the number of pages of a shelf from its #reviewPagination element.
+    The last link of the pagination is "next", so the one before it is the last page.
+
+    Args:
+        html (str): HTML of any page of the shelf.
+
+    Returns:
+        int: Number of pages in the shelf, 1 if there is no pagination.
+    """
+    next_pages = _PAGINATION_LINKS(lxml.html.fromstring(html))
+    if len(next_pages) < 2:
+        return 1
+    return int(_element_text(next_pages[-2]))
+
+
+def parse_shelf_total(html: str) -> int | None:
+    """Reads the total number of books in the shelf from the "30 of 321 loaded" status, if the page has it.
+
+    Args:
+        html (str): HTML of any page of the shelf.
+
+    Returns:
+        int | None: Number of books in the shelf, None if the page doesn't say.
+    """
+    status = _INFINITE_STATUS(lxml.html.fromstring(html))
+    if not status:
+        return None
+    parts = _element_text(status[0], " ").split(" ")
+    if len(parts) < 3 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def parse_user_shelves(html: str) -> Dict[str, int | None]:
+    """Reads the shelves of a user from the Bookshelves list next to any of their shelves.
+
+    Args:
+        html (str): HTML of a page of one of the user's shelves.
+
+    Returns:
+        Dict[str, int | None]: Number of books in each shelf, by shelf name in the order Goodreads lists them.
+            None if the list doesn't say.
+    """
+    shelves: Dict[str, int | None] = {}
+    for link in _USER_SHELF_LINKS(lxml.html.fromstring(html)):
+        href = link.get("href")
+        if not href or "shelf=" not in href:
+            continue
+        count = _SHELF_COUNT.search(_element_text(link).strip())
+        shelves[shelf_name(href)] = int(count.group(1)) if count else None
+    return shelves
+
+
+def count_shelf_pages(html: str, books_on_page: int) -> int:
+    """Number of pages of a shelf, from its first page.
+    Uses the real total of books when the page has it, since a full first page tells the page size
+    even if Goodreads capped the per_page we asked for. Otherwise falls back to the pagination.
+
+    Args:
+        html (str): HTML of the first page of the shelf.
+        books_on_page (int): Number of books parsed from that page.
+
+    Returns:
+        int: Number of pages in the shelf.
+    """
+    total = parse_shelf_total(html)
+    if total is None or books_on_page == 0:
+        return parse_max_page(html)
+    return max(math.ceil(total / books_on_page), 1)
@@ -1,11 +1,16 @@
 import logging
 import sys
 
+# Importing the scraper doesn't touch the global logging configuration, applications decide
+# where its logs go. Scripts that want the debug output on stdout call setup_logging.
+logger = logging.getLogger("goodreads_scraper")
+logger.addHandler(logging.NullHandler())
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
-)
 
-logger = logging.getLogger(__name__)
+def setup_logging(level: int = logging.DEBUG) -> None:
+    """Sends the logs of the process to stdout, with timestamps, from the given level up."""
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
@@ -0,0 +1,68 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import pytest
+
+from goodreads_scraper import auth
+from goodreads_scraper.metrics import InMemoryMetrics, set_metrics
+
+# Status, body and extra headers of a response of the local test servers.
+Reply = Tuple[int, str, Dict[str, str]]
+Respond = Callable[[BaseHTTPRequestHandler], Reply]
+
+
+@pytest.fixture
+def saved_cookies(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Points auth.COOKIE_FILE to a cookie file for the local test servers."""
+    cookie_file = tmp_path / "login.json"
+    cookie_file.write_text(json.dumps([{"name": "session_id", "value": "abc", "domain": "127.0.0.1", "path": "/"}]))
+    monkeypatch.setattr(auth, "COOKIE_FILE", cookie_file)
+    return cookie_file
+
+
+@pytest.fixture
+def metrics() -> Iterator[InMemoryMetrics]:
+    """Collects the metrics reported during the test."""
+    collector = InMemoryMetrics()
+    previous = set_metrics(collector)
+    yield collector
+    set_metrics(previous)
+
+
+@pytest.fixture
+def serve() -> Iterator[Callable[[Respond], str]]:
+    """Starts local HTTP servers for the test, shut down when it ends.
+    Each one answers every GET and POST with what the given function returns for the request,
+    as HTML unless its headers say otherwise, and serve returns its base URL.
+    """
+    servers: List[ThreadingHTTPServer] = []
+
+    def start(respond: Respond) -> str:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body, headers = respond(self)
+                data = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in {"Content-Type": "text/html; charset=utf-8", **headers}.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
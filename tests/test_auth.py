@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.stand_in import SignInServer
+from goodreads_scraper import auth, utils
+from goodreads_scraper.scrape import open_http_shelf
+from goodreads_scraper.utils import setup_session
+
+EMAIL = "reader@example.com"
+PASSWORD = "secret"
+
+
+@pytest.fixture
+def sign_in_server(monkeypatch: pytest.MonkeyPatch):
+    """Stand-in sign-in server, with auth pointed to it and its account in GR_LOGIN and GR_PASSWORD."""
+    with SignInServer(EMAIL, PASSWORD, books=30) as server:
+        monkeypatch.setattr(auth, "SIGN_IN_URL", server.sign_in_url)
+        monkeypatch.setenv("GR_LOGIN", EMAIL)
+        monkeypatch.setenv("GR_PASSWORD", PASSWORD)
+        yield server
+
+
+class FakeBrowser:
+    current_url = "https://www.goodreads.com/"
+
+    def __init__(self) -> None:
+        self.quit_called = False
+
+    def get(self, url: str) -> None:
+        pass
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        return [{"name": "_session_id2", "value": "from-browser", "domain": "www.goodreads.com", "path": "/"}]
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+def test_http_login(sign_in_server: SignInServer) -> None:
+    cookies = auth.http_login()
+    assert sign_in_server.logins == 1
+    session_cookie = next(cookie for cookie in cookies if cookie["name"] == "_session_id2")
+    assert session_cookie["domain"] == "127.0.0.1" and session_cookie["path"] == "/"
+    assert auth.cookies_expire_at([session_cookie]) == session_cookie["expiry"]
+    # Saved in the browser's format, the cookies sign a new session in.
+    with setup_session() as session:
+        auth.set_session_cookies(session, cookies)
+        response = session.get(sign_in_server.url)
+    assert not auth.is_signed_out(response.url, response.text)
+
+
+def test_http_login_rejected(sign_in_server: SignInServer) -> None:
+    with pytest.raises(auth.LoginRejected):
+        auth.http_login(EMAIL, "wrong")
+    assert sign_in_server.logins == 0
+
+
+def test_open_http_shelf_logs_in_over_http(sign_in_server: SignInServer, saved_cookies) -> None:
+    # The saved cookies are not signed in on this server.
+    opened = open_http_shelf(sign_in_server.url)
+    assert opened is not None
+    session, first_page = opened
+    session.close()
+    assert "bookalike" in first_page.text
+    assert sign_in_server.logins == 1
+    assert "_session_id2" in {cookie["name"] for cookie in auth.read_cookie_file()}
+    # The next scrape uses the saved cookies without logging in again.
+    opened = open_http_shelf(sign_in_server.url)
+    assert opened is not None
+    opened[0].close()
+    assert sign_in_server.logins == 1
+
+
+def test_open_http_shelf_logs_in_once_for_concurrent_scrapes(sign_in_server: SignInServer, saved_cookies) -> None:
+    with ThreadPoolExecutor(4) as executor:
+        opened = list(executor.map(open_http_shelf, [sign_in_server.url] * 4))
+    assert all(result is not None for result in opened)
+    for session, _ in opened:  # type: ignore[misc]
+        session.close()
+    assert sign_in_server.logins == 1
+
+
+def test_refresh_cookie_file_uses_cookies_of_other_scrapers(saved_cookies) -> None:
+    stale = auth.read_cookie_file()
+    refreshed = [{"name": "_session_id2", "value": "from-other-scraper", "domain": "127.0.0.1", "path": "/"}]
+    auth.write_cookie_file(refreshed)
+    logins = []
+    assert auth.refresh_cookie_file(stale, lambda: logins.append(1) or []) == refreshed
+    assert logins == []
+    # The file still holds the cookies that stopped working, those are replaced.
+    assert auth.refresh_cookie_file(refreshed, lambda: stale) == stale
+    assert auth.read_cookie_file() == stale
+
+
+def test_open_http_shelf_login_rejected(sign_in_server: SignInServer, saved_cookies, monkeypatch) -> None:
+    monkeypatch.setenv("GR_PASSWORD", "wrong")
+    assert open_http_shelf(sign_in_server.url) is None
+    assert auth.read_cookie_file()[0]["value"] == "abc"
+
+
+def test_fresh_cookies_falls_back_to_browser(sign_in_server: SignInServer, monkeypatch) -> None:
+    browser = FakeBrowser()
+    monkeypatch.setattr(utils, "setup_browser", lambda: browser)
+    monkeypatch.setattr(auth, "login", lambda browser, email, password: None)
+    assert {cookie["name"] for cookie in auth.fresh_cookies()} == {"session-id", "_session_id2"}
+    assert auth.fresh_cookies(EMAIL, "wrong") == browser.get_cookies()
+    assert browser.quit_called
@@ -0,0 +1,11 @@
+from benchmarks import bench_e2e
+
+
+def test_bench_e2e_runs_offline():
+    # Small enough for CI, with enough injected errors that some requests get retried.
+    results = bench_e2e.run(books=250, authors=6, latency=0, error_rate=0.1, seed=1)
+    assert [result["stage"] for result in results] == ["parse", "shelf", "authors"]
+    shelf = results[1]
+    assert shelf["items"] == 250
+    assert shelf["requests"] >= 3
+    assert all(result["peak_rss_mb"] > 0 for result in results)
@@ -0,0 +1,96 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from goodreads_scraper.book import (
+    BOOK_FIELDS,
+    Book,
+    books_from_columns,
+    books_to_columns,
+    iter_books_from_columns,
+    parse_goodreads_date,
+    parse_num_pages,
+)
+from goodreads_scraper.utils import read_books_from_lxml
+
+fixture_path = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("Sep 20, 2021", date(2021, 9, 20)),
+        ("Sep 2021", date(2021, 9, 1)),
+        ("1605", date(1605, 1, 1)),
+        ("not set", None),
+        ("", None),
+    ],
+)
+def test_parse_goodreads_date(text: str, expected: date | None) -> None:
+    assert parse_goodreads_date(text) == expected
+
+
+@pytest.mark.parametrize(
+    "pages,expected",
+    [("1,328\n        pp", 1328), ("214 pp", 214), ("unknown", None), ("", None), (None, None), (96, 96)],
+)
+def test_parse_num_pages(pages, expected: int | None) -> None:
+    assert parse_num_pages(pages) == expected
+
+
+def test_book_from_dict() -> None:
+    book = Book.from_dict(
+        {
+            "title": "Dom Quixote",
+            "author_id": "4037220",
+            "avg_rating": "3.89",
+            "user_rating": "really liked it",
+            "num_pages": "1,328 pp",
+            "started_date": "not set",
+            "finished_date": "Sep 20, 2021",
+            "review_id": "4247474961",
+            "shelves": "read",
+        }
+    )
+    assert book.author_id == 4037220 and book.review_id == 4247474961
+    assert (book.avg_rating, book.user_rating, book.num_pages) == (3.89, 4, 1328)
+    assert (book.started_date, book.finished_date) == (None, date(2021, 9, 20))
+    assert not hasattr(book, "__dict__")
+    assert Book.from_dict({}) == Book()
+
+
+def test_book_to_dict_round_trip() -> None:
+    book = Book(title="Dom Quixote", user_rating=5, num_pages=1328, added_date=date(2021, 9, 20))
+    as_dict = book.to_dict()
+    assert tuple(as_dict) == BOOK_FIELDS
+    assert Book.from_dict(as_dict) == book
+    # Dates stored as ISO strings, like in the HTTP cache, are read back too.
+    assert Book.from_dict({**as_dict, "added_date": "2021-09-20"}) == book
+
+
+def test_parsed_books_are_typed() -> None:
+    books = read_books_from_lxml(fixture_path.read_text(encoding="utf-8"))
+    first = books[0]
+    assert (first.title, first.user_rating, first.num_pages) == ("Dom Quixote", 4, 1328)
+    assert (first.publishing_date, first.started_date) == (date(1605, 1, 1), None)
+    assert first.finished_date == first.added_date == date(2021, 9, 20)
+    assert all(book.user_rating in range(1, 6) for book in books)
+
+
+def test_books_from_columns() -> None:
+    books = read_books_from_lxml(fixture_path.read_text(encoding="utf-8"))
+    columns = books_to_columns(books)
+    assert list(columns) == list(BOOK_FIELDS)
+    assert all(isinstance(value, str) for value in columns["added_date"])
+    assert books_from_columns(columns) == books
+    # Fields the page doesn't send, like the author's birthplace, get their default.
+    del columns["birthplace"], columns["country"]
+    first = next(iter_books_from_columns(columns))
+    assert first == books[0] and first.birthplace is None
+    assert books_from_columns({}) == []
+
+
+def test_books_from_columns_checks_lengths() -> None:
+    with pytest.raises(ValueError):
+        books_from_columns({"title": ["a", "b"], "book_id": [1]})
@@ -0,0 +1,193 @@
+import queue
+import threading
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import chromedriver_autoinstaller
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from goodreads_scraper import auth
+from goodreads_scraper import browser_pool as browser_pool_module
+from goodreads_scraper import utils
+from goodreads_scraper.book import Book
+from goodreads_scraper.browser_pool import BrowserPool, scrape_shelf_sharded
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.quit_called = False
+
+    def get(self, url: str) -> None:
+        pass
+
+    def add_cookie(self, cookie: dict) -> None:
+        pass
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+@pytest.fixture
+def started(monkeypatch: pytest.MonkeyPatch) -> List[FakeBrowser]:
+    browsers: List[FakeBrowser] = []
+
+    def fake_setup_browser(debug: bool = False) -> FakeBrowser:
+        browser = FakeBrowser()
+        browsers.append(browser)
+        return browser
+
+    monkeypatch.setattr(browser_pool_module, "setup_browser", fake_setup_browser)
+    return browsers
+
+
+def test_browser_pool_reuses_browsers(started: List[FakeBrowser]) -> None:
+    with BrowserPool(size=2) as pool:
+        for _ in range(5):
+            with pool.browser() as browser:
+                assert browser is started[0]
+        assert len(started) == 1
+    assert started[0].quit_called
+
+
+def test_browser_pool_bounded(started: List[FakeBrowser]) -> None:
+    pool = BrowserPool(size=2)
+    pool.warm()
+    assert len(started) == 2
+    barrier = threading.Barrier(3)
+    release = threading.Event()
+    checked_out = []
+
+    def job() -> None:
+        with pool.browser() as browser:
+            checked_out.append(browser)
+            barrier.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=job) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    # Both browsers are busy, no third one is started.
+    with pytest.raises(queue.Empty):
+        with pool.browser(timeout=0.1):
+            pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(started) == 2
+    assert {id(browser) for browser in checked_out} == {id(browser) for browser in started}
+    pool.close()
+
+
+def test_browser_pool_replaces_dead_browser(started: List[FakeBrowser]) -> None:
+    with BrowserPool(size=1) as pool:
+        with pytest.raises(WebDriverException):
+            with pool.browser():
+                raise WebDriverException("Chrome crashed")
+        assert started[0].quit_called
+        with pool.browser() as browser:
+            assert browser is started[1]
+
+
+SIGNED_IN = "siteHeader__topLevelItem--signedIn"
+SIGNED_OUT = "siteHeader__topLevelItem--signedOut"
+
+
+class ShelfBrowser(FakeBrowser):
+    """Serves a four page shelf, signed in only with the cookie in valid_session."""
+
+    valid_session = "fresh"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.cookies: Dict[str, str] = {}
+        self.current_url = ""
+        self.page_source = ""
+        self.pages_left: int | None = None  # Pages served before the session is dropped, None for never.
+
+    def add_cookie(self, cookie: Dict[str, Any]) -> None:
+        self.cookies[cookie["name"]] = cookie["value"]
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        return [{"name": name, "value": value} for name, value in self.cookies.items()]
+
+    def get(self, url: str) -> None:
+        if self.pages_left is not None:
+            self.pages_left -= 1
+        signed_in = self.cookies.get("_session_id2") == self.valid_session and self.pages_left != -1
+        if "/review/list/" in url and signed_in:
+            self.current_url, self.page_source = url, f"<html><body class='{SIGNED_IN}'></body></html>"
+        elif "/review/list/" in url:
+            self.current_url = "https://www.goodreads.com/user/sign_in"
+            self.page_source = f"<html><body class='{SIGNED_OUT}'></body></html>"
+        else:
+            self.current_url = url
+
+
+@pytest.fixture
+def shelf_browsers(monkeypatch: pytest.MonkeyPatch, saved_cookies) -> List[ShelfBrowser]:
+    browsers: List[ShelfBrowser] = []
+
+    def fake_setup_browser(debug: bool = False) -> ShelfBrowser:
+        browsers.append(ShelfBrowser())
+        return browsers[-1]
+
+    def read_books_fast(browser: ShelfBrowser) -> List[Book]:
+        if "sign_in" in browser.current_url:
+            return []
+        return [Book(review_id=int(parse_qs(urlparse(browser.current_url).query).get("page", ["1"])[0]))]
+
+    monkeypatch.setattr(browser_pool_module, "setup_browser", fake_setup_browser)
+    monkeypatch.setattr(browser_pool_module, "page_wait", lambda browser: None)
+    monkeypatch.setattr(browser_pool_module, "read_books_fast", read_books_fast)
+    monkeypatch.setattr(browser_pool_module, "count_shelf_pages", lambda html, books_on_page: 4)
+    return browsers
+
+
+def test_scrape_shelf_sharded_refreshes_every_browser(shelf_browsers, monkeypatch) -> None:
+    logins = []
+
+    def http_login() -> List[Dict[str, Any]]:
+        logins.append(1)
+        return [{"name": "_session_id2", "value": ShelfBrowser.valid_session}]
+
+    monkeypatch.setattr(auth, "http_login", http_login)
+    # The first page of each of the two shards waits for the other, so both browsers of the pool are used.
+    shards_started = threading.Barrier(2, timeout=5)
+    reads: List[ShelfBrowser] = []
+    read_books_fast = browser_pool_module.read_books_fast
+
+    def read_books_in_step(browser: ShelfBrowser) -> List[Book]:
+        reads.append(browser)
+        if len(reads) in (2, 3):
+            shards_started.wait()
+        return read_books_fast(browser)
+
+    monkeypatch.setattr(browser_pool_module, "read_books_fast", read_books_in_step)
+    url = "https://www.goodreads.com/review/list/1?shelf=read"
+    with BrowserPool(size=2) as pool:
+        # Both browsers start with the expired cookies, only the first one logs in.
+        pool.warm()
+        books = scrape_shelf_sharded(url, pool)
+    assert sorted(book.review_id for book in books) == [1, 2, 3, 4]
+    assert len(logins) == 1
+
+
+def test_scrape_shelf_sharded_fails_when_signed_out(shelf_browsers, saved_cookies) -> None:
+    auth.write_cookie_file([{"name": "_session_id2", "value": ShelfBrowser.valid_session}], saved_cookies)
+    with BrowserPool(size=1) as pool:
+        with pool.browser() as browser:
+            browser.pages_left = 2
+        with pytest.raises(RuntimeError):
+            scrape_shelf_sharded("https://www.goodreads.com/review/list/1?shelf=read", pool)
+
+
+def test_install_chromedriver_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    monkeypatch.setattr(chromedriver_autoinstaller, "install", lambda no_ssl: calls.append(no_ssl))
+    utils.install_chromedriver.cache_clear()
+    utils.install_chromedriver()
+    utils.install_chromedriver()
+    assert len(calls) == 1
+    utils.install_chromedriver.cache_clear()
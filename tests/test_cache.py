@@ -0,0 +1,97 @@
+import time
+from http.server import BaseHTTPRequestHandler
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Tuple
+
+import pytest
+
+from goodreads_scraper.book import Book
+from goodreads_scraper.cache import AuthorCache, HTTPCache
+from goodreads_scraper.scrape import parse_shelf_response
+from goodreads_scraper.utils import setup_session
+from tests.conftest import Reply
+
+
+def test_author_cache_get_put(tmp_path: Path) -> None:
+    with AuthorCache(tmp_path / "authors.sqlite3") as cache:
+        assert cache.get("13199") is None
+        cache.put(13199, "Zurich, Switzerland", "Switzerland")
+        cache.put("6062267", None, None)
+        assert cache.get("13199") == ("Zurich, Switzerland", "Switzerland")
+        # Authors without a birthplace are cached too.
+        assert cache.get(6062267) == (None, None)
+
+
+def test_author_cache_get_many(tmp_path: Path) -> None:
+    with AuthorCache(tmp_path / "authors.sqlite3") as cache:
+        cache.put_many({str(i): (f"City {i}, Country", "Country") for i in range(1200)})
+        found = cache.get_many([*range(0, 1200, 2), 5000])
+        assert len(found) == 600
+        assert found["10"] == ("City 10, Country", "Country")
+        assert "5000" not in found
+
+
+def test_author_cache_ttl(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with AuthorCache(tmp_path / "authors.sqlite3", ttl=60) as cache:
+        cache.put("1", "Lisbon, Portugal", "Portugal")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert cache.get("1") is None
+
+
+def _put_authors(args: tuple) -> None:
+    path, offset = args
+    with AuthorCache(path) as cache:
+        for i in range(offset, offset + 50):
+            cache.put(i, None, None)
+
+
+def test_author_cache_shared_between_processes(tmp_path: Path) -> None:
+    path = tmp_path / "authors.sqlite3"
+    with Pool(4) as pool:
+        pool.map(_put_authors, [(path, offset) for offset in range(0, 200, 50)])
+    with AuthorCache(path) as cache:
+        assert len(cache.get_many(range(200))) == 200
+
+
+PAGE = "<html><body><table><tr class='bookalike'><td class='field title'>Iracema</td></tr></table></body></html>"
+
+
+@pytest.fixture
+def etag_server(serve) -> Tuple[str, Dict[str, int]]:
+    """Serves a page with an ETag and answers 304 when the client already has it."""
+    served = {"full": 0, "not_modified": 0}
+
+    def respond(request: BaseHTTPRequestHandler) -> Reply:
+        if request.headers.get("If-None-Match") == '"v1"':
+            served["not_modified"] += 1
+            return 304, "", {"ETag": '"v1"'}
+        served["full"] += 1
+        return 200, PAGE, {"ETag": '"v1"'}
+
+    return f"{serve(respond)}/review/list/1?page=2&shelf=read", served
+
+
+def test_http_cache_conditional_get(tmp_path: Path, etag_server: Tuple[str, Dict[str, int]]) -> None:
+    url, served = etag_server
+    with HTTPCache(tmp_path / "http_cache.sqlite3") as http_cache:
+        with setup_session(http_cache=http_cache) as session:
+            first = session.get(url)
+            second = session.get(url)
+        assert served == {"full": 1, "not_modified": 1}
+        assert not first.from_cache and second.from_cache
+        assert second.status_code == 200
+        assert second.text == first.text == PAGE
+        assert (http_cache.hits, http_cache.misses) == (1, 1)
+        assert http_cache.hit_rate == 0.5
+
+
+def test_http_cache_reuses_parsed_books(tmp_path: Path, etag_server: Tuple[str, Dict[str, int]]) -> None:
+    url, _ = etag_server
+    with HTTPCache(tmp_path / "http_cache.sqlite3") as http_cache:
+        with setup_session(http_cache=http_cache) as session:
+            books = parse_shelf_response(session.get(url))
+            assert http_cache.get_parsed(url) == books
+            http_cache.put_parsed(url, [Book(title="From the cache", num_pages=12)])
+            assert parse_shelf_response(session.get(url)) == [Book(title="From the cache", num_pages=12)]
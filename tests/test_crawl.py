@@ -0,0 +1,88 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from benchmarks.stand_in import SignInServer, StandInServer
+from goodreads_scraper import auth
+from goodreads_scraper import crawl as crawl_module
+from goodreads_scraper.crawl import crawl, iter_crawl, scrape_user_shelves
+from goodreads_scraper.metrics import InMemoryMetrics
+from goodreads_scraper.store import ShelfStore
+from goodreads_scraper.throttle import FetchController
+
+
+@pytest.fixture
+def local_shelves(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Lets the crawl take shelves of the local stand-in server, which are not on goodreads.com."""
+    monkeypatch.setattr(crawl_module, "is_goodreads_shelf", lambda url: "/review/list/" in url)
+
+
+def test_crawl(local_shelves, saved_cookies, metrics: InMemoryMetrics) -> None:
+    with StandInServer(books=250) as server:
+        urls = [f"{server.base_url}/review/list/{user_id}?shelf=read" for user_id in range(1, 6)]
+        results = crawl([*urls, urls[0], "https://example.com/not-goodreads"], concurrency=4)
+        # The stand-in answers every user with the same shelf.
+        assert server.requests == 5 * 3
+    by_url = {result.url: result for result in results}
+    assert len(results) == 6
+    assert all(by_url[url].ok and by_url[url].book_count == len(by_url[url].books) == 250 for url in urls)
+    assert not by_url["https://example.com/not-goodreads"].ok
+    assert metrics.counter("users_crawled", status="ok") == 5
+    assert metrics.counter("users_crawled", status="failed") == 1
+
+
+def test_crawl_signs_in_with_saved_cookies(local_shelves, saved_cookies) -> None:
+    with SignInServer("reader@example.com", "secret", books=150) as server:
+        auth.write_cookie_file(auth.http_login("reader@example.com", "secret", server.sign_in_url), saved_cookies)
+        url = f"{server.base_url}/review/list/1?shelf=read"
+        [result] = crawl([url], concurrency=2)
+        assert result.ok and result.book_count == 150
+        # A session handed in is used as it is, the saved cookies are not loaded into it.
+        with requests.Session() as session:
+            [result] = iter_crawl([url], concurrency=2, session=session)
+            assert not result.ok and "Signed out" in result.error
+            assert not session.cookies
+
+
+def test_crawl_failed_user_does_not_stop_batch(local_shelves, saved_cookies, tmp_path) -> None:
+    with StandInServer(books=150) as server, ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        # Nothing listens on port 9, that user can't be fetched.
+        urls = [f"{server.base_url}/review/list/1?shelf=read", "http://127.0.0.1:9/review/list/2?shelf=read"]
+        results = crawl(urls, concurrency=2, store=store, controller=FetchController(max_retries=0))
+        by_url = {result.url: result for result in results}
+        assert by_url[urls[0]].ok and by_url[urls[0]].books is None and by_url[urls[0]].book_count == 150
+        assert not by_url[urls[1]].ok and "ConnectionError" in by_url[urls[1]].error
+        assert len(store.get_shelf(urls[0])) == 150
+        assert store.user_ids() == [1]
+
+
+def test_scrape_user_shelves(local_shelves, saved_cookies) -> None:
+    with StandInServer(books=150) as server:
+        shelved = scrape_user_shelves(server.url, shelves=["read", "to-read"], concurrency=4)
+        # One page to find the shelves, then two pages of each shelf.
+        assert server.requests == 1 + 2 * 2
+        everything = scrape_user_shelves(server.url)
+    assert shelved is not None and everything is not None
+    # The stand-in serves the same books on every shelf, so each one is on all of them.
+    assert len(shelved) == len({book.book_id for book, _ in shelved}) == len(everything)
+    assert all(shelves == ["read", "to-read"] for _, shelves in shelved)
+    assert everything[0].shelves[:3] == ["read", "currently-reading", "to-read"]
+    assert len(everything[0].shelves) == 13
+
+
+def test_scrape_user_shelves_paginates_each_shelf(local_shelves, saved_cookies, monkeypatch) -> None:
+    requested = []
+    original_get = requests.Session.get
+
+    def get(self, url, **kwargs):
+        requested.append(url)
+        return original_get(self, url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "get", get)
+    with StandInServer(books=250) as server:
+        assert scrape_user_shelves(server.url, shelves="quarantine", concurrency=2) is not None
+    pages = [parse_qs(urlparse(url).query) for url in requested]
+    # Only the page the shelves are found on is of the read shelf, the rest are of the quarantine one.
+    assert [page["shelf"] for page in pages] == [["read"]] + [["quarantine"]] * 3
+    assert sorted(page.get("page", ["1"])[0] for page in pages[1:]) == ["1", "2", "3"]
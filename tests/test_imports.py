@@ -0,0 +1,49 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).parent.parent
+# Only needed to drive a browser or parse with the pure Python fallback, not on the HTTP path.
+BROWSER_MODULES = ("selenium", "chromedriver_autoinstaller", "bs4", "validators")
+# Time the package may add to a cold import on top of requests, which the HTTP path can't do without.
+IMPORT_BUDGET_US = 150_000
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def cumulative_import_times(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds by module, from the output of -X importtime."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_http_path_does_not_import_browser_modules() -> None:
+    loaded = run_python(
+        "-c",
+        "import sys, goodreads_scraper.scrape, goodreads_scraper.crawl, goodreads_scraper.sync; "
+        "print(' '.join(sys.modules))",
+    ).stdout.split()
+    assert [module for module in loaded if module.split(".")[0] in BROWSER_MODULES] == []
+
+
+def test_import_does_not_configure_logging() -> None:
+    handlers = run_python(
+        "-c", "import logging, goodreads_scraper.scrape; print(len(logging.getLogger().handlers))"
+    ).stdout
+    assert handlers.strip() == "0"
+
+
+def test_http_path_import_time() -> None:
+    times = cumulative_import_times(run_python("-X", "importtime", "-c", "import goodreads_scraper.scrape").stderr)
+    added = times["goodreads_scraper.scrape"] - times["requests"]
+    assert added < IMPORT_BUDGET_US, f"Importing the HTTP path took {added / 1000:.0f}ms on top of requests."
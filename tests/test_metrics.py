@@ -0,0 +1,71 @@
+import json
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from goodreads_scraper import scrape
+from goodreads_scraper.metrics import (
+    InMemoryMetrics,
+    Metrics,
+    get_metrics,
+    percentile,
+    write_json,
+    write_prometheus,
+)
+
+
+def test_default_metrics_are_a_no_op() -> None:
+    metrics = get_metrics()
+    assert type(metrics) is Metrics
+    with metrics.span("auth"):
+        metrics.count("pages_fetched")
+
+
+def test_percentile() -> None:
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_in_memory_metrics(metrics: InMemoryMetrics) -> None:
+    with get_metrics().span("auth"):
+        pass
+    get_metrics().count("retries", reason="429")
+    get_metrics().count("retries", 2, reason="429")
+    assert metrics.counter("retries", reason="429") == 3
+    assert metrics.counter("retries") == 0
+    assert len(metrics.observations("phase_seconds", phase="auth")) == 1
+
+
+def test_exporters(tmp_path: Path) -> None:
+    metrics = InMemoryMetrics()
+    metrics.count("pages_fetched", 3)
+    for latency in (0.1, 0.2, 0.3):
+        metrics.observe("phase_seconds", latency, phase='say "hi"')
+
+    write_json(metrics, tmp_path / "metrics.json")
+    snapshot = json.loads((tmp_path / "metrics.json").read_text())
+    assert snapshot["counters"] == [{"name": "pages_fetched", "labels": {}, "value": 3}]
+    assert snapshot["histograms"][0]["count"] == 3
+    assert snapshot["histograms"][0]["quantiles"]["0.5"] == 0.2
+
+    write_prometheus(metrics, tmp_path / "metrics.prom")
+    lines = (tmp_path / "metrics.prom").read_text().splitlines()
+    assert "# TYPE goodreads_pages_fetched_total counter" in lines
+    assert "goodreads_pages_fetched_total 3" in lines
+    assert 'goodreads_phase_seconds{phase="say \\"hi\\"",quantile="0.99"} 0.3' in lines
+    assert 'goodreads_phase_seconds_count{phase="say \\"hi\\""} 3' in lines
+
+
+def test_total_timed_when_browser_scrape_fails(metrics: InMemoryMetrics, monkeypatch) -> None:
+    @contextmanager
+    def broken_browser(debug=False, browser_pool=None):
+        raise RuntimeError("Chrome didn't start")
+        yield
+
+    monkeypatch.setattr(scrape, "open_browser", broken_browser)
+    with pytest.raises(RuntimeError):
+        next(scrape.iter_browser_shelf_pages("https://www.goodreads.com/review/list/1?shelf=read"))
+    assert len(metrics.observations("phase_seconds", phase="total")) == 1
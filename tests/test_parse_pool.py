@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.stand_in import StandInServer
+from goodreads_scraper.parse_pool import ParsePool
+from goodreads_scraper.scrape import scrape_shelf
+from goodreads_scraper.utils import read_books_from_html
+
+fixture_path = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
+
+
+@pytest.fixture(scope="module")
+def parse_pool():
+    with ParsePool(processes=2) as pool:
+        yield pool
+
+
+def test_parse_pool_same_books(parse_pool: ParsePool) -> None:
+    html = fixture_path.read_text(encoding="utf-8")
+    assert parse_pool.parse(html) == read_books_from_html(html)
+    with ParsePool(processes=1, parser="html.parser") as soup_pool:
+        assert soup_pool.parse(html) == read_books_from_html(html, parser="html.parser")
+    with pytest.raises(ValueError):
+        ParsePool(parser="html5lib")
+
+
+def test_scrape_shelf_with_parse_pool(parse_pool: ParsePool, saved_cookies) -> None:
+    with StandInServer(books=450) as server:
+        expected = scrape_shelf(server.url)
+        # The same pool serves every shelf.
+        for _ in range(2):
+            books = scrape_shelf(server.url, parse_pool=parse_pool)
+            assert sorted(books, key=lambda book: book.review_id) == sorted(expected, key=lambda book: book.review_id)
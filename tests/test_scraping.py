@@ -1,7 +1,27 @@
+import asyncio
 import pytest
+import random
+import time
+from http.server import BaseHTTPRequestHandler
 from typing import Tuple
-from goodreads_scraper.scrape import scrape_shelf, process_goodreads_url, scrape_gr_author
+from goodreads_scraper.scrape import (
+    scrape_shelf,
+    process_goodreads_url,
+    scrape_gr_author,
+    iter_shelf_pages_from,
+    iter_goodreads_url,
+    enrich_with_authors,
+    parse_author_birthplace,
+)
+from goodreads_scraper.book import Book
+from goodreads_scraper.async_scrape import process_goodreads_urls_async
+from goodreads_scraper.utils import setup_session
+from goodreads_scraper.cache import AuthorCache
+from goodreads_scraper.metrics import InMemoryMetrics
+from goodreads_scraper.throttle import FetchController
+from goodreads_scraper.utils import read_books_from_html, read_books_from_lxml, read_books_from_soup
 from pathlib import Path
+from tests.conftest import Reply
 
 fixture_path = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
 
@@ -13,6 +33,31 @@ def goodreads_html():
         return file.read()
 
 
+SERVED_PAGES = 3
+
+
+@pytest.fixture
+def shelf_server(goodreads_html: str, serve) -> str:
+    """Serves the saved shelf for every page, after a random delay so pages complete out of order.
+    The page is served as if signed in, with a pagination of SERVED_PAGES pages.
+    """
+    pagination = "".join(f"<a>{i}</a>" for i in range(1, SERVED_PAGES + 1))
+    served_html = goodreads_html.replace(
+        "siteHeader__topLevelItem--signedOut", "siteHeader__topLevelItem--signedIn"
+    ).replace(
+        '<div id="infiniteStatus"',
+        f'<div id="reviewPagination">{pagination}<a>next »</a></div><div id="infiniteStatus"',
+    ).replace(
+        "13 of 13 loaded", f"13 of {13 * SERVED_PAGES} loaded"
+    )
+
+    def respond(request: BaseHTTPRequestHandler) -> Reply:
+        time.sleep(random.uniform(0, 0.05))
+        return 200, served_html, {}
+
+    return f"{serve(respond)}/review/list/1"
+
+
 TEST_URL = "https://www.goodreads.com/review/list/71341746?shelf=quarantine"
 
 
@@ -34,7 +79,7 @@ def test_scrape_live_shelf():
     assert len(actual_results) == EXPECTED_RESULTS["number_of_books"]
 
     # Verify that the known titles are in the actual results
-    actual_titles = [book["title"] for book in actual_results]
+    actual_titles = [book.title for book in actual_results]
     for title in EXPECTED_RESULTS["known_titles"]: #type: ignore
         assert title in actual_titles
 
@@ -49,7 +94,7 @@ def test_process_profile():
     assert len(actual_results) >= 300
 
     # Verify that the known titles are in the actual results
-    actual_titles = [book["title"] for book in actual_results]
+    actual_titles = [book.title for book in actual_results]
 
     for title in ["Les Visages", "O poderoso chefão"]:
         assert title in actual_titles
@@ -64,7 +109,7 @@ def test_process_profile_with_shelf_url():
     assert len(actual_results) >= 300
 
     # Verify that the known titles are in the actual results
-    actual_titles = [book["title"] for book in actual_results]
+    actual_titles = [book.title for book in actual_results]
 
     for title in ["Les Visages", "O poderoso chefão"]:
         assert title in actual_titles
@@ -86,7 +131,7 @@ def test_scrape_saved_shelf():
     assert len(actual_results) == EXPECTED_RESULTS["number_of_books"]
 
     # Verify that the known titles are in the actual results
-    actual_titles = [book["title"] for book in actual_results]
+    actual_titles = [book.title for book in actual_results]
     for title in EXPECTED_RESULTS["known_titles"]: #type: ignore
         assert title in actual_titles
 
@@ -104,3 +149,135 @@ def test_scrape_saved_shelf():
 def test_scrape_gr_author(url: str, expected: Tuple):
     results = scrape_gr_author(url)
     assert results == expected
+
+
+def test_lxml_parser_parity(goodreads_html: str):
+    soup_books = read_books_from_soup(goodreads_html)
+    lxml_books = read_books_from_lxml(goodreads_html)
+    assert len(lxml_books) == EXPECTED_RESULTS["number_of_books"]
+    assert lxml_books == soup_books
+
+
+def test_read_books_from_html_parser(goodreads_html: str):
+    assert read_books_from_html(goodreads_html) == read_books_from_lxml(goodreads_html)
+    assert read_books_from_html(goodreads_html, parser="html.parser") == read_books_from_soup(goodreads_html)
+    with pytest.raises(ValueError):
+        read_books_from_html(goodreads_html, parser="html5lib")
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_iter_shelf_pages_from(shelf_server: str, ordered: bool):
+    with setup_session() as session:
+        pages = list(iter_shelf_pages_from(session, shelf_server, 40, ordered=ordered))
+    page_numbers = [page for page, _ in pages]
+    assert sorted(page_numbers) == list(range(2, 41))
+    if ordered:
+        assert page_numbers == list(range(2, 41))
+    assert all(len(books) == EXPECTED_RESULTS["number_of_books"] for _, books in pages)
+
+
+def test_iter_shelf_pages_from_first_page(shelf_server: str):
+    with setup_session() as session:
+        pages = list(iter_shelf_pages_from(session, shelf_server, 10, ordered=True, first_page=6))
+    assert [page for page, _ in pages] == list(range(6, 11))
+
+
+def test_iter_shelf_pages_from_metrics(shelf_server: str, metrics: InMemoryMetrics):
+    with setup_session() as session:
+        list(iter_shelf_pages_from(session, shelf_server, SERVED_PAGES))
+    assert metrics.counter("pages_fetched") == SERVED_PAGES - 1
+    assert metrics.counter("books_parsed") == (SERVED_PAGES - 1) * EXPECTED_RESULTS["number_of_books"]
+    assert metrics.counter("bytes_fetched") > 0
+    assert len(metrics.observations("request_seconds")) == SERVED_PAGES - 1
+    assert metrics.counter("retries") == 0
+
+
+def test_iter_goodreads_url_invalid_url():
+    url = "https://www.goodreads.com/book/show/17899167-o-quarto-de-jacob"
+    with pytest.raises(ValueError):
+        iter_goodreads_url(url)
+
+
+def test_process_goodreads_urls_async(shelf_server: str, saved_cookies: Path, monkeypatch: pytest.MonkeyPatch):
+    # The local server is not a goodreads URL, so skip validation for the served shelves.
+    monkeypatch.setattr("goodreads_scraper.async_scrape.to_shelf_url", lambda url: url)
+    urls = [f"{shelf_server}?shelf=read", f"{shelf_server}?shelf=to-read"]
+    results = asyncio.run(process_goodreads_urls_async(urls, concurrency=4))
+    assert len(results) == 2
+    for books in results:
+        assert len(books) == SERVED_PAGES * EXPECTED_RESULTS["number_of_books"]
+
+
+def test_process_goodreads_urls_async_invalid_url(shelf_server: str, saved_cookies: Path):
+    url = "https://www.goodreads.com/book/show/17899167-o-quarto-de-jacob"
+    results = asyncio.run(process_goodreads_urls_async([url]))
+    assert isinstance(results[0], ValueError)
+
+
+AUTHOR_PAGE = """<html><body><div class="rightContainer">
+<div class="dataTitle">Born</div>
+in Zurich, Switzerland
+<br/></div></body></html>"""
+NO_BIRTHPLACE_PAGE = "<html><body><div class='rightContainer'></div></body></html>"
+
+
+def test_parse_author_birthplace():
+    assert parse_author_birthplace(AUTHOR_PAGE) == "Zurich, Switzerland"
+    assert parse_author_birthplace(NO_BIRTHPLACE_PAGE) is None
+
+
+@pytest.fixture
+def author_server(serve) -> Tuple[str, list]:
+    """Serves author pages, the author with id 1 has a birthplace and every other one does not."""
+    requested = []
+
+    def respond(request: BaseHTTPRequestHandler) -> Reply:
+        requested.append(request.path)
+        return 200, AUTHOR_PAGE if request.path.startswith("/author/show/1.") else NO_BIRTHPLACE_PAGE, {}
+
+    return serve(respond), requested
+
+
+def test_enrich_with_authors(author_server: Tuple[str, list]):
+    base_url, requested = author_server
+
+    def book(author_id: int) -> Book:
+        return Book(author_id=author_id, author_link=f"{base_url}/author/show/{author_id}.Name")
+
+    pages = iter([(1, [book(1), book(2)]), (2, [book(1), book(3)]), (3, [book(2)])])
+    books = enrich_with_authors(pages)
+    assert len(books) == 5
+    assert sorted(requested) == ["/author/show/1.Name", "/author/show/2.Name", "/author/show/3.Name"]
+    for enriched in books:
+        if enriched.author_id == 1:
+            assert (enriched.birthplace, enriched.country) == ("Zurich, Switzerland", "Switzerland")
+        else:
+            assert (enriched.birthplace, enriched.country) == (None, None)
+
+
+def test_enrich_with_authors_unreachable_author(author_server: Tuple[str, list]):
+    base_url, requested = author_server
+    books = [
+        Book(author_id=1, author_link=f"{base_url}/author/show/1.Name"),
+        # Nothing listens on port 9.
+        Book(author_id=2, author_link="http://127.0.0.1:9/author/show/2.Name"),
+    ]
+    with setup_session(controller=FetchController(max_retries=0)) as session:
+        enriched = enrich_with_authors(iter([(1, books)]), session=session)
+    assert [book.country for book in enriched] == ["Switzerland", None]
+    assert enriched[1].birthplace is None
+
+
+def test_enrich_with_authors_cache(author_server: Tuple[str, list], tmp_path: Path):
+    base_url, requested = author_server
+    books = [
+        Book(author_id=author_id, author_link=f"{base_url}/author/show/{author_id}.Name")
+        for author_id in (1, 2, 3)
+    ]
+    with AuthorCache(tmp_path / "authors.sqlite3") as cache:
+        cache.put(2, "Porto, Portugal", "Portugal")
+        enriched = enrich_with_authors(iter([(1, books)]), cache=cache)
+        assert sorted(requested) == ["/author/show/1.Name", "/author/show/3.Name"]
+        assert [book.country for book in enriched] == ["Switzerland", "Portugal", None]
+        # Fetched authors are stored, including the one with no birthplace.
+        assert cache.get_many([1, 3]) == {"1": ("Zurich, Switzerland", "Switzerland"), "3": (None, None)}
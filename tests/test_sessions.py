@@ -0,0 +1,176 @@
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.stand_in import StandInServer
+from goodreads_scraper import auth
+from goodreads_scraper import crawl as crawl_module
+from goodreads_scraper.crawl import crawl
+from goodreads_scraper.sessions import Account, SessionManager, accounts_from_env
+
+DAY = 24 * 60 * 60
+
+
+class FakeLogin:
+    """Login that hands out numbered cookies, expiring in the given number of seconds."""
+
+    def __init__(self, expires_in: float = 30 * DAY) -> None:
+        self.expires_in = expires_in
+        self.calls: List[str] = []
+
+    def __call__(self, account: Account) -> List[Dict[str, Any]]:
+        self.calls.append(account.email)
+        return [
+            {
+                "name": "session_id",
+                "value": f"{account.email}-{len(self.calls)}",
+                "domain": "127.0.0.1",
+                "path": "/",
+                "expiry": time.time() + self.expires_in,
+            }
+        ]
+
+
+def logged_login(account: Account) -> List[Dict[str, Any]]:
+    """Login for worker processes, records each call in a log file next to the cookie file."""
+    with open(account.cookie_file.with_suffix(".log"), "a") as f:
+        f.write(f"{os.getpid()}\n")
+    time.sleep(0.2)
+    return [{"name": "session_id", "value": "shared", "domain": "127.0.0.1", "expiry": time.time() + 30 * DAY}]
+
+
+def check_out_session(cookie_file: Path) -> str:
+    with SessionManager([Account("a@example.com", "secret", cookie_file)], login=logged_login) as sessions:
+        return sessions.session().cookies["session_id"]
+
+
+def account(tmp_path: Path, name: str) -> Account:
+    return Account(f"{name}@example.com", "secret", tmp_path / f"{name}.json")
+
+
+def test_write_cookie_file_round_trip(tmp_path) -> None:
+    cookie_file = tmp_path / "cookies" / "login.json"
+    cookies = [{"name": "session_id", "value": "abc", "domain": "127.0.0.1", "path": "/", "expiry": 1234}]
+    auth.write_cookie_file(cookies, cookie_file)
+    auth.write_cookie_file(cookies, cookie_file)
+    assert auth.read_cookie_file(cookie_file) == cookies
+    # The temporary files were all renamed over the cookie file.
+    assert sorted(path.name for path in cookie_file.parent.iterdir()) == ["login.json"]
+    assert auth.cookies_expire_at(cookies) == 1234
+    assert auth.cookies_expire_at([{"name": "browser_session", "value": "x"}]) is None
+
+
+def test_session_manager_rotates_accounts(tmp_path) -> None:
+    login = FakeLogin()
+    with SessionManager([account(tmp_path, "a"), account(tmp_path, "b")], login=login) as sessions:
+        first, second, third = sessions.session(), sessions.session(), sessions.session()
+        assert first is third and first is not second
+        assert first.cookies["session_id"] == "a@example.com-1"
+        assert second.cookies["session_id"] == "b@example.com-2"
+        # Every account is throttled on its own.
+        assert first.get_adapter("https://").controller is not second.get_adapter("https://").controller
+    # Each account logged in once, and its cookies were saved for the next run.
+    assert login.calls == ["a@example.com", "b@example.com"]
+    assert auth.read_cookie_file(tmp_path / "a.json")[0]["value"] == "a@example.com-1"
+
+
+def test_session_manager_reuses_saved_cookies(tmp_path) -> None:
+    auth.write_cookie_file(FakeLogin()(account(tmp_path, "a")), tmp_path / "a.json")
+    login = FakeLogin()
+    with SessionManager([account(tmp_path, "a")], login=login) as sessions:
+        assert sessions.session().cookies["session_id"] == "a@example.com-1"
+    assert login.calls == []
+
+
+def test_session_manager_refreshes_expiring_cookies(tmp_path) -> None:
+    login = FakeLogin(expires_in=60)
+    auth.write_cookie_file(login(account(tmp_path, "a")), tmp_path / "a.json")
+    # Cookies saved a moment ago are kept even if they are about to expire, the login can't do better.
+    with SessionManager([account(tmp_path, "a")], login=login) as sessions:
+        sessions.session()
+    assert len(login.calls) == 1
+    with SessionManager([account(tmp_path, "a")], login=login, min_refresh_interval=0) as sessions:
+        assert sessions.session().cookies["session_id"] == "a@example.com-2"
+    assert len(login.calls) == 2
+
+
+def test_session_manager_keeps_young_expiring_cookies(tmp_path, monkeypatch) -> None:
+    login = FakeLogin(expires_in=60)
+    reads = []
+    read_cookie_file = auth.read_cookie_file
+    monkeypatch.setattr(auth, "read_cookie_file", lambda path=None: reads.append(path) or read_cookie_file(path))
+    with SessionManager([account(tmp_path, "a")], login=login) as sessions:
+        session = sessions.session()
+        jar = session.cookies
+        # The file is too young to refresh, it isn't read again and the cookies in use are left alone.
+        for _ in range(5):
+            assert sessions.session().cookies is jar
+    assert len(login.calls) == 1 and len(reads) == 1
+
+
+def test_session_manager_logs_in_again_after_invalidate(tmp_path) -> None:
+    login = FakeLogin()
+    with SessionManager([account(tmp_path, "a")], login=login) as sessions:
+        session = sessions.session()
+        assert sessions.session() is session and len(login.calls) == 1
+        sessions.invalidate(session)
+        assert sessions.session().cookies["session_id"] == "a@example.com-2"
+        assert sessions.session().cookies["session_id"] == "a@example.com-2"
+    assert len(login.calls) == 2
+
+
+def test_session_manager_picks_up_cookies_of_other_managers(tmp_path) -> None:
+    login = FakeLogin()
+    with SessionManager([account(tmp_path, "a")], login=login) as first, SessionManager(
+        [account(tmp_path, "a")], login=login
+    ) as second:
+        assert first.session().cookies["session_id"] == "a@example.com-1"
+        assert second.session().cookies["session_id"] == "a@example.com-1"
+        second.invalidate(second.session())
+        assert second.session().cookies["session_id"] == "a@example.com-2"
+        # The first manager sees the file was replaced and loads the new cookies without logging in.
+        assert first.session().cookies["session_id"] == "a@example.com-2"
+    assert len(login.calls) == 2
+
+
+def test_session_manager_logs_in_once_across_processes(tmp_path) -> None:
+    cookie_file = tmp_path / "a.json"
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        values = pool.map(check_out_session, [cookie_file] * 4)
+    assert values == ["shared"] * 4
+    assert len(cookie_file.with_suffix(".log").read_text().splitlines()) == 1
+
+
+def test_session_manager_needs_accounts(monkeypatch) -> None:
+    for name in ("GR_ACCOUNTS", "GR_LOGIN", "GR_PASSWORD"):
+        monkeypatch.delenv(name, raising=False)
+    with pytest.raises(ValueError):
+        SessionManager()
+
+
+def test_accounts_from_env(tmp_path, monkeypatch) -> None:
+    accounts_file = tmp_path / "accounts.json"
+    accounts_file.write_text(json.dumps([{"email": "a@example.com", "password": "secret", "cookie_file": "a.json"}]))
+    monkeypatch.setenv("GR_ACCOUNTS", str(accounts_file))
+    assert accounts_from_env() == [Account("a@example.com", "secret", Path("a.json"))]
+    monkeypatch.delenv("GR_ACCOUNTS")
+    monkeypatch.setenv("GR_LOGIN", "b@example.com")
+    monkeypatch.setenv("GR_PASSWORD", "secret")
+    assert accounts_from_env() == [Account("b@example.com", "secret", auth.COOKIE_FILE)]
+
+
+def test_crawl_with_sessions(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(crawl_module, "is_goodreads_shelf", lambda url: "/review/list/" in url)
+    login = FakeLogin()
+    with StandInServer(books=150) as server, SessionManager(
+        [account(tmp_path, "a"), account(tmp_path, "b")], login=login
+    ) as sessions:
+        urls = [f"{server.base_url}/review/list/{user_id}?shelf=read" for user_id in range(1, 5)]
+        results = crawl(urls, concurrency=2, sessions=sessions)
+    assert all(result.ok and result.book_count == 150 for result in results)
+    assert sorted(login.calls) == ["a@example.com", "b@example.com"]
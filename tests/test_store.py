@@ -0,0 +1,84 @@
+import sqlite3
+from dataclasses import replace
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from goodreads_scraper.book import Book
+from goodreads_scraper.scrape import iter_shelf
+from goodreads_scraper.store import ShelfStore, shelf_name
+from goodreads_scraper.utils import extract_user_id, read_books_from_lxml
+from benchmarks.stand_in import StandInServer
+
+fixture_path = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
+SHELF_URL = "https://www.goodreads.com/review/list/71341746?shelf=read"
+
+
+@pytest.fixture
+def books() -> List[Book]:
+    return read_books_from_lxml(fixture_path.read_text(encoding="utf-8"))
+
+
+def test_extract_user_id() -> None:
+    assert extract_user_id("https://www.goodreads.com/user/show/71341746-tamir-einhorn-salem") == 71341746
+    assert extract_user_id(SHELF_URL) == 71341746
+    with pytest.raises(ValueError):
+        extract_user_id("https://www.goodreads.com/book/show/12345")
+    assert shelf_name(SHELF_URL) == "read"
+    assert shelf_name("https://www.goodreads.com/review/list/1?shelf=to-read") == "to-read"
+
+
+def test_store_round_trip(tmp_path: Path, books: List[Book]) -> None:
+    with ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        assert store.put_shelf(SHELF_URL, iter(books)) == len(books)
+        stored = store.get_shelf(SHELF_URL)
+        assert sorted(stored, key=lambda book: book.review_id) == sorted(books, key=lambda book: book.review_id)
+        # A profile URL reads its read shelf.
+        assert store.get_shelf("https://www.goodreads.com/user/show/71341746-tamir") == stored
+        assert store.user_ids() == [71341746]
+
+
+def test_store_replaces_shelf_and_shares_books(tmp_path: Path, books: List[Book]) -> None:
+    other_shelf = "https://www.goodreads.com/review/list/42?shelf=read"
+    with ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        store.put_shelf(SHELF_URL, books)
+        store.put_shelf(other_shelf, [replace(books[0], review_id=1, birthplace="Alcalá, Spain", country="Spain")])
+        # Storing the shelf again drops the books that left it, and keeps the author's birthplace.
+        store.put_shelf(SHELF_URL, books[:3])
+        stored = {book.review_id: book for book in store.get_shelf(SHELF_URL)}
+        assert set(stored) == {book.review_id for book in books[:3]}
+        assert (stored[books[0].review_id].birthplace, stored[books[0].review_id].country) == ("Alcalá, Spain", "Spain")
+
+    connection = sqlite3.connect(tmp_path / "goodreads.sqlite3")
+    assert connection.execute("SELECT count(*) FROM books").fetchone() == (len(books),)
+    assert connection.execute("SELECT count(*) FROM shelf_entries").fetchone() == (4,)
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"books_author_id", "books_isbn13"} <= indexes
+    connection.close()
+
+
+def test_store_review_on_several_shelves(tmp_path: Path, books: List[Book]) -> None:
+    favorites = "https://www.goodreads.com/review/list/71341746?shelf=favorites"
+    with ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        store.put_shelf(SHELF_URL, books)
+        # The same review twice in a shelf, like overlapping pages, is stored once.
+        assert store.put_shelf(favorites, [books[0], books[0]]) == 1
+        assert len(store.get_shelf(SHELF_URL)) == len(books)
+        assert store.get_shelf(favorites) == [books[0]]
+        store.put_shelf(favorites, [])
+        assert len(store.get_shelf(SHELF_URL)) == len(books)
+
+
+def test_store_skips_books_without_ids(tmp_path: Path) -> None:
+    with ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        assert store.put_shelf(SHELF_URL, [Book(title="No ids")]) == 0
+        assert store.get_shelf(SHELF_URL) == []
+
+
+def test_store_streamed_shelf(tmp_path: Path, saved_cookies) -> None:
+    with StandInServer(books=150) as server, ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        assert store.put_shelf(server.url, iter_shelf(server.url)) == 150
+    with ShelfStore(tmp_path / "goodreads.sqlite3") as store:
+        assert len(store.get_shelf(server.url)) == 150
@@ -0,0 +1,118 @@
+from dataclasses import replace
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from goodreads_scraper.book import STARS_ENUM, Book
+from goodreads_scraper.sync import snapshot_from_books, sync_shelf
+from tests.conftest import Reply
+
+ROWS_PER_PAGE = 10
+
+
+STARS = {rating: text for text, rating in STARS_ENUM.items()}
+
+
+def make_book(review_id: int, added: date, rating: int = 3) -> Book:
+    return Book(review_id=review_id, user_rating=rating, added_date=added)
+
+
+def render_page(books: List[Book], max_page: int, total: int | None = None) -> str:
+    rows = "".join(
+        f'<tr class="bookalike review" id="review_{book.review_id}">'
+        f'<td class="field rating"><div class="value">'
+        f'<span class="staticStars" title="{STARS[book.user_rating]}"></span></div></td>'
+        f'<td class="field date_added"><div class="value"><span>{book.added_date:%b %d, %Y}</span></div></td>'
+        "</tr>"
+        for book in books
+    )
+    if total is not None:
+        # Infinite-scroll page, only the status tells how many books there are.
+        footer = f'<div id="infiniteStatus">{len(books)} of {total} loaded</div>'
+    else:
+        pagination = "".join(f"<a>{i}</a>" for i in range(1, max_page + 1))
+        footer = f'<div id="reviewPagination">{pagination}<a>next »</a></div>'
+    return f"<html><body><table>{rows}</table>{footer}</body></html>"
+
+
+@pytest.fixture
+def sorted_shelf_server(request: pytest.FixtureRequest, serve) -> Tuple[str, List[Book], List[int]]:
+    """Serves the books of a shelf list, newest added first, ROWS_PER_PAGE per page.
+    Tests change the list to simulate what happened since the snapshot.
+    Parametrized indirectly with True, the pages are infinite-scroll ones, without pagination.
+    """
+    infinite = getattr(request, "param", False)
+    shelf: List[Book] = [make_book(i, date(2020, 1, 1) + timedelta(days=i)) for i in range(30)]
+    requested_pages: List[int] = []
+
+    def respond(request: BaseHTTPRequestHandler) -> Reply:
+        query = parse_qs(urlparse(request.path).query)
+        assert query["sort"] == ["date_added"] and query["order"] == ["d"]
+        page = int(query["page"][0])
+        requested_pages.append(page)
+        books = sorted(shelf, key=lambda book: book.review_id, reverse=True)
+        max_page = -(-len(books) // ROWS_PER_PAGE)
+        body = render_page(
+            books[(page - 1) * ROWS_PER_PAGE : page * ROWS_PER_PAGE], max_page, len(books) if infinite else None
+        )
+        return 200, body, {}
+
+    return f"{serve(respond)}/review/list/1?shelf=read", shelf, requested_pages
+
+
+def snapshot_of(shelf: List[Book]) -> Dict[int, Book]:
+    return snapshot_from_books(replace(book) for book in shelf)
+
+
+def test_sync_shelf_nothing_changed(sorted_shelf_server, saved_cookies) -> None:
+    url, shelf, requested_pages = sorted_shelf_server
+    diff = sync_shelf(url, snapshot_of(shelf))
+    assert diff == ([], [], [])
+    assert requested_pages == [1]
+
+
+def test_sync_shelf_added_and_changed(sorted_shelf_server, saved_cookies) -> None:
+    url, shelf, requested_pages = sorted_shelf_server
+    snapshot = snapshot_of(shelf)
+    shelf.append(make_book(100, date(2024, 1, 1)))
+    shelf[27].user_rating = 5
+    diff = sync_shelf(url, snapshot)
+    assert [book.review_id for book in diff.added] == [100]
+    assert [(old.review_id, new.user_rating) for old, new in diff.changed] == [(27, 5)]
+    assert diff.removed == []
+    assert requested_pages == [1, 2]
+
+
+def test_sync_shelf_removed(sorted_shelf_server, saved_cookies) -> None:
+    url, shelf, requested_pages = sorted_shelf_server
+    snapshot = snapshot_of(shelf)
+    shelf.remove(shelf[25])
+    shelf.remove(shelf[2])
+    diff = sync_shelf(url, snapshot)
+    # Only the removal in the walked date range can be seen without walking the whole shelf.
+    assert [book.review_id for book in diff.removed] == [25]
+    assert requested_pages == [1]
+
+    requested_pages.clear()
+    diff = sync_shelf(url, snapshot, full=True)
+    assert sorted(book.review_id for book in diff.removed) == [2, 25]
+    assert requested_pages == [1, 2, 3]
+
+
+
+@pytest.mark.parametrize("sorted_shelf_server", [True], indirect=True)
+def test_sync_shelf_infinite_scroll(sorted_shelf_server, saved_cookies) -> None:
+    url, shelf, requested_pages = sorted_shelf_server
+    snapshot = snapshot_of(shelf)
+    # The pages beyond the first are not walked, but their books are not removed either.
+    assert sync_shelf(url, snapshot) == ([], [], [])
+    assert requested_pages == [1]
+
+    requested_pages.clear()
+    shelf.remove(shelf[2])
+    diff = sync_shelf(url, snapshot, full=True)
+    assert [book.review_id for book in diff.removed] == [2]
+    assert requested_pages == [1, 2, 3]
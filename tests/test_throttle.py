@@ -0,0 +1,138 @@
+import asyncio
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+import time
+from typing import List
+
+import aiohttp
+import pytest
+import requests
+
+from goodreads_scraper.async_scrape import fetch_page_async
+from goodreads_scraper.throttle import FetchController, HostLimiter, TokenBucket, parse_retry_after
+from goodreads_scraper.utils import setup_session
+from tests.conftest import Reply
+
+
+class FlakyServer:
+    """Answers with the given statuses in order, then 200 for every request after them."""
+
+    def __init__(self, statuses: List[int]) -> None:
+        self.statuses = statuses
+        self.requests = 0
+        self.url = ""  # Set once it's served.
+
+    def respond(self, request: BaseHTTPRequestHandler) -> Reply:
+        status = self.statuses[self.requests] if self.requests < len(self.statuses) else 200
+        self.requests += 1
+        return status, "ok" if status == 200 else "slow down", {"Retry-After": "0"} if status == 429 else {}
+
+
+@pytest.fixture
+def flaky_server(request: pytest.FixtureRequest, serve) -> FlakyServer:
+    flaky = FlakyServer(request.param)
+    flaky.url = f"{serve(flaky.respond)}/review/list/1"
+    return flaky
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 55 <= parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60  # type: ignore[operator]
+
+
+def test_token_bucket() -> None:
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    bucket.pause(5)
+    assert bucket.reserve() == pytest.approx(5.1, abs=0.01)
+
+
+def test_host_limiter_aimd() -> None:
+    limiter = HostLimiter(initial_concurrency=4)
+    for _ in range(4):
+        assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    for _ in range(4):
+        limiter.release(0.1)
+    # About one more slot for every `limit` healthy responses.
+    assert limiter.try_acquire()
+    limiter.release(0.1)
+    assert int(limiter.limit) == 5
+    for _ in range(2):
+        # Both requests were in flight when the host pushed back, the limit is only halved once.
+        limiter.try_acquire()
+    limiter.release(0.1, throttled=True)
+    limiter.release(0.1, throttled=True)
+    assert int(limiter.limit) == 2
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.parametrize("flaky_server", [[429, 503]], indirect=True)
+def test_retry_until_success(flaky_server: FlakyServer) -> None:
+    controller = FetchController(backoff_base=0.01)
+    with setup_session(controller=controller) as session:
+        response = session.get(flaky_server.url)
+    assert response.status_code == 200 and response.text == "ok"
+    assert flaky_server.requests == 3
+    assert controller.host(flaky_server.url).limit < 8
+
+
+@pytest.mark.parametrize("flaky_server", [[500, 500, 500, 500]], indirect=True)
+def test_retry_gives_up(flaky_server: FlakyServer) -> None:
+    controller = FetchController(max_retries=2, backoff_base=0.01)
+    with setup_session(controller=controller) as session:
+        response = session.get(flaky_server.url)
+    assert response.status_code == 500
+    assert flaky_server.requests == 3
+
+
+@pytest.mark.parametrize("flaky_server", [[429, 502]], indirect=True)
+def test_retry_async(flaky_server: FlakyServer) -> None:
+    controller = FetchController(backoff_base=0.01)
+
+    async def fetch() -> str:
+        async with aiohttp.ClientSession() as session:
+            _, html = await fetch_page_async(session, asyncio.Semaphore(1), flaky_server.url, controller)
+        return html
+
+    assert asyncio.run(fetch()) == "ok"
+    assert flaky_server.requests == 3
+    assert controller.host(flaky_server.url).in_flight == 0
+
+
+@pytest.mark.parametrize("flaky_server", [[500, 500]], indirect=True)
+def test_no_retry_for_post(flaky_server: FlakyServer) -> None:
+    controller = FetchController(backoff_base=0.01)
+    with setup_session(controller=controller) as session:
+        response = session.post(flaky_server.url, data={"email": "reader@example.com"})
+    assert response.status_code == 500
+    assert flaky_server.requests == 1
+
+
+def test_fetch_frees_slot_on_other_errors() -> None:
+    controller = FetchController(initial_concurrency=2)
+    url = "https://www.goodreads.com/review/list/1"
+
+    def send() -> requests.Response:
+        raise requests.exceptions.InvalidHeader("bad header")
+
+    # A leaked slot would be taken for good, two of them and the next fetch would wait forever.
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.InvalidHeader):
+            controller.fetch(url, send)
+    assert controller.host(url).in_flight == 0
+
+
+def test_fetch_async_frees_slot_on_other_errors() -> None:
+    controller = FetchController()
+
+    async def fetch() -> None:
+        async with aiohttp.ClientSession() as session:
+            await fetch_page_async(session, asyncio.Semaphore(1), "not-a-url", controller)
+
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(fetch())
+    assert controller.host("not-a-url").in_flight == 0
@@ -7,12 +7,30 @@ from goodreads_scraper.utils import (
     extract_author_id,
     is_goodreads_shelf,
     setup_browser,
+    parse_max_page,
+    count_shelf_pages,
+    set_query_params,
+    create_read_page,
+    create_sorted_page,
+    parse_user_shelves,
+    page_wait,
+    read_books_from_lxml,
+    iter_books_from_pages,
+    BLOCKED_URLS,
 )
+from goodreads_scraper import utils
+from goodreads_scraper.book import books_to_columns, parse_goodreads_date
+from goodreads_scraper import auth
 from goodreads_scraper.auth import login
 import pytest
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 import os
+import json
+import shutil
+import subprocess
+import requests
+from pathlib import Path
 
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -145,6 +163,133 @@ def test_extract_author_id(url, expected_id):
 def test_browser_setup(chrome_browser: WebDriver):
     assert type(chrome_browser) is type(setup_browser())
 
+
+class FakeChrome:
+    """Records how setup_browser configures Chrome, without starting it."""
+
+    def __init__(self, options: Options) -> None:
+        self.options = options
+        self.cdp_commands: list = []
+        self.ready = False
+        self.async_result: dict = {}
+        self.async_calls: list = []
+
+    def set_script_timeout(self, timeout: float) -> None:
+        pass
+
+    def execute_async_script(self, script: str, *args: object) -> dict:
+        self.async_calls.append((script, args))
+        return self.async_result
+
+    def execute_cdp_cmd(self, command: str, params: dict) -> dict:
+        self.cdp_commands.append((command, params))
+        return {}
+
+    def execute_script(self, script: str) -> bool:
+        return self.ready
+
+    def find_element(self, by: str, value: str) -> str:
+        return value
+
+    def find_elements(self, by: str, value: str) -> list:
+        return []
+
+
+@pytest.mark.parametrize("lean", [True, False])
+def test_setup_browser_lean(monkeypatch: pytest.MonkeyPatch, lean: bool) -> None:
+    monkeypatch.setattr(utils, "install_chromedriver", lambda: None)
+    monkeypatch.setattr(webdriver, "Chrome", FakeChrome)
+    browser = setup_browser(lean=lean)
+    if lean:
+        assert browser.options.page_load_strategy == "eager"
+        assert ("Network.setBlockedURLs", {"urls": BLOCKED_URLS}) in browser.cdp_commands
+    else:
+        assert browser.options.page_load_strategy == "normal"
+        assert browser.cdp_commands == []
+
+
+def test_page_wait_waits_for_shelf(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(utils, "install_chromedriver", lambda: None)
+    monkeypatch.setattr(webdriver, "Chrome", FakeChrome)
+    browser = setup_browser()
+    browser.ready = True
+    assert page_wait(browser) == "body"
+
+
+def test_iter_books_from_pages(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(utils, "install_chromedriver", lambda: None)
+    monkeypatch.setattr(webdriver, "Chrome", FakeChrome)
+    saved_shelf = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
+    books = read_books_from_lxml(saved_shelf.read_text(encoding="utf-8"))
+    browser = setup_browser()
+    urls = ["https://www.goodreads.com/review/list/1?page=2", "https://www.goodreads.com/review/list/1?page=3"]
+    browser.async_result = {"pages": [books_to_columns(books[:2]), books_to_columns(books[2:3])]}
+    assert list(iter_books_from_pages(browser, urls, concurrency=2)) == [books[:2], books[2:3]]
+    script, args = browser.async_calls[0]
+    assert "function extractBooks" in script and "fetchShelfPages(" in script
+    assert args == (urls, 2)
+
+    # Each batch is its own script call, and its pages come out before the next batch is fetched.
+    browser.async_calls.clear()
+    browser.async_result = {"pages": [books_to_columns(books[:1])]}
+    pages = iter_books_from_pages(browser, urls, batch_size=1)
+    assert next(pages) == books[:1] and len(browser.async_calls) == 1
+    assert next(pages) == books[:1] and [args[0] for _, args in browser.async_calls] == [urls[:1], urls[1:]]
+
+    browser.async_result = {"error": "Error: HTTP 503 for https://www.goodreads.com/review/list/1?page=3"}
+    with pytest.raises(RuntimeError, match="HTTP 503"):
+        list(iter_books_from_pages(browser, urls))
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Needs node to run the page script.")
+def test_read_books_script_parses_like_python() -> None:
+    """Runs the parsing helpers of read_books.js in node, their values must be the ones Python would parse."""
+    dates = ["Sep 20, 2021", "sep 2, 2021", "Sep 2021", "1605", "0099", "Feb 30, 2021", "not set", "", "Sept 2021"]
+    pages = ["1,328\n        pp", "214 pp", "unknown", ""]
+    harness = utils.load_js_file("read_books.js") + f"""
+    console.log(JSON.stringify({{
+        dates: {json.dumps(dates)}.map(parseDate),
+        pages: {json.dumps(pages)}.map(parsePages),
+    }}));
+    """
+    output = subprocess.run(["node", "-e", harness], capture_output=True, text=True, check=True).stdout
+    parsed = json.loads(output)
+    expected_dates = [parse_goodreads_date(text) for text in dates]
+    assert parsed["dates"] == [value.isoformat() if value else None for value in expected_dates]
+    assert parsed["pages"] == [1328, 214, None, None]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Needs node to run the page script.")
+def test_fetch_pages_script() -> None:
+    """Runs fetch_pages.js in node, with fetch and DOMParser stubbed, to check its ordering, limit and errors."""
+    harness = utils.load_js_file("fetch_pages.js") + """
+    var active = 0, maxActive = 0;
+    globalThis.fetch = function(url) {
+        active++;
+        maxActive = Math.max(maxActive, active);
+        // Later pages answer first, so the results come in out of order.
+        var page = parseInt(/page=(\\d+)/.exec(url)[1]);
+        return new Promise(function(resolve) { setTimeout(resolve, 50 - page * 5); }).then(function() {
+            active--;
+            return {ok: !url.includes('fail'), status: 503, text: function() { return Promise.resolve(url); }};
+        });
+    };
+    globalThis.DOMParser = function() {};
+    DOMParser.prototype.parseFromString = function(html) { return html; };
+    function extractBooks(root) { return [root]; }
+    var urls = [2, 3, 4, 5, 6].map(function(page) { return '/review/list/1?page=' + page; });
+    fetchShelfPages(urls, 2, function(result) {
+        fetchShelfPages(['/review/list/1?page=2&fail=1'], 2, function(failed) {
+            console.log(JSON.stringify({result: result, maxActive: maxActive, failed: failed}));
+        });
+    });
+    """
+    output = subprocess.run(["node", "-e", harness], capture_output=True, text=True, check=True).stdout
+    outcome = json.loads(output)
+    assert outcome["result"]["pages"] == [[f"/review/list/1?page={page}"] for page in range(2, 7)]
+    assert outcome["maxActive"] == 2
+    assert "HTTP 503" in outcome["failed"]["error"]
+
 @pytest.mark.parametrize(
     "url,expected",
     [
@@ -187,4 +332,86 @@ def test_login(chrome_browser: WebDriver) -> None:
     )
     assert len(chrome_browser.find_elements(By.XPATH, "//button[contains(text(), 'Sign in with email')]")) == 0
     assert len(chrome_browser.find_elements(By.XPATH, "//a[contains(text(), 'My Books')]")) > 0
-    # TODO: How can I be sure this still works? What is the certainty I have?
\ No newline at end of file
+    # TODO: How can I be sure this still works? What is the certainty I have?
+
+
+@pytest.mark.parametrize(
+    "html,expected",
+    [
+        (
+            '<div id="reviewPagination"><a>1</a><a>2</a><a>17</a><a>next »</a></div>',
+            17,
+        ),
+        ('<div id="reviewPagination"></div>', 1),
+        ("<div></div>", 1),
+    ],
+)
+def test_parse_max_page(html: str, expected: int) -> None:
+    assert parse_max_page(html) == expected
+
+
+def test_set_query_params() -> None:
+    url = "https://www.goodreads.com/review/list/71341746?shelf=quarantine"
+    assert set_query_params(url, per_page=100) == f"{url}&per_page=100"
+    assert set_query_params(f"{url}&per_page=20", per_page=100) == f"{url}&per_page=100"
+    assert set_query_params(url, per_page=None) == url
+
+
+def test_create_read_page() -> None:
+    url = "https://www.goodreads.com/review/list/71341746?shelf=quarantine"
+    assert create_read_page(url, 2) == f"{url}&page=2"
+    assert create_read_page(f"{url}&sort=title&page=1", 3, 100) == f"{url}&sort=title&page=3&per_page=100"
+    assert create_read_page("https://www.goodreads.com/review/list/71341746", 2) == (
+        "https://www.goodreads.com/review/list/71341746?shelf=read&page=2"
+    )
+    assert create_sorted_page(url, 2) == f"{url}&page=2&sort=date_added&order=d"
+
+
+def test_parse_user_shelves() -> None:
+    saved_shelf = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
+    shelves = parse_user_shelves(saved_shelf.read_text(encoding="utf-8"))
+    assert list(shelves)[:3] == ["read", "currently-reading", "to-read"]
+    assert len(shelves) == 13
+    assert shelves["read"] == 322 and shelves["quarantine"] == 13
+    assert parse_user_shelves("<div></div>") == {}
+
+
+@pytest.mark.parametrize(
+    "status,books_on_page,expected",
+    [
+        ("100 of 321 loaded", 100, 4),
+        # Goodreads capped the page size we asked for, the real one comes from the page.
+        ("30 of 321 loaded", 30, 11),
+        ("13 of 13 loaded", 13, 1),
+        ("", 20, 2),
+    ],
+)
+def test_count_shelf_pages(status: str, books_on_page: int, expected: int) -> None:
+    html = (
+        '<div id="reviewPagination"><a>1</a><a>2</a><a>next »</a></div>'
+        f'<div id="infiniteStatus">{status}</div>'
+    )
+    assert count_shelf_pages(html, books_on_page) == expected
+
+
+def test_load_session_cookies(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cookie_file = tmp_path / "login.json"
+    monkeypatch.setattr(auth, "COOKIE_FILE", cookie_file)
+    session = requests.Session()
+    assert not auth.load_session_cookies(session)
+
+    cookie_file.write_text(
+        json.dumps([{"name": "session_id", "value": "abc", "domain": ".goodreads.com", "path": "/"}])
+    )
+    assert auth.load_session_cookies(session)
+    assert session.cookies.get("session_id", domain=".goodreads.com") == "abc"
+
+
+def test_is_signed_out() -> None:
+    saved_shelf = Path(__file__).parent.joinpath("test_assets", "example_goodreads.html")
+    shelf_url = "https://www.goodreads.com/review/list/71341746?shelf=quarantine"
+    assert auth.is_signed_out(shelf_url, saved_shelf.read_text(encoding="utf-8"))
+
+    signed_in_html = "<html><body><table><tr class='bookalike'></tr></table></body></html>"
+    assert not auth.is_signed_out(shelf_url, signed_in_html)
+    assert auth.is_signed_out("https://www.goodreads.com/user/sign_in", signed_in_html)